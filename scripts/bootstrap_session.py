@@ -4,8 +4,6 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from min_tokenization_translator.bootstrap import BootstrapConfig, bootstrap_environment
-
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Bootstrap a Min Tokenization Translator session workspace.")
@@ -26,6 +24,9 @@ def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
 
+    # Imported after parsing so ``--help`` stays instant.
+    from min_tokenization_translator.bootstrap import BootstrapConfig, bootstrap_environment
+
     config = BootstrapConfig(
         workspace_dir=args.workspace_dir,
         packs_dir=args.packs_dir,
@@ -43,6 +44,8 @@ def main() -> None:
 
     print("Workspace:", result.workspace_dir)
     print("Packs:", result.packs_dir)
+    if result.pack_registry is not None:
+        print("Registered Packs:", len(result.pack_registry))
     print("Feature Flags:", sorted(flag.name for flag in result.feature_flags.enabled))
     print("Handshake Packet:", result.handshake_packet)
 
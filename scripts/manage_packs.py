@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from min_tokenization_translator.packs import PackRegistry
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Manage the content-addressed dynamic pack registry.")
+    parser.add_argument("--packs-dir", type=Path, default=Path("./workspace/packs"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List registered packs.")
+
+    import_parser = commands.add_parser("import", help="Import pack manifests (JSON with 'entries' and optional 'name'/'id').")
+    import_parser.add_argument("manifests", type=Path, nargs="+")
+
+    export_parser = commands.add_parser("export", help="Export packs as JSON manifests.")
+    export_parser.add_argument("pack_ids", nargs="*", help="Pack IDs or unique prefixes (default: all packs).")
+    export_parser.add_argument("--out-dir", type=Path, default=None, help="Write <id>.json files here instead of stdout.")
+
+    remove_parser = commands.add_parser("remove", help="Delete packs from the registry.")
+    remove_parser.add_argument("pack_ids", nargs="+")
+
+    commands.add_parser("verify", help="Check every pack still matches its content hash.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    registry = PackRegistry(args.packs_dir)
+
+    if args.command == "list":
+        for pack_id in registry.pack_ids():
+            pack = registry.get(pack_id)
+            print(f"{pack_id}  {len(pack):6d} entries  {pack.name}")
+    elif args.command == "import":
+        for manifest in args.manifests:
+            print(registry.load_manifest_file(manifest))
+    elif args.command == "export":
+        pack_ids = [registry.resolve(prefix) for prefix in args.pack_ids] or registry.pack_ids()
+        manifests = [registry.export_manifest(pack_id) for pack_id in pack_ids]
+        if args.out_dir is None:
+            json.dump(manifests, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        else:
+            args.out_dir.mkdir(parents=True, exist_ok=True)
+            for manifest in manifests:
+                path = args.out_dir / f"{manifest['id']}.json"
+                path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+                print(path)
+    elif args.command == "remove":
+        for prefix in args.pack_ids:
+            registry.remove(registry.resolve(prefix))
+    elif args.command == "verify":
+        corrupt = [pack_id for pack_id in registry.pack_ids() if not registry.verify(pack_id)]
+        for pack_id in corrupt:
+            print(f"corrupt: {pack_id}")
+        if corrupt:
+            sys.exit(1)
+    registry.close()
+
+
+if __name__ == "__main__":
+    main()
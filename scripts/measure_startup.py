@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from min_tokenization_translator.startup import HEAVY_MODULES, IMPORT_BUDGETS_MS, budget_scale, profile_imports
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+CLI_SCRIPTS = ("run_benchmark.py", "bootstrap_session.py", "manage_packs.py", "train_dictionary.py", "run_server.py")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Measure the cold import time of each library and CLI entry point.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per entry point; the median is reported.")
+    parser.add_argument("--top", type=int, default=3, help="Show this many of the heaviest top-level imports.")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the measurements here.")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero when a library budget is exceeded.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SCRIPTS_DIR.parent / "src"), env.get("PYTHONPATH")]))
+    entries = {module: ["-c", f"import {module}"] for module in IMPORT_BUDGETS_MS}
+    entries.update({name: [str(SCRIPTS_DIR / name), "--help"] for name in CLI_SCRIPTS})
+
+    scale = budget_scale()
+    report = {}
+    failed = []
+    print(f"{'entry point':<44} {'median ms':>10} {'budget':>8} {'modules':>8}")
+    for name, argv in entries.items():
+        profile = profile_imports(argv, runs=args.runs, env=env, top=args.top)
+        budget = IMPORT_BUDGETS_MS.get(name)
+        heavy = sorted(HEAVY_MODULES.intersection(profile.modules)) if budget is not None else []
+        over = budget is not None and (profile.median_ms > budget * scale or heavy)
+        if over:
+            failed.append(name)
+        budget_text = f"{budget * scale:.0f}" if budget is not None else "-"
+        print(f"{name:<44} {profile.median_ms:10.1f} {budget_text:>8} {len(profile.modules):8d}{'  OVER' if over else ''}")
+        for module, elapsed in profile.heaviest:
+            print(f"    {elapsed:8.1f} ms  {module}")
+        if heavy:
+            print("    loads heavy modules:", ", ".join(heavy))
+        report[name] = {
+            "median_ms": profile.median_ms,
+            "samples_ms": profile.samples_ms,
+            "budget_ms": budget * scale if budget is not None else None,
+            "modules": len(profile.modules),
+            "heaviest": profile.heaviest,
+        }
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.check and failed:
+        sys.exit(f"Import budget exceeded: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,25 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from min_tokenization_translator.benchmark import BenchmarkConfig, BenchmarkRunner
-from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+# The library is imported inside the functions that use it, so ``--help`` and
+# argument errors return without loading the benchmark stack.
+if TYPE_CHECKING:
+    from min_tokenization_translator.tokenizer import Tokenizer
 
 
 def load_corpus(path: Path) -> list[str]:
-    text = path.read_text(encoding="utf-8")
-    if path.suffix == ".json":
-        data = json.loads(text)
-        if isinstance(data, list):
-            return [str(item) for item in data]
-        raise ValueError("JSON corpus must be a list of strings")
-    return [line.strip() for line in text.splitlines() if line.strip()]
+    from min_tokenization_translator.corpus import iter_corpus
+
+    return list(iter_corpus(path))
 
 
 def build_parser() -> argparse.ArgumentParser:
+    from min_tokenization_translator.batching import EXECUTOR_MODES
+
     parser = argparse.ArgumentParser(description="Run compression benchmarks.")
     parser.add_argument("--corpus", type=Path, required=True, help="Path to corpus file (.txt or .json list).")
     parser.add_argument("--runs", type=int, default=3)
@@ -30,13 +32,67 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--checksums", action="store_true")
     parser.add_argument("--mcp", action="store_true")
     parser.add_argument("--reuse-keys", action="store_true")
+    parser.add_argument("--tokenizer", type=str, default="gpt-4o-mini", help="Tokenizer fingerprint for symbol costs.")
+    parser.add_argument(
+        "--cost-dir",
+        type=Path,
+        action="append",
+        default=[],
+        help="Directory holding <tokenizer>.json symbol cost tables (repeatable).",
+    )
+    parser.add_argument("--bpe-ranks", type=Path, default=None, help="Offline .tiktoken rank file for token counting.")
+    parser.add_argument("--bpe-vocab", type=Path, default=None, help="GPT-2 style vocab.json (with --bpe-merges).")
+    parser.add_argument("--bpe-merges", type=Path, default=None, help="GPT-2 style merges.txt (with --bpe-vocab).")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes over the corpus before measuring.")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak allocation per stage via tracemalloc.")
+    parser.add_argument(
+        "--executor", choices=EXECUTOR_MODES, default="auto", help="How the batched stages spread work across cores."
+    )
+    parser.add_argument(
+        "--checksum-mb",
+        type=float,
+        default=0.0,
+        help="Also measure checksum seal/verify throughput over this many MB of synthetic payload.",
+    )
+    parser.add_argument(
+        "--metrics-overhead", action="store_true", help="Also measure the cost of the metrics instrumentation."
+    )
+    parser.add_argument("--json-out", type=Path, default=None, help="Write the machine-readable report to this path.")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline JSON report; exit non-zero on regression.")
+    parser.add_argument("--latency-threshold", type=float, default=10.0, help="Allowed p95 latency growth in percent.")
+    parser.add_argument("--savings-threshold", type=float, default=1.0, help="Allowed savings drop in percentage points.")
     return parser
 
 
+def load_tokenizer(args: argparse.Namespace) -> Tokenizer | None:
+    from min_tokenization_translator.tokenizer import BPETokenizer
+
+    if args.bpe_ranks:
+        return BPETokenizer.from_tiktoken_file(args.bpe_ranks)
+    if args.bpe_vocab or args.bpe_merges:
+        if not (args.bpe_vocab and args.bpe_merges):
+            raise SystemExit("--bpe-vocab and --bpe-merges must be given together")
+        return BPETokenizer.from_vocab_merges(args.bpe_vocab, args.bpe_merges)
+    return None
+
+
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
 
+    from min_tokenization_translator.benchmark import (
+        BenchmarkConfig,
+        BenchmarkResult,
+        BenchmarkRunner,
+        compare_results,
+        measure_checksum_throughput,
+        measure_metrics_overhead,
+        measure_serialization,
+    )
+    from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+    from min_tokenization_translator.costs import load_cost_table
+    from min_tokenization_translator.distiller import PromptDistiller
+
     corpus = load_corpus(args.corpus)
     feature_flags = FeatureFlags()
     feature_flags.enable(FeatureFlag.ASCII_CORE)
@@ -61,15 +117,67 @@ def main() -> None:
             corpus=corpus,
             feature_flags=feature_flags,
             runs=args.runs,
+            cost_table=load_cost_table(args.tokenizer, args.cost_dir),
+            tokenizer=load_tokenizer(args),
+            warmup=args.warmup,
+            trace_memory=args.trace_memory,
+            executor=args.executor,
         )
     )
     result = runner.run()
 
+    print("Tokenizer:", result.tokenizer)
     print("Baseline tokens:", result.baseline_tokens)
     print("Compressed tokens:", result.compressed_tokens)
     print("Token savings (%):", f"{result.token_savings_pct:.2f}")
     print("Average latency (ms):", f"{result.average_latency_ms:.4f}")
     print("Latency stddev (ms):", f"{result.stddev_latency_ms:.4f}")
+    print("Encode throughput (payloads/s):", f"{result.encode_throughput_per_s:.1f}")
+    print("Decode throughput (payloads/s):", f"{result.decode_throughput_per_s:.1f}")
+    for name, stats in result.stages.items():
+        line = (
+            f"  {name:<9} p50={stats.p50_ms:.4f}ms p95={stats.p95_ms:.4f}ms "
+            f"p99={stats.p99_ms:.4f}ms max={stats.max_ms:.4f}ms"
+        )
+        if args.trace_memory:
+            line += f" peak={stats.peak_alloc_bytes}B"
+        print(line)
+
+    if args.checksum_mb > 0:
+        checksum = measure_checksum_throughput(args.checksum_mb)
+        print("Checksum seal (MB/s):", f"{checksum['seal_mb_per_s']:.1f}")
+        print("Checksum verify (MB/s):", f"{checksum['verify_mb_per_s']:.1f}")
+        print("Checksum size overhead (%):", f"{checksum['size_overhead_pct']:.2f}")
+
+    if args.serialization:
+        distiller = PromptDistiller()
+        report = measure_serialization([distiller.distill(prompt) for prompt in corpus], runs=args.runs)
+        json_bytes = report["json"]["bytes"] or 1.0
+        for name, row in report.items():
+            print(
+                f"Serialization {name:<5} bytes={int(row['bytes'])} ({row['bytes'] / json_bytes * 100.0:.1f}% of json) "
+                f"serialize={row['serialize_ms']:.3f}ms deserialize={row['deserialize_ms']:.3f}ms"
+            )
+
+    if args.metrics_overhead:
+        overhead = measure_metrics_overhead(corpus, runs=args.runs)
+        print("Metrics counter inc (ns):", f"{overhead['counter_inc_ns']:.0f}")
+        print("Metrics histogram observe (ns):", f"{overhead['histogram_observe_ns']:.0f}")
+        print("Metrics labelled observe (ns):", f"{overhead['labelled_observe_ns']:.0f}")
+        print("Metrics disabled call (ns):", f"{overhead['disabled_call_ns']:.0f}")
+        print("Metrics pipeline overhead (%):", f"{overhead['pipeline_overhead_pct']:.2f}")
+        print("Metrics render (ms):", f"{overhead['render_ms']:.3f}")
+
+    if args.json_out:
+        args.json_out.write_text(json.dumps(result.to_dict(), indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = BenchmarkResult.from_dict(json.loads(args.compare.read_text(encoding="utf-8")))
+        regressions = compare_results(result, baseline, args.latency_threshold, args.savings_threshold)
+        for message in regressions:
+            print("REGRESSION:", message, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
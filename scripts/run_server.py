@@ -2,22 +2,30 @@
 from __future__ import annotations
 
 import argparse
+import importlib.util
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run the Min Tokenization Translator FastAPI server.")
     parser.add_argument("--host", default="0.0.0.0")
     parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; each builds its own app.")
     args = parser.parse_args()
 
-    try:
-        import uvicorn
-        from min_tokenization_translator.server import create_app
-    except ImportError as exc:  # pragma: no cover - optional dependency
-        raise SystemExit("Install fastapi and uvicorn extras to run the server.") from exc
+    # Check for the extras without importing them; only uvicorn is loaded here.
+    # The app is passed as a factory string, so FastAPI and the server module
+    # are imported once, inside the process that serves requests.
+    if any(importlib.util.find_spec(name) is None for name in ("fastapi", "uvicorn")):  # pragma: no cover
+        raise SystemExit("Install fastapi and uvicorn extras to run the server.")
+    import uvicorn
 
-    app = create_app()
-    uvicorn.run(app, host=args.host, port=args.port)
+    uvicorn.run(
+        "min_tokenization_translator.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
 
 
 if __name__ == "__main__":
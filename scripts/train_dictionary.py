@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Train a core phrase dictionary from prompt corpora.")
+    parser.add_argument(
+        "--corpus", type=Path, action="append", required=True, help="Corpus file (.txt or .json list); repeatable."
+    )
+    parser.add_argument("--out", type=Path, required=True, help="Write the ranked dictionary manifest here.")
+    parser.add_argument("--name", type=str, default="core")
+    parser.add_argument("--size", type=int, default=64, help="Maximum number of dictionary entries (up to 113).")
+    parser.add_argument("--min-count", type=int, default=2, help="Ignore phrases seen fewer times than this.")
+    parser.add_argument("--max-ngram", type=int, default=3, help="Longest word n-gram to mine.")
+    parser.add_argument("--capacity", type=int, default=200_000, help="Counter entries kept per table before pruning.")
+    parser.add_argument("--domain", type=str, default=None, help="Distill the corpus with this domain's vocabulary.")
+    parser.add_argument("--bpe-ranks", type=Path, default=None, help="Offline .tiktoken rank file for token scoring.")
+    parser.add_argument("--packs-dir", type=Path, default=None, help="Also register the dictionary as a pack here.")
+    parser.add_argument("--show", type=int, default=20, help="Print this many top-ranked phrases.")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    # Imported after parsing so ``--help`` stays instant.
+    from min_tokenization_translator.corpus import iter_corpus
+    from min_tokenization_translator.domains import DomainRegistry
+    from min_tokenization_translator.packs import PackRegistry
+    from min_tokenization_translator.tokenizer import BPETokenizer
+    from min_tokenization_translator.trainer import DictionaryTrainer
+
+    tokenizer = BPETokenizer.from_tiktoken_file(args.bpe_ranks) if args.bpe_ranks else None
+    distiller = DomainRegistry().distiller(args.domain)
+    trainer = DictionaryTrainer(distiller, tokenizer=tokenizer, max_ngram=args.max_ngram, capacity=args.capacity)
+    for path in args.corpus:
+        trainer.feed_many(iter_corpus(path))
+    dictionary = trainer.train(size=args.size, min_count=args.min_count, name=args.name)
+    dictionary.save(args.out)
+
+    print("Documents:", dictionary.documents)
+    print("Entries:", len(dictionary.candidates))
+    print("Estimated tokens saved on corpus:", sum(candidate.score for candidate in dictionary.candidates))
+    if trainer.floor:
+        print("Pruned counts at or below:", trainer.floor)
+    for symbol, candidate in zip(dictionary.entries().values(), dictionary.candidates[: args.show]):
+        print(f"  {symbol!r:>8}  {candidate.score:8d}  x{candidate.count:<6d} {candidate.phrase}")
+    if args.packs_dir is not None:
+        registry = PackRegistry(args.packs_dir)
+        print("Pack:", registry.add(dictionary.entries(), name=args.name))
+        registry.close()
+    print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
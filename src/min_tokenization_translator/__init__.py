@@ -4,29 +4,56 @@ Min Tokenization Translator compression stack.
 Provides modular components for feature flag negotiation, secure handshakes,
 bootstrap utilities, and benchmarking harnesses that implement the protocol
 described in ``prompt.md``.
+
+Exports are resolved lazily on first attribute access, so importing one
+submodule (or the package itself) does not pull in the rest of the stack.
 """
 
-from .config import FeatureFlag, FeatureFlags, FeatureParamSet
-from .handshake import HandshakeConfig, HandshakeManager
-from .bootstrap import BootstrapConfig, BootstrapResult, bootstrap_environment
-from .benchmark import BenchmarkConfig, BenchmarkResult, BenchmarkRunner
-from .distiller import DistilledPrompt, PromptDistiller
-from .encoder import EncodedResult, SymbolEncoder
-
-__all__ = [
-    "FeatureFlag",
-    "FeatureFlags",
-    "FeatureParamSet",
-    "HandshakeConfig",
-    "HandshakeManager",
-    "BootstrapConfig",
-    "BootstrapResult",
-    "bootstrap_environment",
-    "BenchmarkConfig",
-    "BenchmarkResult",
-    "BenchmarkRunner",
-    "DistilledPrompt",
-    "PromptDistiller",
-    "EncodedResult",
-    "SymbolEncoder",
-]
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List
+
+_EXPORTS: Dict[str, str] = {
+    "FeatureFlag": "config",
+    "FeatureFlags": "config",
+    "FeatureParamSet": "config",
+    "HandshakeConfig": "handshake",
+    "HandshakeManager": "handshake",
+    "BootstrapConfig": "bootstrap",
+    "BootstrapResult": "bootstrap",
+    "bootstrap_environment": "bootstrap",
+    "BenchmarkConfig": "benchmark",
+    "BenchmarkResult": "benchmark",
+    "BenchmarkRunner": "benchmark",
+    "DistilledPrompt": "distiller",
+    "PromptDistiller": "distiller",
+    "EncodedResult": "encoder",
+    "SymbolEncoder": "encoder",
+    "DecodedPayload": "decoder",
+    "SymbolDecoder": "decoder",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .benchmark import BenchmarkConfig, BenchmarkResult, BenchmarkRunner
+    from .bootstrap import BootstrapConfig, BootstrapResult, bootstrap_environment
+    from .config import FeatureFlag, FeatureFlags, FeatureParamSet
+    from .decoder import DecodedPayload, SymbolDecoder
+    from .distiller import DistilledPrompt, PromptDistiller
+    from .encoder import EncodedResult, SymbolEncoder
+    from .handshake import HandshakeConfig, HandshakeManager
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *__all__})
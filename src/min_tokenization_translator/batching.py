@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import math
+import os
+from itertools import repeat
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+T = TypeVar("T")
+R = TypeVar("R")
+S = TypeVar("S")
+
+EXECUTOR_MODES = ("auto", "inline", "thread", "process")
+
+# Below this many items the cost of spawning workers and pickling chunks
+# outweighs any parallel speed-up, so "auto" stays in-process.
+AUTO_PARALLEL_THRESHOLD = 256
+
+
+def resolve_executor(mode: str, item_count: int, max_workers: Optional[int] = None) -> str:
+    """Pick the concrete execution strategy for a batch of ``item_count`` items."""
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+    if mode != "auto":
+        return mode
+    workers = max_workers or os.cpu_count() or 1
+    if workers < 2 or item_count < AUTO_PARALLEL_THRESHOLD:
+        return "inline"
+    return "process"
+
+
+def chunk_items(items: Sequence[T], chunk_size: int) -> List[Sequence[T]]:
+    """Split ``items`` into contiguous chunks of at most ``chunk_size`` elements."""
+    return [items[start : start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def map_chunked(
+    worker: Callable[[S, Sequence[T]], List[R]],
+    target: S,
+    items: Sequence[T],
+    executor: str = "auto",
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[R]:
+    """
+    Apply ``worker(target, chunk)`` over contiguous chunks and flatten the results.
+
+    ``worker`` must be a module-level function and ``target`` picklable so the
+    process pool can ship them. Chunks are contiguous and results are gathered
+    in submission order, so output order never depends on worker count.
+    """
+    strategy = resolve_executor(executor, len(items), max_workers)
+    if strategy == "inline" or len(items) <= 1:
+        return worker(target, items)
+
+    # Deferred: the process pool pulls in multiprocessing, which inline callers never need.
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    workers = max_workers or os.cpu_count() or 1
+    size = chunk_size or max(1, math.ceil(len(items) / (workers * 4)))
+    chunks = chunk_items(items, size)
+    pool: Executor
+    if strategy == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+    with pool:
+        results: List[R] = []
+        for chunk_result in pool.map(worker, repeat(target), chunks):
+            results.extend(chunk_result)
+        return results
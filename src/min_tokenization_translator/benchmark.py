@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import json
+import math
 import statistics
 import time
-from dataclasses import dataclass
-from typing import List, Sequence
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, TypeVar
 
+from .checksum import DEFAULT_BLOCK_SIZE, seal, unseal
 from .config import FeatureFlags
-from .distiller import PromptDistiller
+from .costs import SymbolCostTable
+from .decoder import SymbolDecoder
+from .distiller import DistilledPrompt, PromptDistiller
 from .encoder import SymbolEncoder
+from .metrics import MetricsRegistry, ServiceMetrics
+from .serialization import deserialize_prompt, serialize_prompt
+from .tokenizer import CachedTokenizer, Tokenizer, WhitespaceTokenizer
+
+STAGES = ("distill", "encode", "decode", "tokenize")
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -17,6 +30,39 @@ class BenchmarkConfig:
     corpus: Sequence[str]
     feature_flags: FeatureFlags
     runs: int = 3
+    cost_table: Optional[SymbolCostTable] = None
+    tokenizer: Optional[Tokenizer] = None
+    warmup: int = 1
+    trace_memory: bool = False
+    executor: str = "auto"
+
+
+@dataclass
+class StageStats:
+    """Latency distribution and peak allocation of one pipeline stage."""
+
+    samples: int = 0
+    mean_ms: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    peak_alloc_bytes: int = 0
+
+    @classmethod
+    def from_samples(cls, samples_ms: Sequence[float], peak_alloc_bytes: int = 0) -> "StageStats":
+        if not samples_ms:
+            return cls(peak_alloc_bytes=peak_alloc_bytes)
+        ordered = sorted(samples_ms)
+        return cls(
+            samples=len(ordered),
+            mean_ms=statistics.fmean(ordered),
+            p50_ms=percentile(ordered, 50),
+            p95_ms=percentile(ordered, 95),
+            p99_ms=percentile(ordered, 99),
+            max_ms=ordered[-1],
+            peak_alloc_bytes=peak_alloc_bytes,
+        )
 
 
 @dataclass
@@ -28,6 +74,60 @@ class BenchmarkResult:
     token_savings_pct: float
     average_latency_ms: float
     stddev_latency_ms: float
+    encode_throughput_per_s: float = 0.0
+    decode_throughput_per_s: float = 0.0
+    tokenizer: str = WhitespaceTokenizer.name
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Machine-readable report, suitable for ``json.dump``."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "BenchmarkResult":
+        values = dict(data)
+        values["stages"] = {name: StageStats(**stats) for name, stats in values.get("stages", {}).items()}
+        return cls(**values)
+
+
+def percentile(ordered: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def compare_results(
+    current: BenchmarkResult,
+    baseline: BenchmarkResult,
+    latency_threshold_pct: float = 10.0,
+    savings_threshold_pct: float = 1.0,
+) -> List[str]:
+    """
+    List regressions of ``current`` against ``baseline``.
+
+    A stage regresses when its p95 latency grows by more than
+    ``latency_threshold_pct`` percent; savings regress when they drop by more
+    than ``savings_threshold_pct`` percentage points.
+    """
+    regressions: List[str] = []
+    limit = 1.0 + latency_threshold_pct / 100.0
+    for name, before in baseline.stages.items():
+        after = current.stages.get(name)
+        if after is None or before.p95_ms <= 0.0:
+            continue
+        if after.p95_ms > before.p95_ms * limit:
+            regressions.append(
+                f"{name} p95 latency {after.p95_ms:.4f}ms exceeds baseline {before.p95_ms:.4f}ms "
+                f"by more than {latency_threshold_pct:g}%"
+            )
+    if current.token_savings_pct < baseline.token_savings_pct - savings_threshold_pct:
+        regressions.append(
+            f"token savings {current.token_savings_pct:.2f}% fell below baseline "
+            f"{baseline.token_savings_pct:.2f}% by more than {savings_threshold_pct:g} points"
+        )
+    return regressions
 
 
 class BenchmarkRunner:
@@ -36,42 +136,44 @@ class BenchmarkRunner:
     def __init__(self, config: BenchmarkConfig):
         self.config = config
         self._distiller = PromptDistiller()
-        self._encoder = SymbolEncoder(config.feature_flags)
+        self._encoder = SymbolEncoder(config.feature_flags, cost_table=config.cost_table)
+        self._decoder = SymbolDecoder(config.feature_flags.params)
+        self._tokenizer = CachedTokenizer(config.tokenizer or WhitespaceTokenizer())
 
-    def _mock_token_count(self, text: str) -> int:
-        """
-        Stand-in tokenizer; replace with actual tokenizer API during integration.
+    def run(self) -> BenchmarkResult:
         """
-        return max(1, len(text.split()))
+        Time every stage over ``runs`` batched passes of the corpus.
 
-    def _compress_prompt(self, prompt: str) -> str:
+        Stages go through the batch entry points, so each run yields one
+        sample per stage: the batch time divided by the corpus size. Each
+        timed run counts tokens through a fresh memo, so the tokenize stage
+        measures the backend rather than lookups of earlier runs.
         """
-        Placeholder compression logic.
-        Actual implementation should call distiller and encoder modules.
-        """
-        distilled = self._distiller.distill(prompt)
-        encoded = self._encoder.encode(distilled)
-        return encoded.payload
+        corpus = list(self.config.corpus)
+        for _ in range(self.config.warmup):
+            self._process(corpus, self._tokenizer, None)
 
-    def run(self) -> BenchmarkResult:
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
         baseline_tokens = 0
         compressed_tokens = 0
-        latencies: List[float] = []
-
         for _ in range(self.config.runs):
-            for prompt in self.config.corpus:
-                baseline_tokens += self._mock_token_count(prompt)
-                start = time.perf_counter()
-                compressed = self._compress_prompt(prompt)
-                latencies.append((time.perf_counter() - start) * 1000.0)
-                compressed_tokens += self._mock_token_count(compressed)
+            baseline, compressed = self._process(corpus, CachedTokenizer(self._tokenizer.backend), samples)
+            baseline_tokens += baseline
+            compressed_tokens += compressed
+
+        peaks = self._trace_peaks() if self.config.trace_memory else {}
+        stages = {stage: StageStats.from_samples(samples[stage], peaks.get(stage, 0)) for stage in STAGES}
 
-        runs_completed = max(1, self.config.runs * len(self.config.corpus))
+        latencies = [distill + encode for distill, encode in zip(samples["distill"], samples["encode"])]
+        runs_completed = max(1, self.config.runs * len(corpus))
         avg_latency = statistics.mean(latencies) if latencies else 0.0
         std_latency = statistics.pstdev(latencies) if len(latencies) > 1 else 0.0
         savings_pct = 0.0
         if baseline_tokens:
             savings_pct = 100.0 * (1 - (compressed_tokens / baseline_tokens))
+        encode_seconds = sum(samples["encode"]) * len(corpus) / 1000.0
+        decode_seconds = sum(samples["decode"]) * len(corpus) / 1000.0
+        payloads = len(latencies) * len(corpus)
 
         return BenchmarkResult(
             baseline_tokens=baseline_tokens // runs_completed,
@@ -79,4 +181,195 @@ class BenchmarkRunner:
             token_savings_pct=savings_pct,
             average_latency_ms=avg_latency,
             stddev_latency_ms=std_latency,
+            encode_throughput_per_s=payloads / encode_seconds if encode_seconds else 0.0,
+            decode_throughput_per_s=payloads / decode_seconds if decode_seconds else 0.0,
+            tokenizer=self._tokenizer.name,
+            stages=stages,
         )
+
+    def _process(
+        self, corpus: List[str], tokenizer: Tokenizer, samples: Optional[Dict[str, List[float]]]
+    ) -> tuple[int, int]:
+        """Push the corpus through every stage, recording per-prompt latencies when ``samples`` is given."""
+        executor = self.config.executor
+        clock = time.perf_counter
+        start = clock()
+        distilled = self._distiller.distill_many(corpus, executor=executor)
+        distilled_at = clock()
+        encoded = self._encoder.encode_many(distilled, executor=executor)
+        encoded_at = clock()
+        self._decoder.decode_many(encoded, executor=executor)
+        decoded_at = clock()
+        counts = tokenizer.count_many(corpus + [result.payload for result in encoded])
+        counted_at = clock()
+        if samples is not None and corpus:
+            scale = 1000.0 / len(corpus)
+            samples["distill"].append((distilled_at - start) * scale)
+            samples["encode"].append((encoded_at - distilled_at) * scale)
+            samples["decode"].append((decoded_at - encoded_at) * scale)
+            samples["tokenize"].append((counted_at - decoded_at) * scale)
+        return sum(counts[: len(corpus)]), sum(counts[len(corpus) :])
+
+    def _trace_peaks(self) -> Dict[str, int]:
+        """
+        Measure peak allocation per stage in a separate pass.
+
+        tracemalloc slows allocation-heavy code considerably, so it never runs
+        while latencies are being sampled. The pass uses a fresh distiller,
+        encoder, decoder and memo so warm caches do not hide allocations.
+        """
+        peaks = {stage: 0 for stage in STAGES}
+        distiller = PromptDistiller()
+        encoder = SymbolEncoder(self.config.feature_flags, cost_table=self.config.cost_table)
+        decoder = SymbolDecoder(self.config.feature_flags.params)
+        tokenizer = CachedTokenizer(self._tokenizer.backend)
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        try:
+            for prompt in self.config.corpus:
+                distilled = _traced(peaks, "distill", lambda: distiller.distill(prompt))
+                encoded = _traced(peaks, "encode", lambda: encoder.encode(distilled))
+                _traced(peaks, "decode", lambda: decoder.decode_result(encoded))
+                _traced(peaks, "tokenize", lambda: tokenizer.count_many([prompt, encoded.payload]))
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+        return peaks
+
+
+def _traced(peaks: Dict[str, int], stage: str, call: Callable[[], T]) -> T:
+    tracemalloc.reset_peak()
+    floor = tracemalloc.get_traced_memory()[0]
+    result = call()
+    peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - floor)
+    return result
+
+
+def measure_checksum_throughput(
+    megabytes: float = 4.0, block_size: int = DEFAULT_BLOCK_SIZE, runs: int = 3
+) -> Dict[str, float]:
+    """Best-of-``runs`` seal/verify throughput in MB/s plus the size overhead of ``?xx`` blocks."""
+    alphabet = "".join(SymbolEncoder._SYMBOL_POOL) + "|"
+    text = (alphabet * (int(megabytes * 1024 * 1024) // len(alphabet) + 1))[: int(megabytes * 1024 * 1024)]
+    seal_s = verify_s = math.inf
+    sealed = ""
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        sealed = seal(text, block_size)
+        sealed_at = time.perf_counter()
+        unseal(sealed, block_size)
+        seal_s = min(seal_s, sealed_at - started)
+        verify_s = min(verify_s, time.perf_counter() - sealed_at)
+    return {
+        "seal_mb_per_s": megabytes / seal_s if seal_s else math.inf,
+        "verify_mb_per_s": megabytes / verify_s if verify_s else math.inf,
+        "size_overhead_pct": (len(sealed) - len(text)) / len(text) * 100.0 if text else 0.0,
+    }
+
+
+def measure_serialization(
+    prompts: Sequence[DistilledPrompt], runs: int = 3, codecs: Sequence[str] = ("none", "zlib", "lzma")
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare JSON with each binary codec over ``prompts``.
+
+    Reports total size in bytes and best-of-``runs`` serialize/deserialize
+    time in milliseconds for the whole set, keyed by format name.
+    """
+
+    def to_json(prompt: DistilledPrompt) -> bytes:
+        record = {
+            "graph": list(prompt.graph),
+            "residual_note": prompt.residual_note,
+            "lexicon": prompt.lexicon,
+            "metrics": prompt.metrics,
+        }
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def from_json(data: bytes) -> DistilledPrompt:
+        return DistilledPrompt(**json.loads(data))
+
+    formats: Dict[str, tuple] = {"json": (to_json, from_json)}
+    for codec in codecs:
+        formats[codec] = (lambda prompt, codec=codec: serialize_prompt(prompt, codec), deserialize_prompt)
+    report: Dict[str, Dict[str, float]] = {}
+    for name, (dump, load) in formats.items():
+        dump_s = load_s = math.inf
+        blobs: List[bytes] = []
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            blobs = [dump(prompt) for prompt in prompts]
+            dumped_at = time.perf_counter()
+            for blob in blobs:
+                load(blob)
+            dump_s = min(dump_s, dumped_at - started)
+            load_s = min(load_s, time.perf_counter() - dumped_at)
+        report[name] = {
+            "bytes": float(sum(len(blob) for blob in blobs)),
+            "serialize_ms": dump_s * 1000.0,
+            "deserialize_ms": load_s * 1000.0,
+        }
+    return report
+
+
+def measure_metrics_overhead(prompts: Sequence[str], runs: int = 3, iterations: int = 100_000) -> Dict[str, float]:
+    """
+    Cost of the metrics instrumentation.
+
+    Reports nanoseconds per counter ``inc``, histogram ``observe`` (plain and
+    via ``labels``) and disabled-registry call, milliseconds per Prometheus
+    render, and the best-of-``runs`` slowdown of distill + encode over
+    ``prompts`` when every prompt is recorded through ``ServiceMetrics``.
+    """
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "Benchmark counter.")
+    histogram = registry.histogram("bench_seconds", "Benchmark histogram.", ["stage"])
+    child = histogram.labels("distill")
+    null = MetricsRegistry(enabled=False).counter("bench_total", "Disabled counter.")
+    loop = range(iterations)
+
+    def per_call_ns(call: Callable[[], None]) -> float:
+        best = math.inf
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            for _ in loop:
+                call()
+            best = min(best, time.perf_counter() - started)
+        return best / iterations * 1e9
+
+    baseline_ns = per_call_ns(lambda: None)
+    report = {
+        "counter_inc_ns": per_call_ns(counter.inc) - baseline_ns,
+        "histogram_observe_ns": per_call_ns(lambda: child.observe(0.003)) - baseline_ns,
+        "labelled_observe_ns": per_call_ns(lambda: histogram.labels("distill").observe(0.003)) - baseline_ns,
+        "disabled_call_ns": per_call_ns(null.inc) - baseline_ns,
+    }
+
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder()
+    recorder = ServiceMetrics(MetricsRegistry())
+
+    def pipeline(record: bool) -> float:
+        started = time.perf_counter()
+        for prompt in prompts:
+            begun = time.perf_counter()
+            distilled = distiller.distill(prompt)
+            distilled_at = time.perf_counter()
+            result = encoder.encode(distilled)
+            if record:
+                recorder.distilled("", prompt, distilled, distilled_at - begun)
+                recorder.encoded(prompt, result, time.perf_counter() - distilled_at)
+        return time.perf_counter() - started
+
+    pipeline(False)
+    plain = recorded = math.inf
+    # Interleaved so drift on a busy host hits both variants alike.
+    for _ in range(max(1, runs)):
+        plain = min(plain, pipeline(False))
+        recorded = min(recorded, pipeline(True))
+    report["pipeline_overhead_pct"] = 100.0 * (recorded - plain) / plain if plain else 0.0
+    started = time.perf_counter()
+    recorder.registry.render()
+    report["render_ms"] = (time.perf_counter() - started) * 1000.0
+    return report
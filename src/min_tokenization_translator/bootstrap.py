@@ -6,6 +6,9 @@ from typing import Optional
 
 from .config import FeatureFlag, FeatureFlags
 from .handshake import HandshakeConfig, HandshakeManager
+from .keypool import KeyPool
+from .packs import PackRegistry
+from .tickets import TicketCache
 
 
 @dataclass
@@ -23,6 +26,9 @@ class BootstrapConfig:
     preload_serialization: bool = False
     enable_mcp_tooling: bool = False
     override_tokenizer_fingerprint: Optional[str] = None
+    key_pool: Optional[KeyPool] = None
+    ticket_cache: Optional[TicketCache] = None
+    resumption_ticket: Optional[str] = None
 
 
 @dataclass
@@ -33,15 +39,23 @@ class BootstrapResult:
     packs_dir: Path
     feature_flags: FeatureFlags
     handshake_packet: str
+    resumption_ticket: Optional[str] = None
+    resumed: bool = False
+    pack_registry: Optional[PackRegistry] = None
+    keygen_seconds: float = 0.0
+    tokenizer_fingerprint: str = ""
 
 
 def bootstrap_environment(config: BootstrapConfig) -> BootstrapResult:
     """
     Prepare directories, feature flags, and initial handshake packet.
-    """
 
-    config.workspace_dir.mkdir(parents=True, exist_ok=True)
-    config.packs_dir.mkdir(parents=True, exist_ok=True)
+    When ``resumption_ticket`` is valid for the requested features and
+    tokenizer, directory setup and key generation are skipped and the
+    session's existing key is reused with a fresh nonce. With a ticket
+    cache the session keypair lives until the cache evicts its ticket;
+    without one it stays in ``workspace_dir/.keys`` for the caller.
+    """
 
     feature_flags = FeatureFlags()
     feature_flags.enable(FeatureFlag.ASCII_CORE)
@@ -72,13 +86,31 @@ def bootstrap_environment(config: BootstrapConfig) -> BootstrapResult:
     if config.override_tokenizer_fingerprint:
         handshake_config.tokenizer_fingerprint = config.override_tokenizer_fingerprint
 
-    manager = HandshakeManager(handshake_config, feature_flags)
-    artifacts = manager.prepare_handshake()
+    manager = HandshakeManager(
+        handshake_config,
+        feature_flags,
+        key_pool=config.key_pool,
+        ticket_cache=config.ticket_cache,
+    )
+    artifacts = None
+    if config.resumption_ticket:
+        artifacts = manager.resume_handshake(config.resumption_ticket)
+    resumed = artifacts is not None
+    if artifacts is None:
+        config.workspace_dir.mkdir(parents=True, exist_ok=True)
+        config.packs_dir.mkdir(parents=True, exist_ok=True)
+        artifacts = manager.prepare_handshake()
     packet = manager.build_handshake_packet(artifacts)
+    ticket = config.resumption_ticket if resumed else manager.issue_ticket(artifacts)
 
     return BootstrapResult(
         workspace_dir=config.workspace_dir,
         packs_dir=config.packs_dir,
         feature_flags=feature_flags,
         handshake_packet=packet,
+        resumption_ticket=ticket,
+        resumed=resumed,
+        pack_registry=PackRegistry(config.packs_dir) if config.enable_dynamic_packs else None,
+        keygen_seconds=0.0 if resumed else artifacts.keygen_seconds,
+        tokenizer_fingerprint=handshake_config.tokenizer_fingerprint,
     )
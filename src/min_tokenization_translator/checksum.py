@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+CHECKSUM_MARKER = "?"
+RETRANSMIT_MARKER = ">"
+DEFAULT_BLOCK_SIZE = 64
+_CHECK_LENGTH = 3  # "?" + two hex digits
+_HEX = tuple(f"{value:02x}" for value in range(256))
+
+
+class ChecksumError(ValueError):
+    """Raised when sealed blocks fail verification; ``blocks`` lists the bad indices."""
+
+    def __init__(self, blocks: List[int]):
+        super().__init__(f"Checksum mismatch in blocks {blocks}")
+        self.blocks = blocks
+
+
+def block_checksum(block: str) -> str:
+    """CRC-32 of the block folded to one byte, as two hex digits."""
+    return _fold(zlib.crc32(block.encode("utf-8")))
+
+
+def _fold(crc: int) -> str:
+    return _HEX[(crc ^ (crc >> 8) ^ (crc >> 16) ^ (crc >> 24)) & 0xFF]
+
+
+def split_blocks(text: str, block_size: int = DEFAULT_BLOCK_SIZE) -> List[str]:
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    return [text[start : start + block_size] for start in range(0, len(text), block_size)]
+
+
+def seal(text: str, block_size: int = DEFAULT_BLOCK_SIZE) -> str:
+    """Append a ``?xx`` checksum after every ``block_size`` characters of ``text``."""
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    data = text.encode("utf-8")
+    if len(data) != len(text):
+        return "".join(f"{block}{CHECKSUM_MARKER}{block_checksum(block)}" for block in split_blocks(text, block_size))
+    # ASCII: character and byte offsets coincide, so CRC straight off one encoded buffer.
+    view = memoryview(data)
+    crc32 = zlib.crc32
+    parts: List[str] = []
+    append = parts.append
+    for start in range(0, len(text), block_size):
+        end = start + block_size
+        append(text[start:end])
+        append(CHECKSUM_MARKER + _fold(crc32(view[start:end])))
+    return "".join(parts)
+
+
+def unseal(sealed: str, block_size: int = DEFAULT_BLOCK_SIZE) -> str:
+    """Verify and strip checksums; raise ``ChecksumError`` naming every corrupted block."""
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    data = sealed.encode("utf-8")
+    if len(data) == len(sealed):
+        view = memoryview(data)
+        crc32 = zlib.crc32
+        step = block_size + _CHECK_LENGTH
+        parts: List[str] = []
+        append = parts.append
+        intact = True
+        for start in range(0, len(sealed), step):
+            end = min(start + step, len(sealed)) - _CHECK_LENGTH
+            if end <= start or sealed[end] != CHECKSUM_MARKER or sealed[end + 1 : end + 3] != _fold(
+                crc32(view[start:end])
+            ):
+                intact = False
+                break
+            append(sealed[start:end])
+        if intact:
+            return "".join(parts)
+    # Slow path: non-ASCII payloads, and collecting every bad block for the error.
+    receiver = BlockReceiver(block_size)
+    receiver.feed(sealed)
+    receiver.close()
+    return receiver.text()
+
+
+def retransmit_request(blocks: List[int]) -> str:
+    """Stage 1 ``>`` request for specific blocks, e.g. ``>1,4``."""
+    return RETRANSMIT_MARKER + ",".join(str(index) for index in blocks)
+
+
+def parse_retransmit_request(request: str) -> List[int]:
+    if not request.startswith(RETRANSMIT_MARKER):
+        raise ValueError(f"Not a retransmit request: {request!r}")
+    body = request[len(RETRANSMIT_MARKER) :]
+    try:
+        return [int(index) for index in body.split(",")] if body else []
+    except ValueError as exc:
+        raise ValueError(f"Malformed retransmit request: {request!r}") from exc
+
+
+@dataclass
+class Block:
+    index: int
+    data: str
+    ok: bool
+
+
+class BlockSender:
+    """Seals a payload and answers retransmit requests with just the requested blocks."""
+
+    def __init__(self, text: str, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.block_size = block_size
+        self._blocks = split_blocks(text, block_size)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def sealed(self) -> str:
+        return "".join(self._sealed_block(index) for index in range(len(self._blocks)))
+
+    def respond(self, request: str) -> str:
+        """Reply to ``>i,j`` with ``i:<block>?xx`` entries, concatenated in request order."""
+        parts = []
+        for index in parse_retransmit_request(request):
+            if not 0 <= index < len(self._blocks):
+                raise ValueError(f"Block {index} does not exist")
+            parts.append(f"{index}:{self._sealed_block(index)}")
+        return "".join(parts)
+
+    def _sealed_block(self, index: int) -> str:
+        block = self._blocks[index]
+        return f"{block}{CHECKSUM_MARKER}{block_checksum(block)}"
+
+
+class BlockReceiver:
+    """
+    Verifies sealed blocks as chunks arrive.
+
+    Blocks are located by position, so payload characters (``?`` included)
+    never need escaping. ``feed`` returns each block as soon as it is
+    complete; corrupted ones are remembered and can be repaired from a
+    ``BlockSender.respond`` reply to ``request()``.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        self.block_size = block_size
+        self._buffer = ""
+        self._blocks: Dict[int, str] = {}
+        self._lengths: Dict[int, int] = {}
+        self._corrupted: List[int] = []
+        self._closed = False
+
+    @property
+    def corrupted(self) -> List[int]:
+        return sorted(self._corrupted)
+
+    def feed(self, chunk: str) -> List[Block]:
+        self._buffer += chunk
+        step = self.block_size + _CHECK_LENGTH
+        blocks: List[Block] = []
+        offset = 0
+        # Only the final block can be short, so every complete step-sized slice is a block.
+        while len(self._buffer) - offset >= step:
+            blocks.append(self._take(self._buffer[offset : offset + step]))
+            offset += step
+        self._buffer = self._buffer[offset:]
+        return blocks
+
+    def close(self) -> List[Block]:
+        """Flush the final (short) block; raise ``ChecksumError`` if any block failed."""
+        blocks: List[Block] = []
+        if self._buffer:
+            if len(self._buffer) <= _CHECK_LENGTH:
+                raise ValueError("Truncated sealed payload")
+            blocks.append(self._take(self._buffer))
+            self._buffer = ""
+        self._closed = True
+        if self._corrupted:
+            raise ChecksumError(self.corrupted)
+        return blocks
+
+    def request(self) -> Optional[str]:
+        return retransmit_request(self.corrupted) if self._corrupted else None
+
+    def accept(self, response: str) -> List[int]:
+        """Apply a retransmit reply; return the indices still corrupted."""
+        offset = 0
+        while offset < len(response):
+            colon = response.find(":", offset)
+            if colon < 0 or not response[offset:colon].isdigit():
+                raise ValueError("Malformed retransmit response")
+            index = int(response[offset:colon])
+            length = self._lengths.get(index)
+            if length is None:
+                raise ValueError(f"Retransmitted block {index} was never received")
+            sealed = response[colon + 1 : colon + 1 + length]
+            offset = colon + 1 + length
+            if self._verify(sealed) is not None and index in self._corrupted:
+                self._corrupted.remove(index)
+                self._blocks[index] = sealed[:-_CHECK_LENGTH]
+        return self.corrupted
+
+    def text(self) -> str:
+        if not self._closed or self._buffer:
+            raise ValueError("Sealed payload is incomplete")
+        if self._corrupted:
+            raise ChecksumError(self.corrupted)
+        return "".join(self._blocks[index] for index in range(len(self._blocks)))
+
+    def _take(self, sealed: str) -> Block:
+        index = len(self._lengths)
+        self._lengths[index] = len(sealed)
+        data = self._verify(sealed)
+        if data is None:
+            self._corrupted.append(index)
+            self._blocks[index] = sealed[:-_CHECK_LENGTH]
+            return Block(index, sealed[:-_CHECK_LENGTH], False)
+        self._blocks[index] = data
+        return Block(index, data, True)
+
+    @staticmethod
+    def _verify(sealed: str) -> Optional[str]:
+        data, marker, digest = sealed[:-_CHECK_LENGTH], sealed[-_CHECK_LENGTH], sealed[-2:]
+        if marker != CHECKSUM_MARKER or block_checksum(data) != digest:
+            return None
+        return data
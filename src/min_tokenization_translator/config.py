@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import MutableSet
+from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, Optional, Set, Tuple
 
 
 class FeatureFlag(Enum):
@@ -17,6 +19,30 @@ class FeatureFlag(Enum):
     MCP_TOOLING = auto()
     REUSABLE_KEYS = auto()
 
+    @property
+    def bit(self) -> int:
+        return 1 << (self.value - 1)
+
+
+ALL_FLAGS_MASK = sum(flag.bit for flag in FeatureFlag)
+_FLAGS_BY_BIT = tuple(sorted(FeatureFlag, key=lambda flag: flag.value))
+
+
+def flags_from_mask(mask: int) -> FrozenSet[FeatureFlag]:
+    return _MASK_TO_FLAGS[mask & ALL_FLAGS_MASK]
+
+
+def mask_from_flags(flags: Iterable[FeatureFlag]) -> int:
+    mask = 0
+    for flag in flags:
+        mask |= flag.bit
+    return mask
+
+
+_MASK_TO_FLAGS: Tuple[FrozenSet[FeatureFlag], ...] = tuple(
+    frozenset(flag for flag in _FLAGS_BY_BIT if mask & flag.bit) for mask in range(ALL_FLAGS_MASK + 1)
+)
+
 
 @dataclass(frozen=True)
 class FeatureParamSet:
@@ -24,6 +50,8 @@ class FeatureParamSet:
     String-level representation of feature toggles for handshake transmission.
 
     Each flag is serialized into a short token so the payload remains compact.
+    Encodings of every flag combination are precomputed once per parameter
+    set, so canonical payloads encode and decode with a single table lookup.
     """
 
     ascii_symbol: str = "~a"
@@ -35,78 +63,193 @@ class FeatureParamSet:
     mcp_symbol: str = "~m"
     reusable_keys_symbol: str = "~k"
 
+    def symbol_for(self, flag: FeatureFlag) -> str:
+        return _flag_tables(self).symbols[flag.value - 1]
+
     def encode_flags(self, flags: Iterable[FeatureFlag]) -> str:
         """Return a compressed string with the encoded feature set."""
-        symbol_map = {
-            FeatureFlag.ASCII_CORE: self.ascii_symbol,
-            FeatureFlag.UNICODE_OVERLAY: self.unicode_symbol,
-            FeatureFlag.SERIALIZATION: self.serialization_symbol,
-            FeatureFlag.DYNAMIC_PACKS: self.dynamic_packs_symbol,
-            FeatureFlag.RELATIONAL_CONTEXT: self.relational_context_symbol,
-            FeatureFlag.CHECKSUM_BLOCKS: self.checksum_symbol,
-            FeatureFlag.MCP_TOOLING: self.mcp_symbol,
-            FeatureFlag.REUSABLE_KEYS: self.reusable_keys_symbol,
-        }
-        return "".join(symbol_map[flag] for flag in flags)
+        symbols = _flag_tables(self).symbols
+        return "".join(symbols[flag.value - 1] for flag in flags)
+
+    def encode_mask(self, mask: int) -> str:
+        """Return the canonical (flag-value ordered) payload for a bitmask."""
+        return _flag_tables(self).by_mask[mask & ALL_FLAGS_MASK]
+
+    def decode_mask(self, payload: str) -> int:
+        """Parse a payload into a bitmask of enabled flags."""
+        tables = _flag_tables(self)
+        mask = tables.by_payload.get(payload)
+        if mask is not None:
+            return mask
+        mask = 0
+        index = 0
+        end = len(payload)
+        while index < end:
+            for length in tables.lengths:
+                bit = tables.by_symbol.get(payload[index : index + length])
+                if bit is not None:
+                    mask |= bit
+                    index += length
+                    break
+            else:
+                raise ValueError(f"Trailing token could not be decoded: {payload[index:]!r}")
+        return mask
 
     def decode_flags(self, payload: str) -> Set[FeatureFlag]:
         """Parse feature flags from a compressed payload string."""
-        reverse_map = {
-            self.ascii_symbol: FeatureFlag.ASCII_CORE,
-            self.unicode_symbol: FeatureFlag.UNICODE_OVERLAY,
-            self.serialization_symbol: FeatureFlag.SERIALIZATION,
-            self.dynamic_packs_symbol: FeatureFlag.DYNAMIC_PACKS,
-            self.relational_context_symbol: FeatureFlag.RELATIONAL_CONTEXT,
-            self.checksum_symbol: FeatureFlag.CHECKSUM_BLOCKS,
-            self.mcp_symbol: FeatureFlag.MCP_TOOLING,
-            self.reusable_keys_symbol: FeatureFlag.REUSABLE_KEYS,
-        }
-        flags: Set[FeatureFlag] = set()
-        token = ""
-        for char in payload:
-            token += char
-            if token in reverse_map:
-                flags.add(reverse_map[token])
-                token = ""
-        if token:
-            raise ValueError(f"Trailing token could not be decoded: {token!r}")
-        return flags
+        return set(flags_from_mask(self.decode_mask(payload)))
+
+
+@dataclass(frozen=True)
+class _FlagTables:
+    symbols: Tuple[str, ...]
+    by_symbol: Dict[str, int]
+    lengths: Tuple[int, ...]
+    by_mask: Tuple[str, ...]
+    by_payload: Dict[str, int]
+
+
+@lru_cache(maxsize=None)
+def _flag_tables(params: FeatureParamSet) -> _FlagTables:
+    symbols = (
+        params.ascii_symbol,
+        params.unicode_symbol,
+        params.serialization_symbol,
+        params.dynamic_packs_symbol,
+        params.relational_context_symbol,
+        params.checksum_symbol,
+        params.mcp_symbol,
+        params.reusable_keys_symbol,
+    )
+    by_symbol = {symbol: _FLAGS_BY_BIT[index].bit for index, symbol in enumerate(symbols)}
+    by_mask = tuple(
+        "".join(symbols[index] for index, flag in enumerate(_FLAGS_BY_BIT) if mask & flag.bit)
+        for mask in range(ALL_FLAGS_MASK + 1)
+    )
+    return _FlagTables(
+        symbols=symbols,
+        by_symbol=by_symbol,
+        lengths=tuple(sorted({len(symbol) for symbol in symbols})),
+        by_mask=by_mask,
+        by_payload={payload: mask for mask, payload in enumerate(by_mask)},
+    )
+
+
+class EnabledFlags(MutableSet):
+    """Live set view of a ``FeatureFlags`` mask; ``add``/``discard`` update the mask in place."""
+
+    __slots__ = ("_flags",)
+
+    def __init__(self, flags: "FeatureFlags") -> None:
+        self._flags = flags
+
+    def __contains__(self, flag: object) -> bool:
+        return isinstance(flag, FeatureFlag) and bool(self._flags.mask & flag.bit)
+
+    def __iter__(self) -> Iterator[FeatureFlag]:
+        return iter(flags_from_mask(self._flags.mask))
+
+    def __len__(self) -> int:
+        return len(flags_from_mask(self._flags.mask))
+
+    def add(self, flag: FeatureFlag) -> None:
+        self._flags.mask |= flag.bit
+
+    def discard(self, flag: FeatureFlag) -> None:
+        self._flags.mask &= ~flag.bit
+
+    def __repr__(self) -> str:
+        return repr(set(self))
 
 
-@dataclass
 class FeatureFlags:
     """
     High-level feature management used by orchestrator and bootstrap scripts.
+
+    Flags are held as an integer bitmask, so membership tests, payload
+    encoding and capability intersection are constant time. ``enabled`` is a
+    live set view of the mask, so ``flags.enabled.add(flag)`` still works,
+    and assigning a set to it replaces the mask. ``FeatureFlags`` is no
+    longer a dataclass: use ``copy`` instead of ``dataclasses.replace``.
     """
 
-    enabled: Set[FeatureFlag] = field(default_factory=lambda: {FeatureFlag.ASCII_CORE})
-    params: FeatureParamSet = field(default_factory=FeatureParamSet)
+    __slots__ = ("mask", "params")
+
+    def __init__(self, enabled: Optional[Iterable[FeatureFlag]] = None, params: Optional[FeatureParamSet] = None) -> None:
+        self.mask = FeatureFlag.ASCII_CORE.bit if enabled is None else mask_from_flags(enabled)
+        self.params = params or FeatureParamSet()
+
+    @property
+    def enabled(self) -> EnabledFlags:
+        return EnabledFlags(self)
+
+    @enabled.setter
+    def enabled(self, flags: Iterable[FeatureFlag]) -> None:
+        self.mask = mask_from_flags(flags)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FeatureFlags):
+            return NotImplemented
+        return self.mask == other.mask and self.params == other.params
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        names = ", ".join(flag.name for flag in _FLAGS_BY_BIT if self.mask & flag.bit)
+        return f"FeatureFlags({{{names}}})"
+
+    def __getstate__(self) -> Tuple[int, FeatureParamSet]:
+        return self.mask, self.params
+
+    def __setstate__(self, state: Tuple[int, FeatureParamSet]) -> None:
+        self.mask, self.params = state
+
+    def copy(
+        self, enabled: Optional[Iterable[FeatureFlag]] = None, params: Optional[FeatureParamSet] = None
+    ) -> "FeatureFlags":
+        """A copy with ``enabled`` and/or ``params`` replaced, like ``dataclasses.replace`` on the old dataclass."""
+        copied = FeatureFlags.from_mask(self.mask, params or self.params)
+        if enabled is not None:
+            copied.enabled = enabled
+        return copied
 
     def enable(self, *flags: FeatureFlag) -> None:
         for flag in flags:
-            self.enabled.add(flag)
+            self.mask |= flag.bit
 
     def disable(self, *flags: FeatureFlag) -> None:
         for flag in flags:
-            self.enabled.discard(flag)
+            self.mask &= ~flag.bit
+
+    def is_enabled(self, flag: FeatureFlag) -> bool:
+        return bool(self.mask & flag.bit)
+
+    def intersect(self, other: "FeatureFlags") -> "FeatureFlags":
+        """Capabilities supported by both sides of a negotiation."""
+        return FeatureFlags.from_mask(self.mask & other.mask, self.params)
 
     def as_payload(self) -> str:
-        return self.params.encode_flags(sorted(self.enabled, key=lambda f: f.value))
+        return self.params.encode_mask(self.mask)
+
+    @classmethod
+    def from_mask(cls, mask: int, params: Optional[FeatureParamSet] = None) -> "FeatureFlags":
+        flags = cls(enabled=(), params=params)
+        flags.mask = mask & ALL_FLAGS_MASK
+        return flags
 
     @classmethod
     def from_payload(cls, payload: str, params: Optional[FeatureParamSet] = None) -> "FeatureFlags":
         param_set = params or FeatureParamSet()
-        flags = param_set.decode_flags(payload)
-        return cls(enabled=flags, params=param_set)
+        return cls.from_mask(param_set.decode_mask(payload), param_set)
 
     def requires_unicode_support(self) -> bool:
-        return FeatureFlag.UNICODE_OVERLAY in self.enabled
+        return bool(self.mask & FeatureFlag.UNICODE_OVERLAY.bit)
 
     def requires_serialization(self) -> bool:
-        return FeatureFlag.SERIALIZATION in self.enabled
+        return bool(self.mask & FeatureFlag.SERIALIZATION.bit)
 
     def wants_reusable_keys(self) -> bool:
-        return FeatureFlag.REUSABLE_KEYS in self.enabled
+        return bool(self.mask & FeatureFlag.REUSABLE_KEYS.bit)
 
     def summary(self) -> Dict[str, bool]:
-        return {flag.name.lower(): flag in self.enabled for flag in FeatureFlag}
+        return {flag.name.lower(): bool(self.mask & flag.bit) for flag in FeatureFlag}
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+
+def iter_corpus(path: Path) -> Iterator[str]:
+    """
+    Stream prompts from a corpus file.
+
+    ``.json`` files hold a list of strings; any other file is read lazily,
+    one prompt per non-blank line.
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, list):
+            raise ValueError("JSON corpus must be a list of strings")
+        for item in data:
+            yield str(item)
+        return
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield line
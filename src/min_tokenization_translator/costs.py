@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# Two-byte UTF-8 glyphs (Latin-1 punctuation and Greek letters) that common
+# byte-level BPE vocabularies keep as a single token. Used when a session
+# negotiates UNICODE_OVERLAY and no tokenizer-specific table is available.
+DEFAULT_UNICODE_OVERLAY: Tuple[str, ...] = tuple(
+    "§¶°±×÷µ·«»¬¿¡"
+    "αβγδεζηθικλμνξπρστυφχψω"
+    "ΓΔΘΛΞΠΣΦΨΩ"
+)
+
+# Characters with a fixed protocol meaning that can never serve as symbols.
+RESERVED_CHARACTERS = frozenset("|~^=")
+
+# Fingerprints name a file in the cost directories, so they never hold path separators.
+_FINGERPRINT = re.compile(r"[A-Za-z0-9._-]+")
+
+
+@dataclass(frozen=True)
+class SymbolCostTable:
+    """
+    Token cost of candidate symbols for one tokenizer.
+
+    ``costs`` maps a symbol to the number of tokens it occupies; symbols
+    missing from the table cost ``default_cost``. ``overlay`` lists the
+    Unicode symbols offered when the overlay feature is negotiated.
+    """
+
+    fingerprint: str = "default"
+    costs: Mapping[str, int] = field(default_factory=dict)
+    overlay: Tuple[str, ...] = DEFAULT_UNICODE_OVERLAY
+    default_cost: int = 1
+
+    def cost(self, symbol: str) -> int:
+        return self.costs.get(symbol, self.default_cost)
+
+    def fallback_cost(self, width: int) -> int:
+        """Estimated cost of a ``~N`` identifier with ``width`` digits."""
+        # BPE vocabularies split digit runs into groups of at most three.
+        return self.cost("~") + math.ceil(width / 3)
+
+    def symbol_pool(self, ascii_pool: Sequence[str], unicode_overlay: bool) -> List[str]:
+        """
+        Order candidate symbols cheapest first, keeping pool order among ties.
+
+        Symbols that cost more than a two-digit fallback identifier are
+        dropped, since the fallback would be cheaper.
+        """
+        candidates: List[str] = list(ascii_pool)
+        if unicode_overlay:
+            seen = set(candidates)
+            for symbol in self.overlay:
+                if symbol not in seen and _usable_symbol(symbol):
+                    seen.add(symbol)
+                    candidates.append(symbol)
+        ceiling = self.fallback_cost(2)
+        ranked = sorted(enumerate(candidates), key=lambda item: (self.cost(item[1]), item[0]))
+        return [symbol for _index, symbol in ranked if self.cost(symbol) <= ceiling]
+
+
+DEFAULT_COST_TABLE = SymbolCostTable()
+
+
+def _usable_symbol(symbol: str) -> bool:
+    return len(symbol) == 1 and symbol not in RESERVED_CHARACTERS and not symbol.isspace() and not symbol.isdigit()
+
+
+def load_cost_table(fingerprint: str, search_dirs: Iterable[Path] = ()) -> SymbolCostTable:
+    """
+    Return the cost table for ``fingerprint`` from ``<dir>/<fingerprint>.json``.
+
+    The first matching file wins; parsed tables are cached per path and
+    modification time, so edits on disk are picked up. Falls back to the
+    built-in defaults when no file exists. Raises ``ValueError`` for a
+    fingerprint that is not a plain file name or a malformed table.
+    """
+    if not _FINGERPRINT.fullmatch(fingerprint) or ".." in fingerprint:
+        raise ValueError(f"Invalid tokenizer fingerprint {fingerprint!r}")
+    for directory in search_dirs:
+        root = Path(directory).resolve()
+        path = (root / f"{fingerprint}.json").resolve()
+        if root not in path.parents:
+            raise ValueError(f"Cost table for {fingerprint!r} resolves outside {directory}")
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        return _load_cost_file(str(path), mtime)
+    return SymbolCostTable(fingerprint=fingerprint)
+
+
+@lru_cache(maxsize=32)
+def _load_cost_file(path: str, mtime: int) -> SymbolCostTable:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError("not a JSON object")
+        costs: Dict[str, int] = {str(symbol): int(cost) for symbol, cost in data.get("costs", {}).items()}
+        overlay = data.get("overlay")
+        return SymbolCostTable(
+            fingerprint=str(data.get("fingerprint", Path(path).stem)),
+            costs=costs,
+            overlay=tuple(overlay) if overlay is not None else DEFAULT_UNICODE_OVERLAY,
+            default_cost=int(data.get("default_cost", 1)),
+        )
+    except (OSError, UnicodeDecodeError, ValueError, TypeError, AttributeError) as exc:
+        raise ValueError(f"Invalid cost table {path}: {exc}") from exc
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .batching import map_chunked
+from .checksum import DEFAULT_BLOCK_SIZE, unseal
+from .config import FeatureFlag, FeatureFlags, FeatureParamSet
+from .distiller import DistilledPrompt
+from .encoder import FALLBACK_PREFIX, FIELD_SEPARATOR, EncodedResult, graph_fields
+from .frames import DELTA_PREFIX, DELTA_SEPARATOR, FRAME_CLOSE, FRAME_OPEN, RECALL_PREFIX, FrameStore
+
+if TYPE_CHECKING:
+    from .substitution import PhraseAutomaton
+
+# Trie nodes map a character to a child node; the ``None`` key holds the token
+# of a complete symbol.
+_TrieNode = Dict[Optional[str], Union["_TrieNode", str]]
+
+
+class SymbolTrie:
+    """
+    Prefix tree over a symbol dictionary.
+
+    The encoder guarantees the symbol set is prefix-free, so the first
+    complete symbol reached while walking is the only possible match and no
+    backtracking is required.
+    """
+
+    def __init__(self, dictionary: Optional[Mapping[str, str]] = None) -> None:
+        self._root: _TrieNode = {}
+        self._size = 0
+        if dictionary:
+            for symbol, token in dictionary.items():
+                self.insert(symbol, token)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, symbol: str, token: str) -> None:
+        if not symbol:
+            raise ValueError("Symbols must be non-empty")
+        node = self._root
+        for char in symbol:
+            node = node.setdefault(char, {})  # type: ignore[assignment]
+        if None not in node:
+            self._size += 1
+        node[None] = token
+
+    def remove(self, symbol: str) -> None:
+        path: List[Tuple[_TrieNode, str]] = []
+        node = self._root
+        for char in symbol:
+            child = node.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child  # type: ignore[assignment]
+        if node.pop(None, None) is None:
+            return
+        self._size -= 1
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def items(self) -> List[Tuple[str, str]]:
+        """Every ``(symbol, token)`` pair in the trie."""
+        pairs: List[Tuple[str, str]] = []
+        stack: List[Tuple[str, _TrieNode]] = [("", self._root)]
+        while stack:
+            prefix, node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    pairs.append((prefix, child))  # type: ignore[arg-type]
+                else:
+                    stack.append((prefix + char, child))  # type: ignore[arg-type]
+        return pairs
+
+    def split(self, text: str) -> List[str]:
+        """Tokenize one payload field into the tokens its symbols stand for."""
+        root = self._root
+        tokens: List[str] = []
+        append = tokens.append
+        node = root
+        for char in text:
+            child = node.get(char)
+            if child is None:
+                raise ValueError(f"Unknown symbol sequence in field {text!r}")
+            token = child.get(None)  # type: ignore[union-attr]
+            if token is not None:
+                append(token)  # type: ignore[arg-type]
+                node = root
+            else:
+                node = child  # type: ignore[assignment]
+        if node is not root:
+            raise ValueError(f"Truncated symbol at end of field {text!r}")
+        return tokens
+
+    def match(self, text: str, start: int) -> Tuple[str, int]:
+        """Return the token of the symbol at ``text[start:]`` and the index just past it."""
+        node = self._root
+        for position in range(start, len(text)):
+            child = node.get(text[position])
+            if child is None:
+                break
+            token = child.get(None)  # type: ignore[union-attr]
+            if token is not None:
+                return token, position + 1  # type: ignore[return-value]
+            node = child  # type: ignore[assignment]
+        raise ValueError(f"No symbol at offset {start} of {text!r}")
+
+
+@dataclass
+class DecodedPayload:
+    """Tokens recovered from an encoded payload, one list per payload field."""
+
+    fields: List[List[str]]
+    feature_flags: Optional[FeatureFlags] = None
+    feature_header: str = ""
+
+
+class SymbolDecoder:
+    """
+    Reverses ``SymbolEncoder`` payloads in a single left-to-right pass.
+
+    The leading feature header is detected by shape: it is either empty or
+    made of ``~`` + non-digit pairs, which no dictionary symbol can start with.
+
+    In session mode the decoder mirrors a session ``SymbolEncoder``: each
+    dictionary is applied as a delta to a persistent trie after the result's
+    retired symbols are dropped, so results must be decoded in turn order.
+    When the header carries ``RELATIONAL_CONTEXT`` it also replays frames,
+    recalls and deltas against its own ``FrameStore``; ``max_frames`` must
+    match the encoder's. With ``CHECKSUM_BLOCKS`` in the header the body is
+    verified and unsealed first (``ChecksumError`` names the bad blocks);
+    ``block_size`` must match the encoder's ``checksum_block_size``.
+    ``preload`` and ``core`` must match the encoder's.
+    """
+
+    def __init__(
+        self,
+        params: Optional[FeatureParamSet] = None,
+        session: bool = False,
+        max_frames: int = 64,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        preload: Optional[Mapping[str, str]] = None,
+        core: Optional[PhraseAutomaton] = None,
+    ) -> None:
+        self.params = params or FeatureParamSet()
+        self.session = session
+        self.block_size = block_size
+        self.core = core
+        merged = {**(core.entries if core is not None else {}), **(preload or {})}
+        self._preload = {symbol: phrase for phrase, symbol in merged.items()}
+        self._session_trie = SymbolTrie(self._preload)
+        self._frames = FrameStore(max_frames)
+
+    def decode(self, payload: str, dictionary: Mapping[str, str], retired: Iterable[str] = ()) -> DecodedPayload:
+        if self.core is not None:
+            expand = self.core.expand
+            dictionary = {symbol: expand(text) for symbol, text in dictionary.items()}
+        if not self.session:
+            return self._decode_with(payload, SymbolTrie({**self._preload, **dictionary} if self._preload else dictionary))
+        trie = self._session_trie
+        for symbol in retired:
+            trie.remove(symbol)
+        for symbol, token in dictionary.items():
+            trie.insert(symbol, token)
+        return self._decode_with(payload, trie)
+
+    def decode_result(self, result: EncodedResult) -> DecodedPayload:
+        return self.decode(result.payload, result.dictionary, result.retired)
+
+    def reset_session(self) -> None:
+        self._session_trie = SymbolTrie(self._preload)
+        self._frames.clear()
+
+    def session_snapshot(self) -> List[Tuple[str, str]]:
+        """Session symbols as ``(symbol, token)`` pairs, excluding the preloaded ones."""
+        preload = self._preload
+        return [
+            (symbol, token) for symbol, token in self._session_trie.items() if preload.get(symbol) != token
+        ]
+
+    def frame_snapshot(self) -> List[Tuple[int, List[str]]]:
+        return self._frames.snapshot()
+
+    def restore_session(
+        self, snapshot: Iterable[Tuple[str, str]], frames: Iterable[Tuple[int, Sequence[str]]] = ()
+    ) -> None:
+        """Rebuild session state from ``session_snapshot`` and ``frame_snapshot`` output."""
+        self.reset_session()
+        for symbol, token in snapshot:
+            self._session_trie.insert(symbol, token)
+        self._frames.restore(frames)
+
+    def decode_many(
+        self,
+        results: Iterable[EncodedResult],
+        *,
+        executor: str = "auto",
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[DecodedPayload]:
+        """Decode a batch of encoded results, returning them in input order."""
+        if self.session:
+            return [self.decode_result(result) for result in results]
+        return map_chunked(
+            _decode_chunk,
+            self,
+            list(results),
+            executor=executor,
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+        )
+
+    def verify_roundtrip(self, distilled: DistilledPrompt, result: EncodedResult) -> bool:
+        """Return True when ``result`` decodes back to exactly ``distilled``'s tokens."""
+        try:
+            decoded = self.decode_result(result)
+        except ValueError:
+            return False
+        return decoded.fields == graph_fields(distilled) and decoded.feature_header == result.feature_header
+
+    def _decode_with(self, payload: str, trie: SymbolTrie) -> DecodedPayload:
+        feature_header = ""
+        feature_flags: Optional[FeatureFlags] = None
+        head, separator, body = payload.partition(FIELD_SEPARATOR)
+        if self._is_header(head):
+            feature_header = head
+            feature_flags = FeatureFlags.from_payload(feature_header, self.params)
+            if separator and feature_flags.is_enabled(FeatureFlag.CHECKSUM_BLOCKS):
+                body = unseal(body, self.block_size)
+            raw_fields = body.split(FIELD_SEPARATOR) if separator else []
+        else:
+            raw_fields = payload.split(FIELD_SEPARATOR)
+        if self.session and feature_flags is not None and feature_flags.is_enabled(FeatureFlag.RELATIONAL_CONTEXT):
+            fields = self._decode_frames(raw_fields, trie)
+        else:
+            fields = [trie.split(raw) for raw in raw_fields]
+        return DecodedPayload(fields=fields, feature_flags=feature_flags, feature_header=feature_header)
+
+    def _decode_frames(self, raw_fields: List[str], trie: SymbolTrie) -> List[List[str]]:
+        frames = self._frames
+        fields: List[List[str]] = []
+        for raw in raw_fields:
+            head = raw[:1]
+            if head == RECALL_PREFIX:
+                for index in raw[1:].split(RECALL_PREFIX):
+                    fields.append(list(frames.recall(_frame_index(index))))
+            elif head == DELTA_PREFIX:
+                fields.append(self._apply_delta(raw, trie))
+            elif head == FRAME_OPEN and raw.endswith(FRAME_CLOSE):
+                tokens = trie.split(raw[1:-1])
+                frames.add(tuple(tokens))
+                fields.append(tokens)
+            else:
+                fields.append(trie.split(raw))
+        return fields
+
+    def _apply_delta(self, raw: str, trie: SymbolTrie) -> List[str]:
+        index, separator, edits = raw[1:].partition(DELTA_SEPARATOR)
+        if not separator or not edits:
+            raise ValueError(f"Malformed frame delta {raw!r}")
+        frame_index = _frame_index(index)
+        tokens = list(self._frames.recall(frame_index))
+        offset = 0
+        while offset < len(edits):
+            position = edits[offset]
+            if not position.isdigit() or int(position) >= len(tokens):
+                raise ValueError(f"Bad frame position in delta {raw!r}")
+            tokens[int(position)], offset = trie.match(edits, offset + 1)
+        self._frames.replace(frame_index, tuple(tokens))
+        return tokens
+
+    @staticmethod
+    def _is_header(raw: str) -> bool:
+        if not raw:
+            return True
+        return raw.startswith(FALLBACK_PREFIX) and len(raw) > 1 and not raw[1].isdigit()
+
+
+def _frame_index(text: str) -> int:
+    if not text.isdigit():
+        raise ValueError(f"Bad frame index {text!r}")
+    return int(text)
+
+
+def _decode_chunk(decoder: SymbolDecoder, chunk: Sequence[EncodedResult]) -> List[DecodedPayload]:
+    return [decoder.decode_result(result) for result in chunk]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .encoder import FIELD_SEPARATOR
+
+DELTA_MARKER = "="
+COPY_PREFIX = "^"
+RUN_PREFIX = "~#"
+
+_RUN = re.compile(r"~#(\d+)\Z")
+_COPY = re.compile(r"\^(\d+)(?:\.(\d+))?\Z")
+
+
+class _WindowEntry:
+    __slots__ = ("fields", "positions")
+
+    def __init__(self, fields: List[str]) -> None:
+        self.fields = fields
+        # field hash -> positions, so matching a target field is one dict probe.
+        self.positions: Dict[str, List[int]] = {}
+        for position, value in enumerate(fields):
+            self.positions.setdefault(value, []).append(position)
+
+
+class DeltaEncoder:
+    """
+    Stage 5 message-level delta encoding over a window of recent payloads.
+
+    Every payload is compared against the last ``window`` payloads of the
+    session. The reference sharing the most fields is used to build a
+    substitution script: ``=<back>`` followed by ``|``-separated items that
+    are either literal fields or ``^p`` / ``^p.n`` copies of ``n`` reference
+    fields starting at position ``p``. Full payloads collapse runs of
+    identical fields into ``~#n`` (repeat the previous field ``n`` times).
+    Whichever form is cheaper under ``cost`` (characters by default, or e.g.
+    ``Tokenizer.count``) is sent.
+    """
+
+    def __init__(self, window: int = 8, cost: Optional[Callable[[str], int]] = None) -> None:
+        if window < 1:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.cost = cost or len
+        self._history: Deque[_WindowEntry] = deque(maxlen=window)
+        self.full_messages = 0
+        self.delta_messages = 0
+
+    def reset(self) -> None:
+        self._history.clear()
+
+    def encode(self, payload: str) -> str:
+        fields = payload.split(FIELD_SEPARATOR)
+        message = run_length_encode(fields)
+        reference = self._best_reference(fields)
+        if reference is not None:
+            back, entry = reference
+            script = _substitution_script(back, fields, entry, self.cost)
+            if self.cost(script) < self.cost(message):
+                message = script
+        if message.startswith(DELTA_MARKER):
+            self.delta_messages += 1
+        else:
+            self.full_messages += 1
+        self._history.append(_WindowEntry(fields))
+        return message
+
+    def _best_reference(self, fields: List[str]) -> Optional[Tuple[int, _WindowEntry]]:
+        best: Optional[Tuple[int, _WindowEntry]] = None
+        best_score = 0
+        # Newest first, so ties go to the most recent payload.
+        for back, entry in enumerate(reversed(self._history), start=1):
+            score = sum(len(value) + 1 for value in fields if value in entry.positions)
+            if score > best_score:
+                best, best_score = (back, entry), score
+        return best
+
+
+class DeltaDecoder:
+    """Expands ``DeltaEncoder`` messages back into payloads; feed messages in order."""
+
+    def __init__(self, window: int = 8) -> None:
+        if window < 1:
+            raise ValueError("window must be positive")
+        self.window = window
+        self._history: Deque[List[str]] = deque(maxlen=window)
+
+    def reset(self) -> None:
+        self._history.clear()
+
+    def decode(self, message: str) -> str:
+        if message.startswith(DELTA_MARKER):
+            fields = self._apply_script(message)
+        else:
+            fields = run_length_decode(message.split(FIELD_SEPARATOR))
+        self._history.append(fields)
+        return FIELD_SEPARATOR.join(fields)
+
+    def _apply_script(self, message: str) -> List[str]:
+        header, *items = message.split(FIELD_SEPARATOR)
+        back_text = header[len(DELTA_MARKER) :]
+        if not back_text.isdigit() or not 1 <= int(back_text) <= len(self._history):
+            raise ValueError(f"Delta references unknown payload {header!r}")
+        reference = self._history[-int(back_text)]
+        fields: List[str] = []
+        for item in items:
+            copy = _COPY.match(item) if item.startswith(COPY_PREFIX) else None
+            if copy is None:
+                fields.append(item)
+                continue
+            start = int(copy.group(1))
+            count = int(copy.group(2) or 1)
+            if start + count > len(reference):
+                raise ValueError(f"Delta copy {item!r} is out of range")
+            fields.extend(reference[start : start + count])
+        return fields
+
+
+def run_length_encode(fields: List[str]) -> str:
+    """Join ``fields``, replacing runs of a repeated field with ``~#n`` where that is shorter."""
+    out: List[str] = []
+    index = 0
+    while index < len(fields):
+        value = fields[index]
+        end = index + 1
+        while end < len(fields) and fields[end] == value:
+            end += 1
+        repeats = end - index - 1
+        out.append(value)
+        run = f"{RUN_PREFIX}{repeats}"
+        if repeats and len(run) + 1 < repeats * (len(value) + 1):
+            out.append(run)
+        else:
+            out.extend([value] * repeats)
+        index = end
+    return FIELD_SEPARATOR.join(out)
+
+
+def run_length_decode(fields: List[str]) -> List[str]:
+    out: List[str] = []
+    for position, value in enumerate(fields):
+        run = _RUN.match(value) if position > 0 and value.startswith(RUN_PREFIX) else None
+        if run is None:
+            out.append(value)
+        else:
+            out.extend([out[-1]] * int(run.group(1)))
+    return out
+
+
+def _substitution_script(back: int, fields: List[str], reference: _WindowEntry, cost: Callable[[str], int]) -> str:
+    items = [f"{DELTA_MARKER}{back}"]
+    index = 0
+    while index < len(fields):
+        value = fields[index]
+        start, length = _longest_run(fields, index, reference)
+        if length:
+            copy = f"{COPY_PREFIX}{start}" if length == 1 else f"{COPY_PREFIX}{start}.{length}"
+            literal_cost = sum(cost(field) for field in fields[index : index + length])
+            if cost(copy) < literal_cost:
+                items.append(copy)
+                index += length
+                continue
+        items.append(value)
+        index += 1
+    return FIELD_SEPARATOR.join(items)
+
+
+def _longest_run(fields: List[str], index: int, reference: _WindowEntry) -> Tuple[int, int]:
+    best_start, best_length = 0, 0
+    ref_fields = reference.fields
+    for start in reference.positions.get(fields[index], ()):
+        length = 1
+        while (
+            index + length < len(fields)
+            and start + length < len(ref_fields)
+            and fields[index + length] == ref_fields[start + length]
+        ):
+            length += 1
+        if length > best_length:
+            best_start, best_length = start, length
+    return best_start, best_length
@@ -1,23 +1,60 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from functools import lru_cache
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .batching import map_chunked
+from .graph import CompactGraph, as_compact_graph
 
 
 @dataclass
 class DistilledPrompt:
-    """Structured representation of a prompt after preprocessing."""
+    """
+    Structured representation of a prompt after preprocessing.
+
+    ``graph`` is always held as a ``CompactGraph``; a list of entry dicts
+    passed in is converted on construction.
+    """
 
-    graph: List[Dict[str, str]]
+    graph: CompactGraph
     residual_note: str
     lexicon: Dict[str, str] = field(default_factory=dict)
     metrics: Dict[str, int] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        self.graph = as_compact_graph(self.graph)
+
+
+_SEGMENT_SPLIT = re.compile(r"[.;\n]|(?:\s-\s)|(?:\s\*\s)")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def compile_token_table(synonyms: Mapping[str, str], stop_words: FrozenSet[str]) -> Dict[str, str]:
+    """
+    Fold synonym collapsing and stop-word trimming into one lookup table.
+
+    Tokens absent from the table are kept verbatim; tokens mapped to ``""``
+    are dropped.
+    """
+    table: Dict[str, str] = {word: "" for word in stop_words}
+    for source, target in synonyms.items():
+        table[source] = "" if target in stop_words else target
+    return table
+
 
 class PromptDistiller:
     """
     Strips redundant context while preserving semantic intent.
+
+    Segments are classified, split and canonicalized in a single pass using
+    module-level compiled patterns and a precomputed token table. Canonical
+    forms of recurring fragments are memoized in a bounded LRU cache.
+
+    The built-in vocabulary is the generic one; domain plugins supply their
+    own ``token_table`` (see ``domains.DomainRegistry``).
     """
 
     _STOP_WORDS = {
@@ -49,24 +86,44 @@ class PromptDistiller:
         "analyse": "analyze",
     }
 
-    def __init__(self) -> None:
-        self._statement_pattern = re.compile(r"[:=\-]>?|\breturns?\b|\binclude\b", re.IGNORECASE)
+    def __init__(self, cache_size: int = 4096, token_table: Optional[Mapping[str, str]] = None, domain: str = "") -> None:
+        self.cache_size = cache_size
+        self.domain = domain
+        if token_table is None:
+            token_table = compile_token_table(self._SYNONYMS, frozenset(self._STOP_WORDS))
+        self._token_table = token_table
+        self._canonicalize: Callable[[str], str] = lru_cache(maxsize=cache_size)(self._canonicalize_uncached)
+
+    def cache_stats(self) -> Tuple[int, int]:
+        """``(hits, misses)`` of the canonical-form memo."""
+        info = self._canonicalize.cache_info()  # type: ignore[attr-defined]
+        return info.hits, info.misses
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_canonicalize", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._canonicalize = lru_cache(maxsize=self.cache_size)(self._canonicalize_uncached)
 
     def distill(self, raw_prompt: str, context: Optional[Dict[str, str]] = None) -> DistilledPrompt:
         context = context or {}
-        cleaned = re.sub(r"\s+", " ", raw_prompt).strip()
+        cleaned = " ".join(raw_prompt.split())
         segments = self._split_segments(cleaned)
 
-        graph: List[Dict[str, str]] = []
+        graph = CompactGraph()
         residual_parts: List[str] = []
         lexicon: Dict[str, str] = {}
 
         seen_canonicals = set()
         analyzed = 0
         deduplicated = 0
+        normalize = self._normalize_segment
         for segment in segments:
             analyzed += 1
-            canonical, entry = self._normalize_segment(segment)
+            canonical, entry = normalize(segment)
             if not canonical:
                 residual_parts.append(segment)
                 continue
@@ -78,18 +135,11 @@ class PromptDistiller:
             graph.append(entry)
 
         for name, value in context.items():
-            canonical = self._canonicalize(f"{name}:{value}")
+            canonical, entry = self._context_entry(name, value)
             if canonical not in seen_canonicals:
                 seen_canonicals.add(canonical)
                 lexicon[canonical] = f"{name}:{value}"
-                graph.append(
-                    {
-                        "type": "context",
-                        "key": self._canonicalize(name),
-                        "value": value.strip(),
-                        "canonical": canonical,
-                    }
-                )
+                graph.append(entry)
 
         metrics = {
             "segments_analyzed": analyzed,
@@ -99,57 +149,114 @@ class PromptDistiller:
         }
 
         residual_note = ". ".join(residual_parts)
-        return DistilledPrompt(graph=graph, residual_note=residual_note, lexicon=lexicon, metrics=metrics)
+        return DistilledPrompt(graph=graph.compact(), residual_note=residual_note, lexicon=lexicon, metrics=metrics)
+
+    def distill_many(
+        self,
+        prompts: Iterable[str],
+        contexts: Optional[Iterable[Optional[Dict[str, str]]]] = None,
+        *,
+        executor: str = "auto",
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[DistilledPrompt]:
+        """
+        Distill a batch of prompts, returning results in input order.
+
+        ``contexts``, when given, must align one-to-one with ``prompts``.
+        ``executor`` is one of ``auto``, ``inline``, ``thread`` or ``process``.
+        """
+        prompt_list = list(prompts)
+        if contexts is None:
+            context_list: List[Optional[Dict[str, str]]] = [None] * len(prompt_list)
+        else:
+            context_list = list(contexts)
+            if len(context_list) != len(prompt_list):
+                raise ValueError(f"Got {len(context_list)} contexts for {len(prompt_list)} prompts")
+        items = list(zip(prompt_list, context_list))
+        return map_chunked(
+            _distill_chunk,
+            self,
+            items,
+            executor=executor,
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+        )
+
+    def distill_stream(
+        self,
+        chunks: Iterable[str],
+        context: Optional[Dict[str, str]] = None,
+        *,
+        max_tracked: int = 65536,
+        on_residual: Optional[Callable[[str], None]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Yield graph entries for a prompt delivered as an iterator of text chunks.
+
+        Entries are yielded as soon as their segment is terminated, in the same
+        order ``distill`` would produce them. Residual segments are passed to
+        ``on_residual`` when given; see ``DistillStream`` for finer control.
+        """
+        stream = DistillStream(self, context, max_tracked=max_tracked, on_residual=on_residual)
+        for chunk in chunks:
+            yield from stream.feed(chunk)
+        yield from stream.close()
+
+    def _context_entry(self, name: str, value: str) -> Tuple[str, Dict[str, str]]:
+        key = self._canonicalize(name)
+        canonical = self._join(key, self._canonicalize(value))
+        return canonical, {
+            "type": "context",
+            "key": key,
+            "value": value.strip(),
+            "canonical": canonical,
+        }
 
     def _split_segments(self, text: str) -> List[str]:
-        candidates = re.split(r"[.;\n]|(?:\s-\s)|(?:\s\*\s)", text)
         segments: List[str] = []
-        for candidate in candidates:
+        for candidate in _SEGMENT_SPLIT.split(text):
             segment = candidate.strip(" -*")
             if segment:
                 segments.append(segment)
         return segments
 
     def _normalize_segment(self, segment: str) -> Tuple[str, Dict[str, str]]:
-        lowered = segment.lower()
-        if ":" in segment:
-            key, value = segment.split(":", 1)
-            return self._canonicalize(key + ":" + value), {
+        canonicalize = self._canonicalize
+        index = segment.find(":")
+        if index >= 0:
+            value = segment[index + 1 :]
+            key = canonicalize(segment[:index])
+            canonical = self._join(key, canonicalize(value))
+            return canonical, {
                 "type": "kv",
-                "key": self._canonicalize(key),
+                "key": key,
                 "value": value.strip(),
-                "canonical": self._canonicalize(key + ":" + value),
+                "canonical": canonical,
             }
-        arrow_match = re.search(r"(.*?)->(.*)", segment)
-        if arrow_match:
-            left = arrow_match.group(1).strip()
-            right = arrow_match.group(2).strip()
-            canonical = self._canonicalize(left + "->" + right)
+        index = segment.find("->")
+        if index >= 0:
+            source = canonicalize(segment[:index])
+            target = canonicalize(segment[index + 2 :])
+            canonical = self._join(source, target)
             return canonical, {
                 "type": "flow",
-                "source": self._canonicalize(left),
-                "target": self._canonicalize(right),
+                "source": source,
+                "target": target,
                 "canonical": canonical,
             }
-        equal_match = re.search(r"(.*?)=(.*)", segment)
-        if equal_match:
-            left = equal_match.group(1).strip()
-            right = equal_match.group(2).strip()
-            canonical = self._canonicalize(left + "=" + right)
+        index = segment.find("=")
+        if index >= 0:
+            lhs = canonicalize(segment[:index])
+            right = segment[index + 1 :]
+            canonical = self._join(lhs, canonicalize(right))
             return canonical, {
                 "type": "assign",
-                "lhs": self._canonicalize(left),
+                "lhs": lhs,
                 "rhs": right.strip(),
                 "canonical": canonical,
             }
-        if self._statement_pattern.search(segment):
-            canonical = self._canonicalize(segment)
-            return canonical, {
-                "type": "statement",
-                "value": segment.strip(),
-                "canonical": canonical,
-            }
-        canonical = self._canonicalize(segment)
+        canonical = canonicalize(segment)
         if not canonical:
             return "", {}
         return canonical, {
@@ -158,12 +265,143 @@ class PromptDistiller:
             "canonical": canonical,
         }
 
-    def _canonicalize(self, text: str) -> str:
-        tokens = re.findall(r"[a-z0-9]+", text.lower())
+    @staticmethod
+    def _join(left: str, right: str) -> str:
+        # Canonicalizing "left<sep>right" for a non-alphanumeric separator equals
+        # joining the canonical halves, which lets both halves hit the memo.
+        if left and right:
+            return left + " " + right
+        return left or right
+
+    def _canonicalize_uncached(self, text: str) -> str:
+        table = self._token_table
         normalized = []
-        for token in tokens:
-            token = self._SYNONYMS.get(token, token)
-            if token in self._STOP_WORDS:
-                continue
-            normalized.append(token)
+        for token in _WORD.findall(text.lower()):
+            token = table.get(token, token)
+            if token:
+                normalized.append(token)
         return " ".join(normalized)
+
+
+class DistillStream:
+    """
+    Incremental distillation over a sequence of text chunks.
+
+    Whitespace collapsing and segment splitting carry across chunk edges, so
+    feeding any chunking of a prompt yields the same graph entries as
+    ``PromptDistiller.distill`` on the joined text. Only the unterminated tail
+    segment is buffered; dedup state is an LRU of at most ``max_tracked``
+    canonicals, beyond which a long-forgotten repeat may be emitted again.
+    Residual segments go to ``on_residual`` when given, otherwise they are
+    collected in ``residual_parts`` for the caller to drain.
+    """
+
+    def __init__(
+        self,
+        distiller: PromptDistiller,
+        context: Optional[Dict[str, str]] = None,
+        max_tracked: int = 65536,
+        on_residual: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        if max_tracked < 1:
+            raise ValueError("max_tracked must be positive")
+        self.distiller = distiller
+        self.context = context or {}
+        self.max_tracked = max_tracked
+        self.residual_parts: List[str] = []
+        self._on_residual = on_residual or self.residual_parts.append
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._buffer = ""
+        self._scanned = 0
+        self._started = False
+        self._pending_space = False
+        self._closed = False
+        self._analyzed = 0
+        self._deduplicated = 0
+        self._graph_size = 0
+        self._residual_count = 0
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "segments_analyzed": self._analyzed,
+            "segments_deduplicated": self._deduplicated,
+            "graph_size": self._graph_size,
+            "residual_segments": self._residual_count,
+        }
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        """Consume one chunk and return the graph entries it finalized."""
+        if self._closed:
+            raise RuntimeError("Cannot feed a closed DistillStream")
+        words = chunk.split()
+        if not words:
+            if chunk and self._started:
+                self._pending_space = True
+            return []
+        lead = " " if self._started and (self._pending_space or chunk[0].isspace()) else ""
+        self._buffer += lead + " ".join(words)
+        self._started = True
+        self._pending_space = chunk[-1].isspace()
+        return self._drain()
+
+    def close(self) -> List[Dict[str, str]]:
+        """Flush the trailing segment and context entries."""
+        if self._closed:
+            return []
+        self._closed = True
+        entries: List[Dict[str, str]] = []
+        self._emit_segment(self._buffer, entries)
+        self._buffer = ""
+        for name, value in self.context.items():
+            canonical, entry = self.distiller._context_entry(name, value)
+            if self._track(canonical):
+                self._graph_size += 1
+                entries.append(entry)
+        return entries
+
+    def _drain(self) -> List[Dict[str, str]]:
+        # Separators are at most three characters long, so any match not fully
+        # inside the previously scanned text starts in its last two characters.
+        entries: List[Dict[str, str]] = []
+        buffer = self._buffer
+        start = 0
+        for match in _SEGMENT_SPLIT.finditer(buffer, max(0, self._scanned - 2)):
+            self._emit_segment(buffer[start : match.start()], entries)
+            start = match.end()
+        self._buffer = buffer[start:]
+        self._scanned = len(self._buffer)
+        return entries
+
+    def _emit_segment(self, candidate: str, entries: List[Dict[str, str]]) -> None:
+        segment = candidate.strip(" -*")
+        if not segment:
+            return
+        self._analyzed += 1
+        canonical, entry = self.distiller._normalize_segment(segment)
+        if not canonical:
+            self._residual_count += 1
+            self._on_residual(segment)
+            return
+        if not self._track(canonical):
+            self._deduplicated += 1
+            return
+        self._graph_size += 1
+        entries.append(entry)
+
+    def _track(self, canonical: str) -> bool:
+        """Record ``canonical``; return False when it was already seen."""
+        seen = self._seen
+        if canonical in seen:
+            seen.move_to_end(canonical)
+            return False
+        seen[canonical] = None
+        if len(seen) > self.max_tracked:
+            seen.popitem(last=False)
+        return True
+
+
+def _distill_chunk(
+    distiller: PromptDistiller, chunk: Sequence[Tuple[str, Optional[Dict[str, str]]]]
+) -> List[DistilledPrompt]:
+    return [distiller.distill(prompt, context) for prompt, context in chunk]
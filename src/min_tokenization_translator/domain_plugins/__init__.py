@@ -0,0 +1,7 @@
+"""
+Domain vocabularies shipped with Min Tokenization Translator.
+
+Each module defines ``VOCABULARY``; ``domains.DomainRegistry`` imports a
+module only when a request names its domain. Third-party packages add
+domains through the ``min_tokenization_translator.domains`` entry-point group.
+"""
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from ..domains import GENERIC_STOP_WORDS, DomainVocabulary
+
+VOCABULARY = DomainVocabulary(
+    name="code",
+    synonyms={
+        "function": "fn",
+        "functions": "fn",
+        "method": "fn",
+        "methods": "fn",
+        "parameter": "param",
+        "parameters": "param",
+        "argument": "arg",
+        "arguments": "arg",
+        "variable": "var",
+        "variables": "var",
+        "repository": "repo",
+        "directory": "dir",
+        "configuration": "config",
+        "dependency": "dep",
+        "dependencies": "dep",
+        "implementation": "impl",
+        "implement": "impl",
+        "exception": "err",
+        "error": "err",
+        "errors": "err",
+        "refactoring": "refactor",
+        "documentation": "docs",
+        "database": "db",
+        "request": "req",
+        "response": "resp",
+    },
+    stop_words=GENERIC_STOP_WORDS | {"kindly"},
+)
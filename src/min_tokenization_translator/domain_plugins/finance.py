@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from ..domains import GENERIC_STOP_WORDS, DomainVocabulary
+
+VOCABULARY = DomainVocabulary(
+    name="finance",
+    synonyms={
+        "account": "acct",
+        "accounts": "acct",
+        "amount": "amt",
+        "balance": "bal",
+        "transaction": "txn",
+        "transactions": "txn",
+        "transfer": "xfer",
+        "payment": "pmt",
+        "payments": "pmt",
+        "invoice": "inv",
+        "invoices": "inv",
+        "revenue": "rev",
+        "quarter": "q",
+        "quarterly": "q",
+        "year": "yr",
+        "annual": "yr",
+        "percent": "pct",
+        "percentage": "pct",
+        "interest": "int",
+        "portfolio": "pf",
+        "forecast": "fcst",
+        "budget": "bdgt",
+        "expenses": "exp",
+        "expense": "exp",
+        "dollars": "usd",
+        "dollar": "usd",
+    },
+    stop_words=GENERIC_STOP_WORDS | {"kindly", "total"},
+)
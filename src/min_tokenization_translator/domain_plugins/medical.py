@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from ..domains import GENERIC_STOP_WORDS, DomainVocabulary
+
+VOCABULARY = DomainVocabulary(
+    name="medical",
+    synonyms={
+        "dosage": "dose",
+        "doses": "dose",
+        "medication": "med",
+        "medications": "med",
+        "medicine": "med",
+        "meds": "med",
+        "diagnosis": "diag",
+        "diagnose": "diag",
+        "diagnosed": "diag",
+        "patient": "pt",
+        "patients": "pt",
+        "temperature": "temp",
+        "pressure": "bp",
+        "analysis": "analyze",
+        "analyse": "analyze",
+        "history": "hx",
+        "treatment": "tx",
+        "prescription": "rx",
+        "prescribe": "rx",
+        "prescribed": "rx",
+        "symptoms": "sx",
+        "symptom": "sx",
+        "intravenous": "iv",
+        "milligrams": "mg",
+        "milligram": "mg",
+        "daily": "qd",
+        "twice": "bid",
+        "allergies": "allergy",
+        "laboratory": "lab",
+        "labs": "lab",
+    },
+    stop_words=GENERIC_STOP_WORDS | {"kindly", "currently"},
+)
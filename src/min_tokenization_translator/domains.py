@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import marshal
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Mapping, Optional, Union
+
+from .distiller import PromptDistiller, compile_token_table
+
+ENTRY_POINT_GROUP = "min_tokenization_translator.domains"
+
+# Stop words every domain starts from; plugins usually extend rather than replace them.
+GENERIC_STOP_WORDS: FrozenSet[str] = frozenset(PromptDistiller._STOP_WORDS)
+
+# Shipped domains, as ``module:attribute`` targets so nothing is imported until asked for.
+_BUILTIN_DOMAINS: Dict[str, str] = {
+    "code": "min_tokenization_translator.domain_plugins.code:VOCABULARY",
+    "finance": "min_tokenization_translator.domain_plugins.finance:VOCABULARY",
+    "medical": "min_tokenization_translator.domain_plugins.medical:VOCABULARY",
+}
+
+_CACHE_FORMAT = 1
+_CACHE_SUFFIX = ".mtd"
+
+
+@dataclass
+class DomainVocabulary:
+    """Normalization vocabulary of one domain plugin."""
+
+    name: str
+    synonyms: Mapping[str, str] = field(default_factory=dict)
+    stop_words: FrozenSet[str] = GENERIC_STOP_WORDS
+
+    def compile(self) -> Dict[str, str]:
+        return compile_token_table(self.synonyms, frozenset(self.stop_words))
+
+
+DomainTarget = Union[str, DomainVocabulary, Callable[[], DomainVocabulary]]
+
+
+class DomainRegistry:
+    """
+    Lazily loaded per-domain distillers.
+
+    Domains come from the shipped plugins, the ``min_tokenization_translator.domains``
+    entry-point group and ``register``. A target is a ``module:attribute``
+    string naming a ``DomainVocabulary`` (or a callable returning one), so
+    listing domains imports nothing; a plugin module is only imported the
+    first time a request names its domain.
+
+    Compiled token tables are kept per process and, with ``cache_dir``, on
+    disk keyed by the plugin's source file. A warm cache builds the distiller
+    from the stored table without importing the plugin at all.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[Path] = None, default: Optional[str] = None, discover: bool = True
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.default = default or None
+        self._targets: Dict[str, DomainTarget] = dict(_BUILTIN_DOMAINS)
+        self._discover = discover
+        self._distillers: Dict[str, PromptDistiller] = {}
+        self._generic: Optional[PromptDistiller] = None
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        self._discover_entry_points()
+        return sorted(self._targets)
+
+    def __contains__(self, name: object) -> bool:
+        if name in self._targets:
+            return True
+        self._discover_entry_points()
+        return name in self._targets
+
+    def loaded(self) -> List[str]:
+        """Domains whose distiller has been built in this process."""
+        return sorted(self._distillers)
+
+    def active(self) -> List[PromptDistiller]:
+        """Every distiller built so far, the generic one included."""
+        distillers = list(self._distillers.values())
+        if self._generic is not None:
+            distillers.append(self._generic)
+        return distillers
+
+    def register(self, name: str, target: DomainTarget) -> None:
+        if not name:
+            raise ValueError("Domain names must be non-empty")
+        with self._lock:
+            self._targets[name] = target
+            self._distillers.pop(name, None)
+
+    def distiller(self, name: Optional[str] = None) -> PromptDistiller:
+        """
+        The distiller for ``name``, building it on first use.
+
+        Without a name, the registry's ``default`` domain is used, or the
+        generic ``PromptDistiller`` when no default is configured.
+        """
+        name = name or self.default
+        if not name:
+            if self._generic is None:
+                self._generic = PromptDistiller()
+            return self._generic
+        distiller = self._distillers.get(name)
+        if distiller is not None:
+            return distiller
+        with self._lock:
+            distiller = self._distillers.get(name)
+            if distiller is None:
+                distiller = self._distillers[name] = PromptDistiller(token_table=self.token_table(name), domain=name)
+        return distiller
+
+    def vocabulary(self, name: str) -> DomainVocabulary:
+        """Import the plugin behind ``name`` and return its vocabulary."""
+        target = self._target(name)
+        if isinstance(target, str):
+            target = _resolve(target)
+        if callable(target) and not isinstance(target, DomainVocabulary):
+            target = target()
+        if not isinstance(target, DomainVocabulary):
+            raise ValueError(f"Domain plugin {name!r} did not provide a DomainVocabulary")
+        return target
+
+    def token_table(self, name: str) -> Dict[str, str]:
+        target = self._target(name)
+        cache_dir = self.cache_dir
+        key = _cache_key(name, target) if cache_dir is not None and isinstance(target, str) else None
+        if cache_dir is None or key is None:
+            return self.vocabulary(name).compile()
+        table = _read_cache(cache_dir / f"{name}-{key}{_CACHE_SUFFIX}")
+        if table is None:
+            table = self.vocabulary(name).compile()
+            _write_cache(cache_dir, f"{name}-{key}{_CACHE_SUFFIX}", table)
+        return table
+
+    def _target(self, name: str) -> DomainTarget:
+        if name not in self:
+            raise ValueError(f"Unknown domain {name!r}; available: {', '.join(self.names()) or 'none'}")
+        return self._targets[name]
+
+    def _discover_entry_points(self) -> None:
+        if not self._discover:
+            return
+        self._discover = False
+        for name, value in _entry_points().items():
+            self._targets.setdefault(name, value)
+
+
+def _entry_points() -> Dict[str, str]:
+    """``name -> module:attribute`` for the plugin entry-point group, read from metadata only."""
+    from importlib import metadata
+
+    if sys.version_info >= (3, 10):
+        group = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    else:
+        group = metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+    return {entry.name: entry.value for entry in group}
+
+
+def _resolve(target: str):
+    module_name, _, attribute = target.partition(":")
+    value = importlib.import_module(module_name)
+    for part in attribute.split(".") if attribute else ():
+        value = getattr(value, part)
+    return value
+
+
+def _cache_key(name: str, target: str) -> Optional[str]:
+    # Keyed by the plugin's source file, found without executing the module.
+    try:
+        spec = importlib.util.find_spec(target.partition(":")[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return None
+    stat = os.stat(spec.origin)
+    fingerprint = json.dumps([_CACHE_FORMAT, name, target, spec.origin, stat.st_mtime_ns, stat.st_size, sys.version])
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+
+
+def _read_cache(path: Path) -> Optional[Dict[str, str]]:
+    try:
+        table = marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return table if isinstance(table, dict) else None
+
+
+def _write_cache(cache_dir: Path, file_name: str, table: Dict[str, str]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = cache_dir / file_name
+    temporary = cache_dir / f".{file_name}.{os.getpid()}.tmp"
+    temporary.write_bytes(marshal.dumps(table))
+    os.replace(temporary, target)
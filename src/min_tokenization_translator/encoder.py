@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List
+import heapq
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Sequence
 
-from .config import FeatureFlags
+from .batching import map_chunked
+from .checksum import DEFAULT_BLOCK_SIZE, seal
+from .config import FeatureFlag, FeatureFlags
+from .costs import DEFAULT_COST_TABLE, SymbolCostTable
 from .distiller import DistilledPrompt
+from .frames import DELTA_PREFIX, DELTA_SEPARATOR, FRAME_CLOSE, FRAME_MARKERS, FRAME_OPEN, RECALL_PREFIX, Frame, FrameStore
+
+if TYPE_CHECKING:
+    from .substitution import PhraseAutomaton
 
 
 @dataclass
@@ -14,6 +23,30 @@ class EncodedResult:
     payload: str
     dictionary: Dict[str, str] = field(default_factory=dict)
     feature_header: str = ""
+    retired: List[str] = field(default_factory=list)
+
+
+ENTRY_KEYS = ("type", "key", "value", "source", "target", "lhs", "rhs", "canonical")
+FIELD_SEPARATOR = "|"
+FALLBACK_PREFIX = "~"
+
+
+def entry_fields(distilled: DistilledPrompt) -> List[List[str]]:
+    """Return the token sequence of every graph entry field, in emission order."""
+    fields: List[List[str]] = []
+    for values in distilled.graph.iter_values(ENTRY_KEYS):
+        values = [value for value in values if value]
+        if values:
+            fields.append(values)
+    return fields
+
+
+def graph_fields(distilled: DistilledPrompt) -> List[List[str]]:
+    """Return the token sequence of every payload field, in emission order."""
+    fields = entry_fields(distilled)
+    if distilled.residual_note:
+        fields.append([distilled.residual_note])
+    return fields
 
 
 class SymbolEncoder:
@@ -22,6 +55,35 @@ class SymbolEncoder:
 
     The encoder assigns single-byte ASCII symbols to high-value phrases,
     falling back to prefixed identifiers when the symbol pool is exhausted.
+    Symbols are drawn from the pool cheapest-first according to the
+    tokenizer's ``SymbolCostTable``; negotiating ``UNICODE_OVERLAY`` extends
+    the pool with the table's single-token Unicode glyphs.
+    Fallback identifiers within one dictionary share a zero-padded width so the
+    symbol set stays prefix-free and payloads decode in a single pass.
+
+    In session mode the symbol table persists across ``encode`` calls: known
+    phrases keep their symbols, each result carries only the entries added
+    this turn, and once ``max_symbols`` is reached the least recently used
+    symbols not needed by the current turn are retired and recycled.
+
+    A session with ``RELATIONAL_CONTEXT`` negotiated also keeps a
+    ``FrameStore`` of transmitted graph entries: a new entry is sent as a
+    ``[...]`` frame, a repeated one as a ``'n`` recall (consecutive recalls
+    merge into ``'0'1``), and a near-repeat as an ``=n/`` delta listing
+    ``position``+``symbol`` replacements, whichever is shortest.
+
+    With ``CHECKSUM_BLOCKS`` negotiated, everything after the feature header
+    is sealed into ``checksum_block_size``-character blocks, each followed by
+    a ``?xx`` checksum (see ``checksum.seal``).
+
+    ``preload`` maps phrases to fixed symbols shared ahead of time, such as
+    a trained core dictionary (``trainer.load_dictionary``) or negotiated
+    packs (``PackRegistry.preload``). Preloaded phrases always use their
+    symbol, never appear in result dictionaries, and pool symbols that
+    start a preloaded symbol are withheld from the per-prompt pool. A ``core``
+    ``PhraseAutomaton`` preloads its phrases the same way and, in addition,
+    substitutes them wherever they occur inside dictionary text (segments
+    and the residual note), so ``SymbolDecoder`` needs the same ``core``.
     """
 
     _SYMBOL_POOL = [
@@ -33,41 +95,156 @@ class SymbolEncoder:
         "0", "1", "2", "3", "4", "5", "6", "7", "8", "9",
     ]
 
-    def __init__(self, feature_flags: FeatureFlags | None = None) -> None:
+    def __init__(
+        self,
+        feature_flags: FeatureFlags | None = None,
+        session: bool = False,
+        max_symbols: int = 4096,
+        cost_table: Optional[SymbolCostTable] = None,
+        max_frames: int = 64,
+        checksum_block_size: int = DEFAULT_BLOCK_SIZE,
+        preload: Optional[Mapping[str, str]] = None,
+        core: Optional[PhraseAutomaton] = None,
+    ) -> None:
+        if max_symbols < 1:
+            raise ValueError("max_symbols must be positive")
         self.feature_flags = feature_flags
-        self._token_to_symbol: Dict[str, str] = {}
+        self.session = session
+        self.max_symbols = max_symbols
+        self.cost_table = cost_table or DEFAULT_COST_TABLE
+        self.checksum_block_size = checksum_block_size
+        overlay = bool(feature_flags and feature_flags.requires_unicode_support())
+        self._use_frames = bool(session and feature_flags and feature_flags.is_enabled(FeatureFlag.RELATIONAL_CONTEXT))
+        self._symbol_pool = self.cost_table.symbol_pool(self._SYMBOL_POOL, overlay)
+        if self._use_frames:
+            self._symbol_pool = [symbol for symbol in self._symbol_pool if symbol not in FRAME_MARKERS]
+        self.core = core
+        self.preload: Dict[str, str] = {**(core.entries if core is not None else {}), **(preload or {})}
+        if self.preload:
+            # A pool symbol that starts a preloaded one would make the symbol set ambiguous.
+            reserved = {symbol[:1] for symbol in self.preload.values()}
+            self._symbol_pool = [symbol for symbol in self._symbol_pool if symbol not in reserved]
+        self._frames = FrameStore(max_frames)
+        self._token_to_symbol: Dict[str, str] = OrderedDict()
         self._symbol_to_token: Dict[str, str] = {}
-        self._pool_index = 0
+        self._token_slot: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._next_slot = 0
+        self._fallback_width = len(str(max_symbols - 1))
 
-    def encode(self, distilled: DistilledPrompt) -> EncodedResult:
+    def reset_session(self) -> None:
+        """Forget every session symbol; the next result carries a full dictionary."""
         self._token_to_symbol.clear()
         self._symbol_to_token.clear()
-        self._pool_index = 0
+        self._token_slot.clear()
+        self._free_slots.clear()
+        self._next_slot = 0
+        self._frames.clear()
+
+    def session_snapshot(self) -> List[tuple[str, int]]:
+        """Return the session lexicon as ``(token, slot)`` pairs, least recently used first."""
+        return [(token, self._token_slot[token]) for token in self._token_to_symbol]
+
+    def frame_snapshot(self) -> List[tuple[int, List[str]]]:
+        return self._frames.snapshot()
+
+    def restore_session(
+        self, snapshot: Iterable[tuple[str, int]], frames: Iterable[tuple[int, Sequence[str]]] = ()
+    ) -> None:
+        """Rebuild session state from ``session_snapshot``/``frame_snapshot`` output, e.g. on another worker."""
+        self.reset_session()
+        self._frames.restore(frames)
+        for token, slot in snapshot:
+            symbol = self._symbol_for_slot(slot)
+            self._token_slot[token] = slot
+            self._token_to_symbol[token] = symbol
+            self._symbol_to_token[symbol] = token
+        self._next_slot = max(self._token_slot.values(), default=-1) + 1
+        used = set(self._token_slot.values())
+        self._free_slots = [slot for slot in range(self._next_slot) if slot not in used]
+        heapq.heapify(self._free_slots)
 
+    def encode(self, distilled: DistilledPrompt) -> EncodedResult:
         tokens = self._collect_tokens(distilled)
+        if self.preload:
+            tokens = [item for item in tokens if item[0] not in self.preload]
         ordered_tokens = sorted(tokens, key=lambda item: (-item[1], len(item[0])))
+        retired: List[str] = []
+        if self.session:
+            retired = self._prepare_session_turn([token for token, _count in ordered_tokens])
+        else:
+            self.reset_session()
+            self._fallback_width = len(str(max(len(ordered_tokens) - 1, 0)))
+        new_tokens: List[str] = []
         for token, _count in ordered_tokens:
-            self._register_token(token)
+            if token not in self._token_to_symbol:
+                self._register_token(token)
+                new_tokens.append(token)
 
-        symbol_stream = []
-        for entry in distilled.graph:
-            parts = []
-            for key in ("type", "key", "value", "source", "target", "lhs", "rhs", "canonical"):
-                value = entry.get(key)
-                if value:
-                    parts.append(self._encode_token(value))
-            if parts:
-                symbol_stream.append("".join(parts))
-        if distilled.residual_note:
-            symbol_stream.append(self._encode_token(distilled.residual_note))
+        if self._use_frames:
+            symbol_stream = self._frame_fields(entry_fields(distilled))
+            if distilled.residual_note:
+                symbol_stream.append(self._encode_token(distilled.residual_note))
+        else:
+            symbol_stream = [
+                "".join(self._encode_token(value) for value in values) for values in graph_fields(distilled)
+            ]
 
         feature_header = ""
         if self.feature_flags:
             feature_header = self.feature_flags.as_payload()
+            if symbol_stream and self.feature_flags.is_enabled(FeatureFlag.CHECKSUM_BLOCKS):
+                symbol_stream = [seal(FIELD_SEPARATOR.join(symbol_stream), self.checksum_block_size)]
             symbol_stream.insert(0, feature_header)
 
-        payload = "|".join(symbol_stream)
-        return EncodedResult(payload=payload, dictionary=dict(self._symbol_to_token), feature_header=feature_header)
+        payload = FIELD_SEPARATOR.join(symbol_stream)
+        if self.session:
+            dictionary = {self._token_to_symbol[token]: token for token in new_tokens}
+        else:
+            dictionary = dict(self._symbol_to_token)
+        if self.core is not None:
+            substitute = self.core.substitute
+            dictionary = {symbol: substitute(token) for symbol, token in dictionary.items()}
+        return EncodedResult(payload=payload, dictionary=dictionary, feature_header=feature_header, retired=retired)
+
+    def encode_many(
+        self,
+        prompts: Iterable[DistilledPrompt],
+        *,
+        executor: str = "auto",
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[EncodedResult]:
+        """
+        Encode a batch of distilled prompts, returning results in input order.
+
+        Every chunk is encoded by a fresh encoder sharing this one's
+        configuration, so results match sequential ``encode`` calls. Session
+        encoders always run in-process, in order, since each turn depends on
+        the previous one.
+        """
+        if self.session:
+            return [self.encode(distilled) for distilled in prompts]
+        return map_chunked(
+            _encode_chunk,
+            self,
+            list(prompts),
+            executor=executor,
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+        )
+
+    def _fork(self) -> "SymbolEncoder":
+        return SymbolEncoder(
+            self.feature_flags,
+            session=self.session,
+            max_symbols=self.max_symbols,
+            cost_table=self.cost_table,
+            max_frames=self._frames.max_frames,
+            checksum_block_size=self.checksum_block_size,
+            preload=self.preload,
+            core=self.core,
+        )
 
     def _collect_tokens(self, distilled: DistilledPrompt) -> List[tuple[str, int]]:
         counts: Dict[str, int] = {}
@@ -77,9 +254,8 @@ class SymbolEncoder:
                 return
             counts[text] = counts.get(text, 0) + weight
 
-        for entry in distilled.graph:
-            for value in entry.values():
-                bump(str(value), 2)
+        for value, occurrences in distilled.graph.value_counts():
+            bump(value, 2 * occurrences)
         for canonical, surface in distilled.lexicon.items():
             bump(canonical, 3)
             bump(surface, 1)
@@ -87,18 +263,87 @@ class SymbolEncoder:
             bump(distilled.residual_note, 1)
         return list(counts.items())
 
+    def _prepare_session_turn(self, turn_tokens: List[str]) -> List[str]:
+        """Refresh recency for this turn's tokens and retire cold ones to make room."""
+        if len(turn_tokens) > self.max_symbols:
+            raise ValueError(f"Turn needs {len(turn_tokens)} symbols but max_symbols is {self.max_symbols}")
+        known = self._token_to_symbol
+        new_count = 0
+        for token in turn_tokens:
+            if token in known:
+                known.move_to_end(token)  # type: ignore[attr-defined]
+            else:
+                new_count += 1
+        retired: List[str] = []
+        overflow = len(known) + new_count - self.max_symbols
+        for _ in range(max(0, overflow)):
+            # Turn tokens sit at the recent end, so the oldest entry is never one of them.
+            token, symbol = known.popitem(last=False)  # type: ignore[call-arg]
+            del self._symbol_to_token[symbol]
+            heapq.heappush(self._free_slots, self._token_slot.pop(token))
+            retired.append(symbol)
+        return retired
+
+    def _frame_fields(self, fields: List[List[str]]) -> List[str]:
+        stream: List[str] = []
+        recalls: List[str] = []
+        for values in fields:
+            frame = tuple(values)
+            index = self._frames.find(frame)
+            if index is not None:
+                self._frames.recall(index)
+                recalls.append(f"{RECALL_PREFIX}{index}")
+                continue
+            if recalls:
+                stream.append("".join(recalls))
+                recalls = []
+            stream.append(self._frame_update(frame))
+        if recalls:
+            stream.append("".join(recalls))
+        return stream
+
+    def _frame_update(self, frame: Frame) -> str:
+        symbols = [self._encode_token(token) for token in frame]
+        full = FRAME_OPEN + "".join(symbols) + FRAME_CLOSE
+        # Delta positions are single digits.
+        nearest = self._frames.nearest(frame) if len(frame) <= 10 else None
+        if nearest is not None:
+            index, changed = nearest
+            edits = "".join(f"{position}{symbols[position]}" for position in changed)
+            delta = f"{DELTA_PREFIX}{index}{DELTA_SEPARATOR}{edits}"
+            if len(delta) < len(full):
+                self._frames.replace(index, frame)
+                return delta
+        self._frames.add(frame)
+        return full
+
+    def _symbol_for_slot(self, slot: int) -> str:
+        if slot < len(self._symbol_pool):
+            return self._symbol_pool[slot]
+        return f"{FALLBACK_PREFIX}{slot:0{self._fallback_width}d}"
+
     def _register_token(self, token: str) -> None:
         if token in self._token_to_symbol:
             return
-        if self._pool_index < len(self._SYMBOL_POOL):
-            symbol = self._SYMBOL_POOL[self._pool_index]
-            self._pool_index += 1
+        if self._free_slots:
+            slot = heapq.heappop(self._free_slots)
         else:
-            symbol = f"~{len(self._token_to_symbol)}"
+            slot = self._next_slot
+            self._next_slot += 1
+        symbol = self._symbol_for_slot(slot)
+        self._token_slot[token] = slot
         self._token_to_symbol[token] = symbol
         self._symbol_to_token[symbol] = token
 
     def _encode_token(self, token: str) -> str:
+        symbol = self.preload.get(token)
+        if symbol is not None:
+            return symbol
         if token not in self._token_to_symbol:
             self._register_token(token)
         return self._token_to_symbol[token]
+
+
+def _encode_chunk(encoder: SymbolEncoder, chunk: Sequence[DistilledPrompt]) -> List[EncodedResult]:
+    local = encoder._fork()
+    return [local.encode(distilled) for distilled in chunk]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+FRAME_OPEN = "["
+FRAME_CLOSE = "]"
+RECALL_PREFIX = "'"
+DELTA_PREFIX = "="
+DELTA_SEPARATOR = "/"
+
+# Characters that start or close frame fields; never usable as symbols while frames are active.
+FRAME_MARKERS = FRAME_OPEN + FRAME_CLOSE + RECALL_PREFIX + DELTA_PREFIX
+
+Frame = Tuple[str, ...]
+
+
+class FrameStore:
+    """
+    Bounded, indexed store of transmitted context frames (Stage 4).
+
+    A frame is the token tuple of one graph entry, e.g. ``entity|role|state``.
+    Frames are numbered in arrival order; once ``max_frames`` are held, the
+    least recently used frame is evicted and its index reused. Encoder and decoder
+    each keep a store and apply the same operations in payload order, so
+    indices agree without ever being transmitted explicitly.
+    """
+
+    def __init__(self, max_frames: int = 64) -> None:
+        if max_frames < 1:
+            raise ValueError("max_frames must be positive")
+        self.max_frames = max_frames
+        self._frames: "OrderedDict[int, Frame]" = OrderedDict()
+        self._by_frame: Dict[Frame, int] = {}
+        # (length, first token) -> indices; candidates for delta updates.
+        self._buckets: Dict[Tuple[int, str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, frame: object) -> bool:
+        return frame in self._by_frame
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._by_frame.clear()
+        self._buckets.clear()
+
+    def find(self, frame: Frame) -> Optional[int]:
+        return self._by_frame.get(frame)
+
+    def recall(self, index: int) -> Frame:
+        frame = self._frames.get(index)
+        if frame is None:
+            raise ValueError(f"Unknown frame index {index}")
+        self._frames.move_to_end(index)
+        return frame
+
+    def add(self, frame: Frame) -> int:
+        if frame in self._by_frame:
+            raise ValueError("Frame is already stored")
+        if len(self._frames) < self.max_frames:
+            index = len(self._frames)
+        else:
+            index, evicted = self._frames.popitem(last=False)
+            self._unindex(index, evicted)
+        self._frames[index] = frame
+        self._index(index, frame)
+        return index
+
+    def replace(self, index: int, frame: Frame) -> None:
+        old = self.recall(index)
+        self._unindex(index, old)
+        self._frames[index] = frame
+        self._index(index, frame)
+
+    def nearest(self, frame: Frame) -> Optional[Tuple[int, List[int]]]:
+        """Return the stored frame closest to ``frame`` and the positions that differ."""
+        best: Optional[Tuple[int, List[int]]] = None
+        for index in self._buckets.get(_bucket(frame), ()):
+            stored = self._frames[index]
+            changed = [position for position, (old, new) in enumerate(zip(stored, frame)) if old != new]
+            if best is None or len(changed) < len(best[1]):
+                best = (index, changed)
+        return best
+
+    def snapshot(self) -> List[Tuple[int, List[str]]]:
+        """Frames as ``(index, tokens)`` pairs, least recently used first."""
+        return [(index, list(frame)) for index, frame in self._frames.items()]
+
+    def restore(self, snapshot: Iterable[Tuple[int, Sequence[str]]]) -> None:
+        self.clear()
+        for index, tokens in snapshot:
+            frame = tuple(tokens)
+            self._frames[index] = frame
+            self._index(index, frame)
+
+    def _index(self, index: int, frame: Frame) -> None:
+        self._by_frame[frame] = index
+        self._buckets.setdefault(_bucket(frame), []).append(index)
+
+    def _unindex(self, index: int, frame: Frame) -> None:
+        del self._by_frame[frame]
+        bucket = self._buckets[_bucket(frame)]
+        bucket.remove(index)
+        if not bucket:
+            del self._buckets[_bucket(frame)]
+
+
+def _bucket(frame: Frame) -> Tuple[int, str]:
+    return len(frame), frame[0] if frame else ""
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+Shape = Tuple[str, ...]
+
+
+class CompactGraph(Sequence):
+    """
+    Columnar store for a distilled graph.
+
+    Entries are kept as a shape column, indexing the graph's ``shape_table``
+    of key tuples, and one flat column of indices into a per-graph string
+    table, instead of one dict per entry. Indexing and iteration build
+    ``Dict[str, str]`` snapshots on demand, so code written against the old
+    list-of-dicts keeps working; they are copies, so editing one does not
+    change the graph, which only grows through ``append``. Hot loops should
+    use ``iter_values`` / ``value_counts`` or the columns directly.
+    """
+
+    __slots__ = ("strings", "shape_table", "shapes", "values", "_index", "_shape_index", "_offsets")
+
+    def __init__(self, entries: Iterable[Mapping[str, str]] = ()) -> None:
+        self.strings: List[str] = []
+        self.shape_table: List[Shape] = []
+        self.shapes = array("I")
+        self.values = array("I")
+        self._index: Optional[Dict[str, int]] = None
+        self._shape_index: Optional[Dict[Shape, int]] = None
+        self._offsets: Optional[array] = None
+        for entry in entries:
+            self.append(entry)
+
+    @classmethod
+    def from_columns(
+        cls, strings: List[str], shape_table: List[Shape], shapes: Iterable[int], values: Iterable[int]
+    ) -> "CompactGraph":
+        graph = cls()
+        graph.strings = strings
+        graph.shape_table = shape_table
+        graph.shapes = array("I", shapes)
+        graph.values = array("I", values)
+        if graph.shapes and max(graph.shapes) >= len(shape_table):
+            raise ValueError("Graph references a missing shape")
+        if sum(len(shape_table[shape]) for shape in graph.shapes) != len(graph.values):
+            raise ValueError("Graph columns do not match their shapes")
+        if graph.values and max(graph.values) >= len(strings):
+            raise ValueError("Graph references a missing string")
+        return graph
+
+    def append(self, entry: Mapping[str, str]) -> None:
+        index = self._index
+        shape_index = self._shape_index
+        if index is None or shape_index is None:
+            index = self._index = {value: position for position, value in enumerate(self.strings)}
+            shape_index = self._shape_index = {keys: position for position, keys in enumerate(self.shape_table)}
+        strings = self.strings
+        values = self.values
+        keys = tuple(entry)
+        shape = shape_index.get(keys)
+        if shape is None:
+            shape = shape_index[keys] = len(self.shape_table)
+            self.shape_table.append(keys)
+        self.shapes.append(shape)
+        for value in entry.values():
+            position = index.get(value)
+            if position is None:
+                position = index[value] = len(strings)
+                strings.append(value)
+            values.append(position)
+        self._offsets = None
+
+    def compact(self) -> "CompactGraph":
+        """Drop the build-time intern index and trim growth slack; ``append`` still works afterwards."""
+        self._index = None
+        self._shape_index = None
+        self.strings = list(self.strings)
+        self.shape_table = list(self.shape_table)
+        self.shapes = array("I", self.shapes)
+        self.values = array("I", self.values)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[position] for position in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("graph index out of range")
+        if self._offsets is None:
+            table = self.shape_table
+            offsets = array("I", [0])
+            for shape in self.shapes:
+                offsets.append(offsets[-1] + len(table[shape]))
+            self._offsets = offsets
+        keys = self.shape_table[self.shapes[item]]
+        start = self._offsets[item]
+        strings = self.strings
+        return {key: strings[index] for key, index in zip(keys, self.values[start : start + len(keys)])}
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        strings = self.strings
+        table = self.shape_table
+        values = iter(self.values)
+        for shape in self.shapes:
+            yield {key: strings[next(values)] for key in table[shape]}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (CompactGraph, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(left == right for left, right in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CompactGraph({list(self)!r})"
+
+    def __getstate__(self):
+        return self.strings, self.shape_table, self.shapes, self.values
+
+    def __setstate__(self, state) -> None:
+        strings, shape_table, shapes, values = state
+        self.strings = list(strings)
+        self.shape_table = [tuple(keys) for keys in shape_table]
+        self.shapes = array("I", shapes)
+        self.values = values
+        self._index = None
+        self._shape_index = None
+        self._offsets = None
+
+    def iter_values(self, keys: Optional[Shape] = None) -> Iterator[List[str]]:
+        """
+        Yield each entry's values, in stored order or projected onto ``keys``.
+
+        Keys an entry lacks are skipped, matching ``[entry[k] for k in keys if k in entry]``.
+        """
+        strings = self.strings
+        values = self.values
+        widths = [len(shape) for shape in self.shape_table]
+        projections = [_project(shape, keys) for shape in self.shape_table] if keys is not None else []
+        offset = 0
+        for shape in self.shapes:
+            width = widths[shape]
+            if keys is None:
+                yield [strings[index] for index in values[offset : offset + width]]
+            else:
+                yield [strings[values[offset + position]] for position in projections[shape]]
+            offset += width
+
+    def value_counts(self) -> List[Tuple[str, int]]:
+        """How often each distinct value occurs, in first-occurrence order."""
+        counts = Counter(self.values)
+        return [(value, counts[index]) for index, value in enumerate(self.strings)]
+
+
+def as_compact_graph(graph: Iterable[Mapping[str, str]]) -> CompactGraph:
+    if isinstance(graph, CompactGraph):
+        return graph
+    return CompactGraph(graph).compact()
+
+
+def _project(shape: Shape, keys: Shape) -> Tuple[int, ...]:
+    positions = {key: position for position, key in enumerate(shape)}
+    return tuple(positions[key] for key in keys if key in positions)
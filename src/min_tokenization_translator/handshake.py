@@ -2,12 +2,22 @@ from __future__ import annotations
 
 import base64
 import os
-import subprocess
+import struct
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple, Union
 
 from .config import FeatureFlags
+from .keypool import KeyPool, dispose_keypair, generate_keypair
+from .tickets import TicketCache, TicketEntry
+
+PacketData = Union[str, bytes, bytearray, memoryview]
+
+BINARY_PACKET_MAGIC = b"MT"
+BINARY_PACKET_VERSION = 1
+_BINARY_HEADER = struct.Struct(">2sBH")
+_FIELD_LENGTH = struct.Struct(">H")
 
 
 @dataclass
@@ -28,6 +38,7 @@ class HandshakeArtifacts:
     private_key_path: Path
     feature_payload: str
     nonce: str
+    keygen_seconds: float = 0.0
 
 
 class HandshakeManager:
@@ -35,27 +46,71 @@ class HandshakeManager:
     Manages secure handshake negotiation using SSH key pairs.
 
     Defaults to per-session keys but can reuse encrypted keys when requested.
+    Per-session keys come from ``key_pool`` when one is supplied, keeping
+    ``ssh-keygen`` off the request path. With a ``ticket_cache`` a returning
+    client can present a resumption ticket to skip key generation entirely.
     """
 
-    def __init__(self, config: HandshakeConfig, feature_flags: FeatureFlags):
+    def __init__(
+        self,
+        config: HandshakeConfig,
+        feature_flags: FeatureFlags,
+        key_pool: Optional[KeyPool] = None,
+        ticket_cache: Optional[TicketCache] = None,
+    ):
         self.config = config
         self.feature_flags = feature_flags
+        self.key_pool = key_pool
+        self.ticket_cache = ticket_cache
 
     def prepare_handshake(self) -> HandshakeArtifacts:
         """Generate keys, nonce, and feature payload for a session."""
+        started = time.perf_counter()
         key_path = self._generate_keypair()
+        keygen_seconds = time.perf_counter() - started
         public_key = self._read_public_key(key_path)
         feature_payload = self.feature_flags.as_payload()
-        nonce = base64.urlsafe_b64encode(os.urandom(12)).decode("ascii").rstrip("=")
+        nonce = self._new_nonce()
         return HandshakeArtifacts(
             public_key=public_key,
             private_key_path=key_path,
             feature_payload=feature_payload,
             nonce=nonce,
+            keygen_seconds=keygen_seconds,
+        )
+
+    def resume_handshake(self, ticket: str) -> Optional[HandshakeArtifacts]:
+        """Rebuild artifacts from a resumption ticket, or return None to fall back to a full handshake."""
+        if self.ticket_cache is None:
+            return None
+        feature_payload = self.feature_flags.as_payload()
+        entry = self.ticket_cache.redeem(ticket, feature_payload, self.config.tokenizer_fingerprint)
+        if entry is None:
+            return None
+        return HandshakeArtifacts(
+            public_key=entry.public_key,
+            private_key_path=entry.private_key_path,
+            feature_payload=feature_payload,
+            nonce=self._new_nonce(),
         )
 
+    def issue_ticket(self, artifacts: HandshakeArtifacts) -> Optional[str]:
+        if self.ticket_cache is None:
+            return None
+        return self.ticket_cache.issue(
+            artifacts.public_key,
+            artifacts.private_key_path,
+            artifacts.feature_payload,
+            self.config.tokenizer_fingerprint,
+        )
+
+    def _new_nonce(self) -> str:
+        return base64.urlsafe_b64encode(os.urandom(12)).decode("ascii").rstrip("=")
+
     def _generate_keypair(self) -> Path:
         """Create an SSH keypair, honoring reusable-key requests when set."""
+        if self.key_pool is not None and not self.feature_flags.wants_reusable_keys():
+            return self.key_pool.acquire()
         key_dir = self.config.key_dir
         key_dir.mkdir(parents=True, exist_ok=True)
         if self.feature_flags.wants_reusable_keys():
@@ -71,27 +126,17 @@ class HandshakeManager:
         if public_path.exists():
             public_path.unlink()
 
-        cmd = [
-            "ssh-keygen",
-            "-t",
-            self.config.ssh_key_type,
-            "-f",
-            str(key_path),
-            "-N",
-            "",
-            "-C",
-            "min-tokenization-translator-session",
-        ]
-        try:
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except FileNotFoundError as exc:
-            raise RuntimeError("ssh-keygen is required for handshake key generation.") from exc
-        except subprocess.CalledProcessError as exc:
-            raise RuntimeError(f"ssh-keygen failed: {exc.stderr.decode('utf-8', errors='ignore')}") from exc
+        generate_keypair(key_path, self.config.ssh_key_type)
         if self.feature_flags.wants_reusable_keys():
             key_path.chmod(0o600)
         return key_path
 
+    def dispose_artifacts(self, artifacts: HandshakeArtifacts) -> None:
+        """Securely delete a per-session keypair once the session no longer needs it."""
+        if self.feature_flags.wants_reusable_keys():
+            return
+        _dispose_session_key(artifacts.private_key_path, self.key_pool)
+
     def _read_public_key(self, key_path: Path) -> str:
         public_path = key_path.with_suffix(".pub")
         return public_path.read_text(encoding="utf-8").strip()
@@ -107,11 +152,88 @@ class HandshakeManager:
         ]
         return "|".join(components)
 
-    def parse_remote_packet(self, packet: str) -> Tuple[str, str, FeatureFlags]:
-        """Parse remote handshake packet and return useful components."""
-        fields = dict(part.split("=", 1) for part in packet.split("|") if "=" in part)
-        protocol_version = fields.get("v", "")
-        tokenizer = fields.get("tok", "")
-        feature_payload = fields.get("feat", "")
+    def build_binary_packet(self, artifacts: HandshakeArtifacts) -> bytes:
+        """Serialize handshake data into the compact binary packet format.
+
+        Layout: ``MT`` magic, format version byte, big-endian u16 feature mask,
+        then u16 length-prefixed UTF-8 protocol version, tokenizer, nonce and
+        public key.
+        """
+        mask = self.feature_flags.params.decode_mask(artifacts.feature_payload)
+        parts = [_BINARY_HEADER.pack(BINARY_PACKET_MAGIC, BINARY_PACKET_VERSION, mask)]
+        for value in (
+            self.config.protocol_version,
+            self.config.tokenizer_fingerprint,
+            artifacts.nonce,
+            artifacts.public_key,
+        ):
+            encoded = value.encode("utf-8")
+            if len(encoded) > 0xFFFF:
+                raise ValueError("Handshake field exceeds 65535 bytes")
+            parts.append(_FIELD_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+
+    def parse_remote_packet(self, packet: PacketData) -> Tuple[str, str, FeatureFlags]:
+        """Parse remote handshake packet and return useful components.
+
+        Accepts the text format or, as ``bytes``/``memoryview``, the binary format.
+        """
+        if isinstance(packet, str):
+            return self._parse_text_packet(packet)
+        view = memoryview(packet)
+        if view[:2] != BINARY_PACKET_MAGIC:
+            return self._parse_text_packet(bytes(view).decode("utf-8"))
+        return self._parse_binary_packet(view)
+
+    def _parse_text_packet(self, packet: str) -> Tuple[str, str, FeatureFlags]:
+        protocol_version = tokenizer = feature_payload = ""
+        for part in packet.split("|"):
+            key, sep, value = part.partition("=")
+            if not sep:
+                continue
+            if key == "v":
+                protocol_version = value
+            elif key == "tok":
+                tokenizer = value
+            elif key == "feat":
+                feature_payload = value
         flags = FeatureFlags.from_payload(feature_payload, self.feature_flags.params)
         return protocol_version, tokenizer, flags
+
+    def _parse_binary_packet(self, view: memoryview) -> Tuple[str, str, FeatureFlags]:
+        if len(view) < _BINARY_HEADER.size:
+            raise ValueError("Truncated binary handshake packet")
+        _, version, mask = _BINARY_HEADER.unpack_from(view)
+        if version != BINARY_PACKET_VERSION:
+            raise ValueError(f"Unsupported binary handshake version: {version}")
+        offset = _BINARY_HEADER.size
+        fields = []
+        for _ in range(2):
+            if offset + _FIELD_LENGTH.size > len(view):
+                raise ValueError("Truncated binary handshake packet")
+            (length,) = _FIELD_LENGTH.unpack_from(view, offset)
+            offset += _FIELD_LENGTH.size
+            if offset + length > len(view):
+                raise ValueError("Truncated binary handshake packet")
+            fields.append(str(view[offset : offset + length], "utf-8"))
+            offset += length
+        flags = FeatureFlags.from_mask(mask, self.feature_flags.params)
+        return fields[0], fields[1], flags
+
+
+def ticket_key_disposer(key_pool: Optional[KeyPool] = None) -> Callable[[TicketEntry], None]:
+    """``TicketCache.on_evict`` hook deleting the keypair of a session that can no longer resume."""
+
+    def dispose(entry: TicketEntry) -> None:
+        if not FeatureFlags.from_payload(entry.feature_payload).wants_reusable_keys():
+            _dispose_session_key(entry.private_key_path, key_pool)
+
+    return dispose
+
+
+def _dispose_session_key(key_path: Path, key_pool: Optional[KeyPool]) -> None:
+    if key_pool is not None:
+        key_pool.dispose(key_path)
+    else:
+        dispose_keypair(key_path)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Optional
+
+
+def generate_keypair(key_path: Path, key_type: str = "ed25519") -> Path:
+    """Run ``ssh-keygen`` to create ``key_path`` and ``key_path.pub``."""
+    import subprocess  # deferred: only key generation needs it
+
+    cmd = [
+        "ssh-keygen",
+        "-t",
+        key_type,
+        "-f",
+        str(key_path),
+        "-N",
+        "",
+        "-C",
+        "min-tokenization-translator-session",
+    ]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as exc:
+        raise RuntimeError("ssh-keygen is required for handshake key generation.") from exc
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(f"ssh-keygen failed: {exc.stderr.decode('utf-8', errors='ignore')}") from exc
+    return key_path
+
+
+def dispose_keypair(key_path: Path) -> None:
+    """Overwrite a keypair with zeros before unlinking it."""
+    for path in (key_path, key_path.with_suffix(".pub")):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            continue
+        with open(path, "r+b") as handle:
+            handle.write(b"\0" * size)
+            handle.flush()
+            os.fsync(handle.fileno())
+        path.unlink()
+
+
+@dataclass
+class KeyPoolConfig:
+    """Sizing and pacing for a pre-generated key pool."""
+
+    size: int = 4
+    refill_interval: float = 0.05
+    key_type: str = "ed25519"
+
+
+@dataclass
+class KeyPoolStats:
+    """Counters describing how well the pool keeps up with demand."""
+
+    hits: int = 0
+    misses: int = 0
+    generated: int = 0
+    disposed: int = 0
+    ready: int = 0
+
+
+class KeyPool:
+    """
+    Keeps ready-made ephemeral keypairs so handshakes skip ``ssh-keygen``.
+
+    A background worker tops the pool up to ``size`` keys, sleeping
+    ``refill_interval`` seconds between generations. ``acquire`` hands out
+    each key exactly once; when the pool is empty it generates one inline
+    and counts a miss.
+    """
+
+    def __init__(
+        self,
+        key_dir: Path,
+        config: Optional[KeyPoolConfig] = None,
+        generator: Callable[[Path, str], Path] = generate_keypair,
+    ) -> None:
+        self.key_dir = key_dir
+        self.config = config or KeyPoolConfig()
+        self._generator = generator
+        self._ready: Deque[Path] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = KeyPoolStats()
+
+    def __enter__(self) -> "KeyPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self.key_dir.mkdir(parents=True, exist_ok=True)
+        self._stopping.clear()
+        self._wake.set()
+        self._worker = threading.Thread(target=self._refill_loop, name="mtt-key-pool", daemon=True)
+        self._worker.start()
+
+    def stop(self, dispose_unused: bool = True) -> None:
+        """Stop the refill worker and, by default, securely dispose of unused keys."""
+        self._stopping.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if dispose_unused:
+            with self._lock:
+                unused = list(self._ready)
+                self._ready.clear()
+            for key_path in unused:
+                self.dispose(key_path)
+
+    def fill(self) -> None:
+        """Synchronously top the pool up to its configured size."""
+        while self._needs_key():
+            self._add(self._generate())
+
+    def acquire(self) -> Path:
+        """Take one unused keypair out of the pool."""
+        with self._lock:
+            key_path = self._ready.popleft() if self._ready else None
+            if key_path is not None:
+                self._stats.hits += 1
+            else:
+                self._stats.misses += 1
+        self._wake.set()
+        if key_path is None:
+            key_path = self._generate()
+        return key_path
+
+    def dispose(self, key_path: Path) -> None:
+        dispose_keypair(key_path)
+        with self._lock:
+            self._stats.disposed += 1
+
+    def stats(self) -> KeyPoolStats:
+        with self._lock:
+            return KeyPoolStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                generated=self._stats.generated,
+                disposed=self._stats.disposed,
+                ready=len(self._ready),
+            )
+
+    def _needs_key(self) -> bool:
+        with self._lock:
+            return len(self._ready) < self.config.size
+
+    def _add(self, key_path: Path) -> None:
+        with self._lock:
+            self._ready.append(key_path)
+
+    def _generate(self) -> Path:
+        self.key_dir.mkdir(parents=True, exist_ok=True)
+        token = f"{os.getpid()}_{os.urandom(6).hex()}"
+        staging = self.key_dir / f".staging_{token}"
+        self._generator(staging, self.config.key_type)
+        # Publish the public half first so a visible private key always has one.
+        final = self.key_dir / f"pool_{token}"
+        os.replace(staging.with_suffix(".pub"), final.with_suffix(".pub"))
+        os.replace(staging, final)
+        final.chmod(0o600)
+        with self._lock:
+            self._stats.generated += 1
+        return final
+
+    def _refill_loop(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stopping.is_set() and self._needs_key():
+                try:
+                    self._add(self._generate())
+                except RuntimeError:
+                    break
+                if self._stopping.wait(self.config.refill_interval):
+                    return
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+class Overloaded(RuntimeError):
+    """Raised when a route sheds load; carries the HTTP status and Retry-After hint."""
+
+    def __init__(self, route: str, status_code: int, retry_after: float, reason: str):
+        super().__init__(f"{route}: {reason}")
+        self.route = route
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass(frozen=True)
+class RouteLimits:
+    """Concurrency, queue depth and deadline for one route."""
+
+    max_concurrency: int = 8
+    max_queue: int = 32
+    deadline: Optional[float] = 5.0
+    retry_after: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.max_queue < 0:
+            raise ValueError("max_queue must be non-negative")
+
+    @classmethod
+    def from_env(cls, prefix: str, defaults: Optional["RouteLimits"] = None) -> "RouteLimits":
+        """Read ``<prefix>_CONCURRENCY``, ``_QUEUE``, ``_DEADLINE`` and ``_RETRY_AFTER``."""
+        base = defaults or cls()
+        deadline = os.environ.get(f"{prefix}_DEADLINE")
+        return cls(
+            max_concurrency=int(os.environ.get(f"{prefix}_CONCURRENCY", base.max_concurrency)),
+            max_queue=int(os.environ.get(f"{prefix}_QUEUE", base.max_queue)),
+            deadline=base.deadline if deadline is None else (float(deadline) or None),
+            retry_after=float(os.environ.get(f"{prefix}_RETRY_AFTER", base.retry_after)),
+        )
+
+
+@dataclass
+class RouteStats:
+    active: int
+    queued: int
+    completed: int
+    rejected: int
+    timed_out: int
+
+
+class RouteLimiter:
+    """
+    Bounded admission for one route.
+
+    At most ``max_concurrency`` calls run at once and at most ``max_queue``
+    wait behind them; further callers are rejected immediately with 429.
+    Calls that cannot finish within ``deadline`` (queueing included) fail
+    with 503. Work is dispatched to ``executor`` so the event loop never blocks.
+    """
+
+    def __init__(self, name: str, limits: RouteLimits, executor: Optional[Executor] = None):
+        self.name = name
+        self.limits = limits
+        self.executor = executor
+        self._semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self._active = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    async def run(self, func: Callable[..., R], *args, **kwargs) -> R:
+        """Run ``func`` in the route executor under the route's limits."""
+        limits = self.limits
+        if self._semaphore.locked() and self._queued >= limits.max_queue:
+            self._rejected += 1
+            raise Overloaded(self.name, 429, limits.retry_after, "queue full")
+
+        loop = asyncio.get_running_loop()
+        expires = None if limits.deadline is None else loop.time() + limits.deadline
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), _remaining(loop, expires))
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise Overloaded(self.name, 503, limits.retry_after, "deadline exceeded while queued") from None
+        finally:
+            self._queued -= 1
+
+        self._active += 1
+        try:
+            future = loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the executor job really finishes, even when
+        # the caller has already been answered with a 503.
+        future.add_done_callback(self._on_done)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), _remaining(loop, expires))
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise Overloaded(self.name, 503, limits.retry_after, "deadline exceeded") from None
+        self._completed += 1
+        return result
+
+    def _on_done(self, future: "asyncio.Future") -> None:
+        if not future.cancelled():
+            future.exception()
+        self._release()
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> RouteStats:
+        return RouteStats(
+            active=self._active,
+            queued=self._queued,
+            completed=self._completed,
+            rejected=self._rejected,
+            timed_out=self._timed_out,
+        )
+
+
+class ServingPools:
+    """Separate bounded executors for CPU-bound and blocking I/O work."""
+
+    def __init__(self, cpu_workers: Optional[int] = None, blocking_workers: int = 4):
+        self.cpu = ThreadPoolExecutor(max_workers=cpu_workers or os.cpu_count() or 1, thread_name_prefix="mtt-cpu")
+        self.blocking = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix="mtt-io")
+        self.routes: Dict[str, RouteLimiter] = {}
+
+    def cpu_route(self, name: str, limits: RouteLimits) -> RouteLimiter:
+        return self._register(RouteLimiter(name, limits, self.cpu))
+
+    def blocking_route(self, name: str, limits: RouteLimits) -> RouteLimiter:
+        return self._register(RouteLimiter(name, limits, self.blocking))
+
+    def _register(self, limiter: RouteLimiter) -> RouteLimiter:
+        self.routes[limiter.name] = limiter
+        return limiter
+
+    def shutdown(self) -> None:
+        self.cpu.shutdown(wait=False, cancel_futures=True)
+        self.blocking.shutdown(wait=False, cancel_futures=True)
+
+
+def _remaining(loop: asyncio.AbstractEventLoop, expires: Optional[float]) -> Optional[float]:
+    if expires is None:
+        return None
+    return max(0.0, expires - loop.time())
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union, cast
+
+from .distiller import DistilledPrompt
+from .encoder import EncodedResult
+from .tokenizer import Tokenizer, WhitespaceTokenizer
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-millisecond distill calls up to slow ssh-keygen runs.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATIO_BUCKETS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+_NAME = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+_LABEL = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+
+Callback = Callable[[], Union[float, Mapping[Tuple[str, ...], float]]]
+_MetricT = TypeVar("_MetricT", bound="_Metric")
+
+
+class _Shards:
+    """
+    Per-thread accumulator cells.
+
+    Each thread only ever writes its own cell, so recording takes no lock
+    and loses no updates; readers sum every cell. The lock is taken once
+    per thread, when its cell is created, and by readers copying the list.
+    """
+
+    __slots__ = ("local", "_cells", "_lock", "_width")
+
+    def __init__(self, width: int) -> None:
+        # Hot paths read ``local.cell`` directly and fall back to ``cell()``.
+        self.local = threading.local()
+        self._cells: List[List[float]] = []
+        self._lock = threading.Lock()
+        self._width = width
+
+    def cell(self) -> List[float]:
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = self.local.cell = [0] * self._width
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells)
+        if not cells:
+            return [0] * self._width
+        return [sum(column) for column in zip(*cells)]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, name: str, help: str, label_names: Sequence[str] = (), function: Optional[Callback] = None
+    ) -> None:
+        if not _NAME.fullmatch(name):
+            raise ValueError(f"Invalid metric name {name!r}")
+        for label in label_names:
+            if not _LABEL.fullmatch(label) or label.startswith("__"):
+                raise ValueError(f"Invalid label name {label!r}")
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.function = function
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self: _MetricT, *values: str) -> _MetricT:
+        """The child series for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._child()
+        # Children are built by ``_child``, so they share their parent's type.
+        return cast(_MetricT, child)
+
+    def series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        """``(label values, value)`` for every series, callbacks included."""
+        if self.function is not None:
+            value = self.function()
+            if isinstance(value, Mapping):
+                return sorted((tuple(labels), value) for labels, value in value.items())
+            return [((), value)]
+        if self.label_names:
+            with self._lock:
+                children = sorted(self._children.items())
+            return [(labels, child.value) for labels, child in children]
+        return [((), self.value)]
+
+    @property
+    def value(self) -> Any:
+        raise NotImplementedError
+
+    def _child(self: _MetricT) -> _MetricT:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic total; ``inc`` is lock-free (see ``_Shards``)."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, help: str, label_names: Sequence[str] = (), function: Optional[Callback] = None
+    ) -> None:
+        super().__init__(name, help, label_names, function)
+        self._shards = _Shards(1)
+        self._local = self._shards.local
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            self._shards.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+    def _child(self) -> "Counter":
+        return Counter(self.name, self.help)
+
+
+class Gauge(_Metric):
+    """Point-in-time value, set directly or read from ``function`` at collection."""
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help: str, label_names: Sequence[str] = (), function: Optional[Callback] = None
+    ) -> None:
+        super().__init__(name, help, label_names, function)
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def _child(self) -> "Gauge":
+        return Gauge(self.name, self.help)
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram.
+
+    ``observe`` bisects the bucket bounds and bumps two slots of the calling
+    thread's cell: the bucket count and the running sum. Bucket counts are
+    made cumulative only when read.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, label_names)
+        bounds = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+        if not bounds:
+            raise ValueError("Histograms need at least one finite bucket")
+        self.buckets = bounds
+        # One slot per bound, one for +Inf, then the sum.
+        self._shards = _Shards(len(bounds) + 2)
+        self._local = self._shards.local
+
+    def observe(self, value: float) -> None:
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._shards.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+    @property
+    def value(self) -> Dict[str, Any]:
+        totals = self._shards.totals()
+        cumulative: Dict[str, float] = {}
+        running: float = 0
+        for bound, count in zip((*self.buckets, math.inf), totals):
+            running += count
+            cumulative[_format_value(bound)] = running
+        return {"count": running, "sum": totals[-1], "buckets": cumulative}
+
+    def _child(self) -> "Histogram":
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class _NullMetric:
+    """Stand-in handed out by a disabled registry; every call is a no-op."""
+
+    kind = "null"
+    value = 0.0
+
+    def labels(self, *_values: str) -> "_NullMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self) -> "_NullMetric":
+        return self
+
+    def __enter__(self) -> "_NullMetric":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        pass
+
+
+_NULL = _NullMetric()
+
+
+class MetricsRegistry:
+    """
+    Named metrics with Prometheus text exposition (``render``) and a
+    plain-dict view for in-process use (``snapshot``).
+
+    Registering a name again returns the existing metric when the kind
+    matches. A registry built with ``enabled=False`` hands out no-op metrics,
+    so instrumented code needs no checks of its own.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), function: Optional[Callback] = None) -> Counter:
+        return self._register(Counter, name, help, labels, function=function)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), function: Optional[Callback] = None) -> Gauge:
+        return self._register(Gauge, name, help, labels, function=function)
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def __iter__(self) -> Iterator[_Metric]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return iter(metrics)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current values by metric name.
+
+        Unlabelled counters and gauges map to a number, histograms to
+        ``{"count", "sum", "buckets"}`` and labelled metrics to a dict keyed
+        by their Prometheus label string, e.g. ``'cache="distiller"'``.
+        """
+        snapshot: Dict[str, Any] = {}
+        for metric in self:
+            series = metric.series()
+            if metric.label_names or (series and series[0][0]):
+                snapshot[metric.name] = {_label_string(metric.label_names, labels): value for labels, value in series}
+            else:
+                snapshot[metric.name] = series[0][1] if series else 0
+        return snapshot
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        lines: List[str] = []
+        for metric in self:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.series():
+                label_text = _label_string(metric.label_names, labels)
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_braces(label_text)} {_format_value(value)}")
+                    continue
+                for bound, count in value["buckets"].items():
+                    bucket_labels = ",".join(filter(None, (label_text, f'le="{bound}"')))
+                    lines.append(f"{metric.name}_bucket{{{bucket_labels}}} {count}")
+                lines.append(f"{metric.name}_sum{_braces(label_text)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_braces(label_text)} {value['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _register(self, cls, name: str, help: str, labels: Sequence[str], **options):
+        if not self.enabled:
+            return _NULL
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if type(existing) is not cls or existing.label_names != tuple(labels):
+                    raise ValueError(f"Metric {name!r} is already registered as a different {existing.kind}")
+                return existing
+            metric = self._metrics[name] = cls(name, help, labels, **options)
+            return metric
+
+
+class ServiceMetrics:
+    """
+    The translator's standard instruments on one registry.
+
+    Stages report through ``distilled``, ``encoded`` and ``handshake``;
+    caches that keep their own hit/miss counts are read at collection time
+    via ``track_cache``. Token savings use ``tokenizer`` (whitespace words
+    by default), matching ``BenchmarkRunner``: payload tokens against prompt
+    tokens.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, tokenizer: Optional[Tokenizer] = None) -> None:
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.tokenizer = tokenizer or WhitespaceTokenizer()
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        registry = self.registry
+        self.distill_seconds = registry.histogram("mtt_distill_seconds", "Time to distill one prompt.", ["domain"])
+        self.encode_seconds = registry.histogram("mtt_encode_seconds", "Time to symbol-encode one distilled prompt.")
+        self.prompt_bytes = registry.counter("mtt_prompt_bytes_total", "UTF-8 bytes of raw prompts received.")
+        self.payload_bytes = registry.counter(
+            "mtt_payload_bytes_total", "UTF-8 bytes of encoded payloads and dictionaries sent."
+        )
+        self.savings_ratio = registry.histogram(
+            "mtt_token_savings_ratio", "1 - payload tokens / prompt tokens, per encoded prompt.", buckets=RATIO_BUCKETS
+        )
+        self.segments = registry.counter(
+            "mtt_segments_total", "Prompt segments by outcome: graph, deduplicated or residual.", ["outcome"]
+        )
+        self.handshake_seconds = registry.histogram(
+            "mtt_handshake_seconds", "Time to complete a handshake.", ["outcome"]
+        )
+        self.keygen_seconds = registry.histogram(
+            "mtt_keygen_seconds", "Time a full handshake spent obtaining its keypair (pool hit or ssh-keygen)."
+        )
+        registry.counter("mtt_cache_hits_total", "Cache hits by cache.", ["cache"], function=self._cache_column(0))
+        registry.counter("mtt_cache_misses_total", "Cache misses by cache.", ["cache"], function=self._cache_column(1))
+        self._graph = self.segments.labels("graph")
+        self._deduplicated = self.segments.labels("deduplicated")
+        self._residual = self.segments.labels("residual")
+
+    def track_cache(self, name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+        """Report ``stats() -> (hits, misses)`` under ``cache=name``."""
+        self._caches[name] = stats
+
+    def distilled(self, domain: str, prompt: str, distilled: DistilledPrompt, seconds: float) -> None:
+        self.distill_seconds.labels(domain or "generic").observe(seconds)
+        self.prompt_bytes.inc(_utf8_length(prompt))
+        counts = distilled.metrics
+        self._graph.inc(counts.get("graph_size", 0))
+        self._deduplicated.inc(counts.get("segments_deduplicated", 0))
+        self._residual.inc(counts.get("residual_segments", 0))
+
+    def encoded(self, prompt: str, result: EncodedResult, seconds: float) -> None:
+        self.encode_seconds.observe(seconds)
+        dictionary = result.dictionary
+        self.payload_bytes.inc(_utf8_length("".join((result.payload, *dictionary, *dictionary.values()))))
+        count = self.tokenizer.count
+        baseline, compressed = count(prompt), count(result.payload)
+        if baseline:
+            self.savings_ratio.observe(1.0 - compressed / baseline)
+
+    def handshake(self, seconds: float, resumed: bool, keygen_seconds: Optional[float] = None) -> None:
+        self.handshake_seconds.labels("resumed" if resumed else "full").observe(seconds)
+        if keygen_seconds is not None:
+            self.keygen_seconds.observe(keygen_seconds)
+
+    def _cache_column(self, column: int) -> Callable[[], Dict[Tuple[str, ...], float]]:
+        def collect() -> Dict[Tuple[str, ...], float]:
+            return {(name,): stats()[column] for name, stats in list(self._caches.items())}
+
+        return collect
+
+
+def _utf8_length(text: str) -> int:
+    # ``isascii`` is a flag check in CPython, so ASCII text skips the encode copy.
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _label_string(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+
+
+def _braces(label_text: str) -> str:
+    return f"{{{label_text}}}" if label_text else ""
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
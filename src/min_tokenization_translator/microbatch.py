@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .limiter import Overloaded
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BatchRunner = Callable[[Callable[[List[T]], List[R]], List[T]], Awaitable[List[R]]]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesces concurrent single-item submissions into batches.
+
+    The first submission opens a window of ``max_delay`` seconds; the batch is
+    flushed when the window closes or ``max_batch`` items have arrived,
+    whichever comes first. ``process`` receives the items in submission order
+    and must return one result per item. ``runner`` dispatches the call, e.g.
+    ``RouteLimiter.run`` so batches share the route's executor and limits; by
+    default batches run in the loop's default executor.
+
+    At most ``max_pending`` items may be waiting or running at once; further
+    submissions fail immediately with ``Overloaded`` (429), so items are
+    admitted one by one even though batches count once against the runner.
+    When ``process`` raises, the batch is retried item by item in the same
+    call, so only the failing items see the exception.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[T]], List[R]],
+        max_batch: int = 32,
+        max_delay: float = 0.002,
+        runner: Optional[BatchRunner] = None,
+        max_pending: Optional[int] = None,
+        name: str = "batch",
+        retry_after: float = 1.0,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.process = process
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.runner = runner
+        self.max_pending = max_pending
+        self.name = name
+        self.retry_after = retry_after
+        self._pending: List[Tuple[T, "asyncio.Future[R]"]] = []
+        self._outstanding = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    @property
+    def outstanding(self) -> int:
+        """Items submitted and not yet answered."""
+        return self._outstanding
+
+    async def submit(self, item: T) -> R:
+        if self.max_pending is not None and self._outstanding >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(self.name, 429, self.retry_after, "batch queue full")
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[R]" = loop.create_future()
+        self._pending.append((item, future))
+        self._outstanding += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        try:
+            return await future
+        finally:
+            self._outstanding -= 1
+
+    async def stream(
+        self, items: Sequence[T], window: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Union[R, BaseException]]]:
+        """
+        Submit ``items`` and yield ``(index, result)`` pairs as they complete.
+
+        At most ``window`` items (default two batches, capped at
+        ``max_pending``) are in flight at once, so a large request cannot
+        monopolise the route's queue. A failed item yields its exception as
+        the result instead of aborting the stream.
+        """
+        limit = window or self.max_batch * 2
+        if self.max_pending is not None:
+            limit = min(limit, self.max_pending)
+        in_flight: Dict["asyncio.Future[R]", int] = {}
+        position = 0
+        while position < len(items) or in_flight:
+            while position < len(items) and len(in_flight) < limit:
+                in_flight[asyncio.ensure_future(self.submit(items[position]))] = position
+                position += 1
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for finished in sorted(done, key=in_flight.__getitem__):
+                index = in_flight.pop(finished)
+                error = finished.exception()
+                yield index, (error if error is not None else finished.result())
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            self.items += len(batch)
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[T, "asyncio.Future[R]"]]) -> None:
+        items = [item for item, _future in batch]
+        try:
+            if self.runner is not None:
+                results = await self.runner(self._process_isolated, items)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(None, self._process_isolated, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+        except Exception as exc:
+            # The batch as a whole was shed or broken: every item shares the error.
+            for _item, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_item, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, _Failed):
+                future.set_exception(result.error)
+            else:
+                future.set_result(result)
+
+    def _process_isolated(self, items: List[T]) -> List[Union[R, "_Failed"]]:
+        try:
+            return list(self.process(items))
+        except Exception as exc:
+            if len(items) == 1:
+                return [_Failed(exc)]
+        results: List[Union[R, _Failed]] = []
+        for item in items:
+            try:
+                results.extend(self.process([item]))
+            except Exception as exc:
+                results.append(_Failed(exc))
+        return results
+
+
+class _Failed:
+    """Per-item failure carried back from a batch."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
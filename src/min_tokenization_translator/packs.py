@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .costs import RESERVED_CHARACTERS
+from .frames import FRAME_MARKERS
+
+PACK_MAGIC = b"MTP1"
+PACK_VERSION = 1
+PACK_SUFFIX = ".mtp"
+
+# magic, version, reserved, entry count, name length
+_HEADER = struct.Struct(">4sHHII")
+_U32 = struct.Struct(">I")
+# Symbols holding these would be read as protocol syntax inside a payload.
+_UNSAFE_SYMBOL_CHARACTERS = frozenset(RESERVED_CHARACTERS | set(FRAME_MARKERS))
+
+
+def encode_pack(entries: Mapping[str, str], name: str = "") -> bytes:
+    """
+    Serialize a phrase→symbol mapping into the binary pack format.
+
+    Layout after the header and UTF-8 name: ``count + 1`` phrase offsets,
+    ``count + 1`` symbol offsets, ``count`` indices ordering entries by symbol,
+    then the phrase blob and the symbol blob. Entries are sorted by phrase
+    bytes, so equal mappings always produce identical bytes (and pack IDs)
+    and both directions can be binary searched straight from the mapping.
+    """
+    symbols_seen = set()
+    rows: List[Tuple[bytes, bytes]] = []
+    for phrase, symbol in entries.items():
+        if not phrase or not symbol:
+            raise ValueError("Pack phrases and symbols must be non-empty")
+        if symbol in symbols_seen:
+            raise ValueError(f"Symbol {symbol!r} is assigned to more than one phrase")
+        symbols_seen.add(symbol)
+        rows.append((phrase.encode("utf-8"), symbol.encode("utf-8")))
+    rows.sort()
+
+    name_bytes = name.encode("utf-8")
+    phrase_offsets = _offsets(phrase for phrase, _symbol in rows)
+    symbol_offsets = _offsets(symbol for _phrase, symbol in rows)
+    symbol_order = sorted(range(len(rows)), key=lambda index: rows[index][1])
+    parts = [_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(rows), len(name_bytes)), name_bytes]
+    parts.extend(_U32.pack(offset) for offset in phrase_offsets)
+    parts.extend(_U32.pack(offset) for offset in symbol_offsets)
+    parts.extend(_U32.pack(index) for index in symbol_order)
+    parts.extend(phrase for phrase, _symbol in rows)
+    parts.extend(symbol for _phrase, symbol in rows)
+    return b"".join(parts)
+
+
+def pack_id_for(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class Pack:
+    """
+    Read-only, memory-mapped view of one pack file.
+
+    Nothing is parsed up front: lookups binary search the mapped tables, so
+    every process mapping the same file shares its pages via the OS cache.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.pack_id = self.path.stem
+        with self.path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _reserved, count, name_length = _HEADER.unpack_from(self._map)
+        except struct.error as exc:
+            self._map.close()
+            raise ValueError(f"Truncated pack file: {self.path}") from exc
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a version {PACK_VERSION} pack file: {self.path}")
+        self._count = count
+        name_start = _HEADER.size
+        self.name = self._map[name_start : name_start + name_length].decode("utf-8")
+        self._phrase_offsets = name_start + name_length
+        self._symbol_offsets = self._phrase_offsets + (count + 1) * _U32.size
+        self._symbol_order = self._symbol_offsets + (count + 1) * _U32.size
+        self._phrase_blob = self._symbol_order + count * _U32.size
+        self._symbol_blob = self._phrase_blob + self._u32(self._phrase_offsets, count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, phrase: object) -> bool:
+        return isinstance(phrase, str) and self.symbol_for(phrase) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self._phrase(index).decode("utf-8")
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        for index in range(self._count):
+            yield self._phrase(index).decode("utf-8"), self._symbol(index).decode("utf-8")
+
+    def symbol_for(self, phrase: str) -> Optional[str]:
+        index = self._search(phrase.encode("utf-8"), self._phrase, lambda position: position)
+        return None if index is None else self._symbol(index).decode("utf-8")
+
+    def phrase_for(self, symbol: str) -> Optional[str]:
+        index = self._search(symbol.encode("utf-8"), self._symbol, self._by_symbol)
+        return None if index is None else self._phrase(index).decode("utf-8")
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.items())
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "Pack":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _search(self, needle: bytes, read, order) -> Optional[int]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            index = order(middle)
+            value = read(index)
+            if value == needle:
+                return index
+            if value < needle:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _u32(self, table: int, index: int) -> int:
+        return _U32.unpack_from(self._map, table + index * _U32.size)[0]
+
+    def _by_symbol(self, position: int) -> int:
+        return self._u32(self._symbol_order, position)
+
+    def _phrase(self, index: int) -> bytes:
+        start = self._phrase_blob + self._u32(self._phrase_offsets, index)
+        end = self._phrase_blob + self._u32(self._phrase_offsets, index + 1)
+        return self._map[start:end]
+
+    def _symbol(self, index: int) -> bytes:
+        start = self._symbol_blob + self._u32(self._symbol_offsets, index)
+        end = self._symbol_blob + self._u32(self._symbol_offsets, index + 1)
+        return self._map[start:end]
+
+
+class PackRegistry:
+    """
+    Content-addressed pack store rooted at ``packs_dir``.
+
+    Each pack lives in ``<sha256>.mtp``; the in-memory index is built from
+    file names alone and packs are mapped on first use, so scanning a
+    directory of hundreds of packs costs one ``listdir``.
+    """
+
+    def __init__(self, packs_dir: Path) -> None:
+        self.packs_dir = Path(packs_dir)
+        self._index: Dict[str, Path] = {}
+        self._open: Dict[str, Pack] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        index: Dict[str, Path] = {}
+        if self.packs_dir.is_dir():
+            for entry in os.scandir(self.packs_dir):
+                if entry.name.endswith(PACK_SUFFIX) and entry.is_file():
+                    index[entry.name[: -len(PACK_SUFFIX)]] = Path(entry.path)
+        self._index = index
+
+    def __contains__(self, pack_id: object) -> bool:
+        return pack_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def pack_ids(self) -> List[str]:
+        return sorted(self._index)
+
+    def add(self, entries: Mapping[str, str], name: str = "") -> str:
+        """Store a pack and return its ID; storing identical content again is a no-op."""
+        return self._store(encode_pack(entries, name))
+
+    def _store(self, data: bytes) -> str:
+        pack_id = pack_id_for(data)
+        if pack_id not in self._index:
+            self.packs_dir.mkdir(parents=True, exist_ok=True)
+            path = self.packs_dir / f"{pack_id}{PACK_SUFFIX}"
+            staging = self.packs_dir / f".{pack_id}.{os.getpid()}.tmp"
+            staging.write_bytes(data)
+            os.replace(staging, path)
+            self._index[pack_id] = path
+        return pack_id
+
+    def get(self, pack_id: str) -> Pack:
+        pack = self._open.get(pack_id)
+        if pack is None:
+            path = self._index.get(pack_id)
+            if path is None:
+                raise KeyError(pack_id)
+            pack = self._open[pack_id] = Pack(path)
+        return pack
+
+    def resolve(self, prefix: str) -> str:
+        """Expand an abbreviated pack ID."""
+        matches = [pack_id for pack_id in self._index if pack_id.startswith(prefix)]
+        if not matches:
+            raise KeyError(prefix)
+        if len(matches) > 1:
+            raise ValueError(f"Pack ID prefix {prefix!r} is ambiguous")
+        return matches[0]
+
+    def preload(self, pack_ids: Iterable[str], reserved: Iterable[str] = ()) -> Dict[str, str]:
+        """
+        Merge the ``phrase -> symbol`` entries of ``pack_ids`` for ``SymbolEncoder``/``SymbolDecoder`` preload.
+
+        Packs are applied in the given order and the first claim on a phrase
+        or symbol wins. Entries are skipped when their symbol holds protocol
+        characters, or equals or shares a prefix with an accepted symbol or
+        one of ``reserved`` (e.g. the core dictionary's), so the merged set
+        stays prefix-free and every peer merging the same IDs gets the same
+        result. Unknown pack IDs raise ``KeyError``.
+        """
+        taken = set(reserved)
+        prefixes = {symbol[:end] for symbol in taken for end in range(1, len(symbol) + 1)}
+        merged: Dict[str, str] = {}
+        for pack_id in pack_ids:
+            for phrase, symbol in self.get(pack_id).items():
+                if phrase in merged or symbol in prefixes or _UNSAFE_SYMBOL_CHARACTERS.intersection(symbol):
+                    continue
+                if any(symbol[:end] in taken for end in range(1, len(symbol))):
+                    continue
+                merged[phrase] = symbol
+                taken.add(symbol)
+                prefixes.update(symbol[:end] for end in range(1, len(symbol) + 1))
+        return merged
+
+    def verify(self, pack_id: str) -> bool:
+        """Check that the stored bytes still hash to ``pack_id``."""
+        return pack_id_for(self._index[pack_id].read_bytes()) == pack_id
+
+    def remove(self, pack_id: str) -> None:
+        pack = self._open.pop(pack_id, None)
+        if pack is not None:
+            pack.close()
+        path = self._index.pop(pack_id)
+        path.unlink(missing_ok=True)
+
+    def export_manifest(self, pack_id: str) -> Dict[str, object]:
+        pack = self.get(pack_id)
+        return {"id": pack_id, "name": pack.name, "entries": pack.to_dict()}
+
+    def import_manifest(self, manifest: Mapping[str, object]) -> str:
+        """Add a pack from an exported manifest, checking its ID when present."""
+        entries = manifest.get("entries")
+        if not isinstance(entries, Mapping):
+            raise ValueError("Pack manifest is missing an 'entries' mapping")
+        data = encode_pack(entries, str(manifest.get("name", "")))
+        expected = manifest.get("id")
+        if expected and expected != pack_id_for(data):
+            raise ValueError(f"Pack manifest ID {expected} does not match content hash {pack_id_for(data)}")
+        return self._store(data)
+
+    def load_manifest_file(self, path: Path) -> str:
+        return self.import_manifest(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def close(self) -> None:
+        for pack in self._open.values():
+            pack.close()
+        self._open.clear()
+
+
+def _offsets(blobs) -> List[int]:
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return offsets
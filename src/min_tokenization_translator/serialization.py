@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import lzma
+import struct
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .config import FeatureFlags
+from .distiller import DistilledPrompt
+from .graph import CompactGraph
+
+SERIALIZED_MAGIC = b"MS"
+SERIALIZED_VERSION = 1
+SERIALIZED_MEDIA_TYPE = "application/x-mtt-distilled"
+SERIALIZED_STREAM_MEDIA_TYPE = "application/x-mtt-distilled-stream"
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+_CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+_HEADER = struct.Struct(">2sBB")
+
+# Blobs shorter than this rarely shrink under zlib, so "auto" does not try.
+_AUTO_MIN_SIZE = 128
+
+FRAME_OK = 0
+FRAME_ERROR = 1
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def serialize_prompt(prompt: DistilledPrompt, compression: str = "auto", level: int = 6) -> bytes:
+    """
+    Pack ``prompt`` into the binary ``MS`` format.
+
+    Every distinct string is stored once in a string table; the graph,
+    lexicon and metrics refer to it by varint index. ``compression`` is
+    ``none``, ``zlib``, ``lzma`` or ``auto`` (zlib, kept only when smaller).
+    Text that cannot be encoded as UTF-8, such as a lone surrogate, raises
+    ``ValueError``.
+    """
+    body = _encode_body(prompt)
+    if compression == "auto":
+        codec = CODEC_NONE
+        if len(body) >= _AUTO_MIN_SIZE:
+            packed = zlib.compress(body, level)
+            if len(packed) < len(body):
+                codec, body = CODEC_ZLIB, packed
+    else:
+        codec = _CODECS.get(compression, -1)
+        if codec < 0:
+            raise ValueError(f"Unknown compression {compression!r}")
+        if codec == CODEC_ZLIB:
+            body = zlib.compress(body, level)
+        elif codec == CODEC_LZMA:
+            body = lzma.compress(body, preset=min(max(level, 0), 9))
+    return _HEADER.pack(SERIALIZED_MAGIC, SERIALIZED_VERSION, codec) + body
+
+
+def deserialize_prompt(data: Buffer) -> DistilledPrompt:
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError("Serialized prompt is truncated")
+    magic, version, codec = _HEADER.unpack_from(view)
+    if magic != SERIALIZED_MAGIC:
+        raise ValueError("Not a serialized prompt")
+    if version != SERIALIZED_VERSION:
+        raise ValueError(f"Unsupported serialized prompt version {version}")
+    body = view[_HEADER.size :]
+    try:
+        if codec == CODEC_ZLIB:
+            body = memoryview(zlib.decompress(body))
+        elif codec == CODEC_LZMA:
+            body = memoryview(lzma.decompress(body))
+        elif codec != CODEC_NONE:
+            raise ValueError(f"Unknown serialization codec {codec}")
+    except (zlib.error, lzma.LZMAError) as exc:
+        raise ValueError("Corrupt serialized prompt") from exc
+    return _decode_body(body)
+
+
+def wants_serialization(flags: Optional[FeatureFlags]) -> bool:
+    return bool(flags and flags.requires_serialization())
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """Append ``value`` (non-negative) as a LEB128 varint."""
+    if value < 0:
+        raise ValueError("varints must be non-negative")
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: Buffer, offset: int) -> Tuple[int, int]:
+    """Read a varint at ``offset``; return ``(value, next_offset)``."""
+    result = 0
+    shift = 0
+    try:
+        while True:
+            byte = data[offset]
+            offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, offset
+            shift += 7
+    except IndexError as exc:
+        raise ValueError("Truncated varint") from exc
+
+
+@dataclass
+class StreamFrame:
+    index: int
+    ok: bool
+    data: bytes
+
+    def prompt(self) -> DistilledPrompt:
+        if not self.ok:
+            raise ValueError(self.data.decode("utf-8"))
+        return deserialize_prompt(self.data)
+
+
+def write_frame(index: int, blob: bytes, ok: bool = True) -> bytes:
+    """One streamed result: varint index, status byte, varint length, then the blob or error text."""
+    out = bytearray()
+    encode_varint(index, out)
+    out.append(FRAME_OK if ok else FRAME_ERROR)
+    encode_varint(len(blob), out)
+    out += blob
+    return bytes(out)
+
+
+def read_frames(data: Buffer) -> Iterator[StreamFrame]:
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        index, offset = decode_varint(view, offset)
+        if offset >= len(view):
+            raise ValueError("Truncated stream frame")
+        status = view[offset]
+        length, offset = decode_varint(view, offset + 1)
+        if offset + length > len(view):
+            raise ValueError("Truncated stream frame")
+        yield StreamFrame(index, status == FRAME_OK, bytes(view[offset : offset + length]))
+        offset += length
+
+
+def encode_varints(values: List[int]) -> bytes:
+    """Encode ``values`` as back-to-back varints."""
+    if not values or max(values) < 0x80 and min(values) >= 0:
+        return bytes(values)
+    out = bytearray()
+    for value in values:
+        encode_varint(value, out)
+    return bytes(out)
+
+
+def decode_varints(data: Buffer) -> List[int]:
+    """Decode a run of back-to-back varints."""
+    view = memoryview(data)
+    if not view:
+        return []
+    if max(view) < 0x80:
+        # Every value fits in one byte: the run is already the answer.
+        return list(view)
+    values: List[int] = []
+    append = values.append
+    result = shift = 0
+    for byte in view:
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            append(result)
+            result = shift = 0
+        else:
+            shift += 7
+    if shift:
+        raise ValueError("Truncated varint")
+    return values
+
+
+class _StringTable:
+    __slots__ = ("indices", "strings")
+
+    def __init__(self) -> None:
+        self.indices: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def ref(self, value: str) -> int:
+        index = self.indices.get(value)
+        if index is None:
+            index = self.indices[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _encode_body(prompt: DistilledPrompt) -> bytes:
+    """
+    Body layout: varint byte length of the integer run, the run itself, then
+    the string table as one UTF-8 blob.
+
+    The run holds the string count and character lengths, then the graph's
+    columns (its shapes as key references, a shape column and a value
+    column), then the residual note, lexicon and metrics as string indices
+    and counts. The graph's own string table leads the shared one, so its
+    value column is written unchanged and decoding is one bulk varint pass
+    plus one UTF-8 decode.
+    """
+    graph = prompt.graph
+    table = _StringTable()
+    table.strings = list(graph.strings)
+    table.indices = {value: index for index, value in enumerate(table.strings)}
+    ref = table.ref
+    refs: List[int] = [len(graph.strings), len(graph.shape_table)]
+    append = refs.append
+    for keys in graph.shape_table:
+        append(len(keys))
+        refs.extend(ref(key) for key in keys)
+    append(len(graph))
+    refs.extend(graph.shapes)
+    refs.extend(graph.values)
+    append(ref(prompt.residual_note))
+    append(len(prompt.lexicon))
+    for canonical, original in prompt.lexicon.items():
+        append(ref(canonical))
+        append(ref(original))
+    append(len(prompt.metrics))
+    for name, value in prompt.metrics.items():
+        append(ref(name))
+        # Zigzag, so negative counters stay small.
+        append(~(value << 1) if value < 0 else value << 1)
+
+    values = [len(table.strings), *map(len, table.strings), *refs]
+    run = encode_varints(values)
+    out = bytearray()
+    encode_varint(len(run), out)
+    out += run
+    try:
+        out += "".join(table.strings).encode("utf-8")
+    except UnicodeEncodeError as exc:
+        bad = exc.object[exc.start : exc.end]
+        raise ValueError(f"Prompt text is not valid Unicode: {exc.reason} at {bad!r}") from exc
+    return bytes(out)
+
+
+def _decode_body(body: memoryview) -> DistilledPrompt:
+    run_length, offset = decode_varint(body, 0)
+    if offset + run_length > len(body):
+        raise ValueError("Truncated serialized prompt")
+    values = decode_varints(body[offset : offset + run_length])
+    try:
+        text = str(body[offset + run_length :], "utf-8")
+    except UnicodeDecodeError as exc:
+        raise ValueError("Serialized prompt holds invalid UTF-8") from exc
+    remaining = iter(values)
+    take = remaining.__next__
+    try:
+        strings: List[str] = []
+        position = 0
+        for _ in range(take()):
+            end = position + take()
+            strings.append(text[position:end])
+            position = end
+        if position != len(text):
+            raise ValueError("String table does not match its lengths")
+
+        graph_strings = take()
+        shapes = [tuple(strings[take()] for _ in range(take())) for _ in range(take())]
+        entries = list(islice(remaining, take()))
+        if entries and max(entries) >= len(shapes):
+            raise ValueError("Serialized prompt references a missing shape")
+        width = sum(len(shapes[shape]) for shape in entries)
+        graph = CompactGraph.from_columns(strings[:graph_strings], shapes, entries, islice(remaining, width))
+        residual_note = strings[take()]
+        lexicon = {strings[take()]: strings[take()] for _ in range(take())}
+        metrics: Dict[str, int] = {}
+        for _ in range(take()):
+            name = strings[take()]
+            value = take()
+            metrics[name] = (value >> 1) ^ -(value & 1)
+    except StopIteration as exc:
+        raise ValueError("Truncated serialized prompt") from exc
+    except IndexError as exc:
+        raise ValueError("Serialized prompt references a missing string") from exc
+    if next(remaining, None) is not None:
+        raise ValueError("Trailing data after serialized prompt")
+    return DistilledPrompt(graph=graph, residual_note=residual_note, lexicon=lexicon, metrics=metrics)
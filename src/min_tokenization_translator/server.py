@@ -1,17 +1,49 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Optional
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     from fastapi import FastAPI, HTTPException
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
     from pydantic import BaseModel
 except ImportError as exc:  # pragma: no cover - optional dependency
     raise RuntimeError("FastAPI and Pydantic are required for server deployment.") from exc
 
 from .bootstrap import BootstrapConfig, bootstrap_environment
 from .config import FeatureFlags
-from .distiller import PromptDistiller
+from .costs import SymbolCostTable, load_cost_table
+from .decoder import DecodedPayload, SymbolDecoder
+from .distiller import DistilledPrompt, PromptDistiller
+from .domains import DomainRegistry
+from .encoder import EncodedResult, SymbolEncoder
+from .handshake import ticket_key_disposer
+from .keypool import KeyPool, KeyPoolConfig
+from .limiter import Overloaded, RouteLimits, ServingPools
+from .metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry, ServiceMetrics
+from .microbatch import MicroBatcher
+from .packs import PackRegistry
+from .serialization import (
+    SERIALIZED_MEDIA_TYPE,
+    SERIALIZED_STREAM_MEDIA_TYPE,
+    serialize_prompt,
+    wants_serialization,
+    write_frame,
+)
+from .session_store import SessionState, SessionStore, build_session_store
+from .substitution import PhraseAutomaton, load_automaton
+from .tickets import TicketCache
+
+
+DistillItem = Tuple[PromptDistiller, str, Optional[Dict[str, str]]]
+CompressItem = Tuple[PromptDistiller, str, Optional[Dict[str, str]], Optional[str], Optional[SymbolCostTable]]
 
 
 class HandshakeRequest(BaseModel):
@@ -23,29 +55,155 @@ class HandshakeRequest(BaseModel):
     enable_checksums: bool = True
     enable_mcp_tooling: bool = False
     tokenizer: Optional[str] = None
+    ticket: Optional[str] = None
+    domain: Optional[str] = None
 
 
 class HandshakeResponse(BaseModel):
     handshake_packet: str
     feature_flags: Dict[str, bool]
+    ticket: Optional[str] = None
+    resumed: bool = False
+    session_id: Optional[str] = None
 
 
 class DistillRequest(BaseModel):
     prompt: str
     context: Optional[Dict[str, str]] = None
+    features: Optional[str] = None
+    domain: Optional[str] = None
 
 
 class DistillResponse(BaseModel):
     graph: list[Dict[str, str]]
     residual_note: str
+    metrics: Dict[str, int] = {}
+
+
+class DistillBatchRequest(BaseModel):
+    prompts: list[str]
+    contexts: Optional[list[Optional[Dict[str, str]]]] = None
+    features: Optional[str] = None
+    domain: Optional[str] = None
+
+
+class CompressRequest(BaseModel):
+    prompt: str
+    context: Optional[Dict[str, str]] = None
+    features: Optional[str] = None
+    session_id: Optional[str] = None
+    domain: Optional[str] = None
+    tokenizer: Optional[str] = None
+
+
+class CompressResponse(BaseModel):
+    payload: str
+    dictionary: Dict[str, str]
+    feature_header: str = ""
+    retired: list[str] = []
+
+
+class DecodeRequest(BaseModel):
+    payload: str
+    dictionary: Dict[str, str]
+    retired: list[str] = []
+    session_id: Optional[str] = None
+
+
+class DecodeResponse(BaseModel):
+    fields: list[list[str]]
+    feature_header: str = ""
+    feature_flags: Optional[Dict[str, bool]] = None
 
 
 def create_app() -> "FastAPI":
-    app = FastAPI(title="Min Tokenization Translator Host", version="0.1.0")
-    distiller = PromptDistiller()
+    domains = DomainRegistry(
+        cache_dir=_optional_path("MTT_DOMAIN_CACHE_DIR"), default=os.environ.get("MTT_DEFAULT_DOMAIN") or None
+    )
+    cost_dirs = [Path(path) for path in os.environ.get("MTT_COST_DIRS", "").split(os.pathsep) if path]
+    metrics = ServiceMetrics(MetricsRegistry(enabled=_env_flag("MTT_METRICS_ENABLED", True)))
+    metrics.track_cache("canonical", lambda: _sum_stats(distiller.cache_stats() for distiller in domains.active()))
+    key_pool = build_key_pool()
+    if key_pool is not None:
+        metrics.track_cache("key_pool", lambda: _key_pool_stats(key_pool))
+    session_ttl = float(os.environ.get("MTT_SESSION_TTL", "3600"))
+    # A ticket holds its session's keypair on disk, so it never outlives the session TTL.
+    ticket_cache = TicketCache(
+        lifetime=min(float(os.environ.get("MTT_TICKET_LIFETIME", "600")), session_ttl),
+        max_entries=int(os.environ.get("MTT_TICKET_CACHE_SIZE", "4096")),
+        on_evict=ticket_key_disposer(key_pool),
+    )
+
+    pools = build_serving_pools()
+    handshake_route = pools.blocking_route(
+        "handshake", RouteLimits.from_env("MTT_HANDSHAKE", RouteLimits(max_concurrency=4, max_queue=16, deadline=10.0))
+    )
+    distill_limits = RouteLimits.from_env("MTT_DISTILL")
+    distill_route = pools.cpu_route("distill", distill_limits)
+    max_batch = int(os.environ.get("MTT_BATCH_MAX_SIZE", "32"))
+    max_delay = float(os.environ.get("MTT_BATCH_MAX_DELAY_MS", "2")) / 1000.0
+    # Batched items are admitted one by one, against the same request capacity as the route itself.
+    max_pending = int(
+        os.environ.get("MTT_BATCH_MAX_PENDING", distill_limits.max_concurrency + distill_limits.max_queue)
+    )
+    distill_batcher: MicroBatcher[DistillItem, DistilledPrompt] = MicroBatcher(
+        partial(_distill_batch, metrics=metrics),
+        max_batch,
+        max_delay,
+        runner=distill_route.run,
+        max_pending=max_pending,
+        name="distill",
+        retry_after=distill_limits.retry_after,
+    )
+    core_path = os.environ.get("MTT_CORE_DICTIONARY")
+    core = load_automaton(Path(core_path), _optional_path("MTT_CORE_CACHE_DIR")) if core_path else None
+    compress_batcher: MicroBatcher[CompressItem, EncodedResult] = MicroBatcher(
+        partial(_compress_batch, core=core, metrics=metrics),
+        max_batch,
+        max_delay,
+        runner=distill_route.run,
+        max_pending=max_pending,
+        name="compress",
+        retry_after=distill_limits.retry_after,
+    )
+    decoder = SymbolDecoder(core=core)
+    pack_preloads = _PackPreloads(PackRegistry(request_workspace_dir() / "packs"), core)
+    session_store = build_session_store(os.environ.get("MTT_SESSION_STORE", "memory://"), ttl=session_ttl)
+
+    @asynccontextmanager
+    async def lifespan(_app: "FastAPI") -> AsyncIterator[None]:
+        if key_pool is not None:
+            key_pool.start()
+        try:
+            yield
+        finally:
+            if key_pool is not None:
+                key_pool.stop()
+            pools.shutdown()
+            session_store.close()
+            ticket_cache.clear()
+            pack_preloads.registry.close()
+
+    app = FastAPI(title="Min Tokenization Translator Host", version="0.1.0", lifespan=lifespan)
+    app.state.metrics = metrics
+
+    @app.exception_handler(Overloaded)
+    async def overloaded(_request, exc: Overloaded) -> JSONResponse:
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": str(exc)},
+            headers={"Retry-After": exc.retry_after_header},
+        )
 
     @app.post("/handshake", response_model=HandshakeResponse)
-    def handshake(request: HandshakeRequest) -> HandshakeResponse:
+    async def handshake(request: HandshakeRequest) -> HandshakeResponse:
+        return await handshake_route.run(_handshake, request)
+
+    def _handshake(request: HandshakeRequest) -> HandshakeResponse:
+        started = time.perf_counter()
+        if request.domain:
+            _domain_distiller(domains, request.domain)
+        cost_table = _cost_table(request.tokenizer, cost_dirs) if request.tokenizer else None
         config = BootstrapConfig(
             workspace_dir=request_workspace_dir(),
             packs_dir=request_workspace_dir() / "packs",
@@ -57,21 +215,371 @@ def create_app() -> "FastAPI":
             enable_checksums=request.enable_checksums,
             enable_mcp_tooling=request.enable_mcp_tooling,
             override_tokenizer_fingerprint=request.tokenizer,
+            key_pool=key_pool,
+            ticket_cache=ticket_cache,
+            resumption_ticket=request.ticket,
         )
         result = bootstrap_environment(config)
+        if cost_table is None:
+            cost_table = _cost_table(result.tokenizer_fingerprint, cost_dirs)
+        session_id = secrets.token_urlsafe(16)
+        pack_ids = result.pack_registry.pack_ids() if result.pack_registry is not None else []
+        session_store.put(
+            SessionState(
+                session_id,
+                result.feature_flags.as_payload(),
+                pack_ids=pack_ids,
+                domain=request.domain or "",
+                tokenizer=result.tokenizer_fingerprint,
+                cost_table=None if cost_table == SymbolCostTable(cost_table.fingerprint) else cost_table,
+            )
+        )
+        metrics.handshake(
+            time.perf_counter() - started, result.resumed, None if result.resumed else result.keygen_seconds
+        )
         return HandshakeResponse(
             handshake_packet=result.handshake_packet,
             feature_flags=result.feature_flags.summary(),
+            ticket=result.resumption_ticket,
+            resumed=result.resumed,
+            session_id=session_id,
         )
 
     @app.post("/distill", response_model=DistillResponse)
-    def distill(request: DistillRequest) -> DistillResponse:
-        distilled = distiller.distill(request.prompt, context=request.context)
-        return DistillResponse(graph=distilled.graph, residual_note=distilled.residual_note)
+    async def distill(request: DistillRequest):
+        serialized = _negotiated_serialization(request.features)
+        distiller = _domain_distiller(domains, request.domain)
+        distilled = await distill_batcher.submit((distiller, request.prompt, request.context))
+        if serialized:
+            try:
+                content = serialize_prompt(distilled)
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc)) from exc
+            return Response(content=content, media_type=SERIALIZED_MEDIA_TYPE)
+        return DistillResponse(
+            graph=list(distilled.graph), residual_note=distilled.residual_note, metrics=distilled.metrics
+        )
+
+    @app.post("/distill/batch")
+    async def distill_batch(request: DistillBatchRequest) -> StreamingResponse:
+        contexts = request.contexts or [None] * len(request.prompts)
+        if len(contexts) != len(request.prompts):
+            raise HTTPException(status_code=422, detail="contexts must align with prompts")
+        distiller = _domain_distiller(domains, request.domain)
+        items = [(distiller, prompt, context) for prompt, context in zip(request.prompts, contexts)]
+
+        if _negotiated_serialization(request.features):
+
+            async def frames() -> AsyncIterator[bytes]:
+                async for index, outcome in distill_batcher.stream(items):
+                    if not isinstance(outcome, BaseException):
+                        try:
+                            frame = write_frame(index, serialize_prompt(outcome))
+                        except ValueError as exc:
+                            outcome = exc
+                        else:
+                            yield frame
+                            continue
+                    yield write_frame(index, str(outcome).encode("utf-8", "backslashreplace"), ok=False)
+
+            return StreamingResponse(frames(), media_type=SERIALIZED_STREAM_MEDIA_TYPE)
+
+        async def lines() -> AsyncIterator[str]:
+            async for index, outcome in distill_batcher.stream(items):
+                if isinstance(outcome, BaseException):
+                    record = {"index": index, "error": str(outcome)}
+                else:
+                    record = {
+                        "index": index,
+                        "graph": list(outcome.graph),
+                        "residual_note": outcome.residual_note,
+                        "metrics": outcome.metrics,
+                    }
+                yield json.dumps(record, separators=(",", ":")) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/compress", response_model=CompressResponse)
+    async def compress(request: CompressRequest) -> CompressResponse:
+        _negotiated_serialization(request.features)
+        if request.session_id is not None:
+            result = await distill_route.run(
+                _compress_in_session,
+                domains,
+                session_store,
+                request.session_id,
+                request,
+                core,
+                pack_preloads,
+                metrics,
+            )
+        else:
+            distiller = _domain_distiller(domains, request.domain)
+            cost_table = _cost_table(request.tokenizer, cost_dirs) if request.tokenizer else None
+            result = await compress_batcher.submit(
+                (distiller, request.prompt, request.context, request.features, cost_table)
+            )
+        return CompressResponse(
+            payload=result.payload,
+            dictionary=result.dictionary,
+            feature_header=result.feature_header,
+            retired=result.retired,
+        )
+
+    @app.post("/decode", response_model=DecodeResponse)
+    async def decode(request: DecodeRequest) -> DecodeResponse:
+        if request.session_id is None and request.retired:
+            raise HTTPException(
+                status_code=422, detail="Payload retires session symbols; decode it with its session_id"
+            )
+        try:
+            if request.session_id is not None:
+                decoded = await distill_route.run(
+                    _decode_in_session, session_store, request.session_id, request, core, pack_preloads
+                )
+            else:
+                decoded = await distill_route.run(decoder.decode, request.payload, request.dictionary)
+        except ValueError as exc:
+            # Session payloads only carry each turn's new symbols and reference earlier frames.
+            hint = "" if request.session_id is not None else "; send payloads from a session with its session_id"
+            raise HTTPException(status_code=422, detail=f"{exc}{hint}") from exc
+        return DecodeResponse(
+            fields=decoded.fields,
+            feature_header=decoded.feature_header,
+            feature_flags=decoded.feature_flags.summary() if decoded.feature_flags is not None else None,
+        )
+
+    if metrics.registry.enabled:
+
+        @app.get("/metrics")
+        def prometheus_metrics() -> Response:
+            return Response(content=metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
     return app
 
 
+def _distill_batch(items: List[DistillItem], metrics: ServiceMetrics) -> List[DistilledPrompt]:
+    """Distill a micro-batch in submission order, each item with its domain's distiller."""
+    results = []
+    for distiller, prompt, context in items:
+        started = time.perf_counter()
+        distilled = distiller.distill(prompt, context)
+        metrics.distilled(distiller.domain, prompt, distilled, time.perf_counter() - started)
+        results.append(distilled)
+    return results
+
+
+def _domain_distiller(domains: DomainRegistry, name: Optional[str]) -> PromptDistiller:
+    try:
+        return domains.distiller(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _compress_batch(
+    items: List[CompressItem],
+    core: Optional[PhraseAutomaton],
+    metrics: ServiceMetrics,
+) -> List[EncodedResult]:
+    distilled = _distill_batch(
+        [(distiller, prompt, context) for distiller, prompt, context, _features, _costs in items], metrics
+    )
+    # Encoders keep per-call state, so each batch uses its own, one per feature set and cost table.
+    encoders: Dict[Tuple[Optional[str], Optional[str]], SymbolEncoder] = {}
+    results = []
+    for prompt, (_distiller, raw_prompt, _context, features, cost_table) in zip(distilled, items):
+        key = (features, cost_table.fingerprint if cost_table is not None else None)
+        encoder = encoders.get(key)
+        if encoder is None:
+            flags = FeatureFlags.from_payload(features) if features is not None else None
+            encoder = encoders[key] = SymbolEncoder(
+                feature_flags=flags, cost_table=cost_table, core=core
+            )
+        started = time.perf_counter()
+        result = encoder.encode(prompt)
+        metrics.encoded(raw_prompt, result, time.perf_counter() - started)
+        results.append(result)
+    return results
+
+
+def _cost_table(fingerprint: str, cost_dirs: List[Path]) -> SymbolCostTable:
+    try:
+        return load_cost_table(fingerprint, cost_dirs)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _negotiated_serialization(features: Optional[str]) -> bool:
+    """Validate a request's feature payload; true when it negotiates the binary ``SERIALIZATION`` format."""
+    if features is None:
+        return False
+    try:
+        return wants_serialization(FeatureFlags.from_payload(features))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _compress_in_session(
+    domains: DomainRegistry,
+    store: SessionStore,
+    session_id: str,
+    request: CompressRequest,
+    core: Optional[PhraseAutomaton],
+    packs: "_PackPreloads",
+    metrics: ServiceMetrics,
+) -> EncodedResult:
+    """
+    Encode one turn against the session lexicon held in ``store``, so any worker can serve it.
+
+    The turn is distilled with the request's domain, else the one chosen at handshake, and
+    symbols are ranked with the cost table resolved for the tokenizer at handshake. Phrases
+    in the packs negotiated at handshake are sent as their pack symbols.
+
+    Turns for one session must be sent one at a time: the updated lexicon is written back
+    with a compare-and-set on the session version, and a turn that raced another is
+    rejected with 409 rather than letting the last writer win, which would leave the
+    client's session decoder out of step.
+    """
+    state = store.get(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session; handshake again")
+    distiller = _domain_distiller(domains, request.domain or state.domain)
+    encoder = SymbolEncoder(
+        feature_flags=state.feature_flags(),
+        session=True,
+        cost_table=state.cost_table,
+        preload=packs(state.pack_ids),
+        core=core,
+    )
+    encoder.restore_session(state.lexicon, state.frames)
+    started = time.perf_counter()
+    distilled = distiller.distill(request.prompt, context=request.context)
+    distilled_at = time.perf_counter()
+    result = encoder.encode(distilled)
+    metrics.distilled(distiller.domain, request.prompt, distilled, distilled_at - started)
+    metrics.encoded(request.prompt, result, time.perf_counter() - distilled_at)
+    expected_version = state.version
+    state.lexicon = encoder.session_snapshot()
+    state.frames = encoder.frame_snapshot()
+    if not store.replace(state, expected_version):
+        raise HTTPException(
+            status_code=409, detail="Another turn for this session was applied first; send turns sequentially"
+        )
+    return result
+
+
+def _decode_in_session(
+    store: SessionStore,
+    session_id: str,
+    request: DecodeRequest,
+    core: Optional[PhraseAutomaton],
+    packs: "_PackPreloads",
+) -> DecodedPayload:
+    """
+    Decode one ``/compress`` turn with the session's decoder, restored from ``store``.
+
+    Turns must be decoded one at a time and in the order they were compressed; the
+    decoder state is written back with the same compare-and-set as ``/compress``.
+    """
+    state = store.get(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session; handshake again")
+    decoder = SymbolDecoder(session=True, preload=packs(state.pack_ids), core=core)
+    decoder.restore_session(state.decoder_lexicon, state.decoder_frames)
+    decoded = decoder.decode(request.payload, request.dictionary, request.retired)
+    expected_version = state.version
+    state.decoder_lexicon = decoder.session_snapshot()
+    state.decoder_frames = decoder.frame_snapshot()
+    if not store.replace(state, expected_version):
+        raise HTTPException(
+            status_code=409, detail="Another request for this session was applied first; send turns sequentially"
+        )
+    return decoded
+
+
+class _PackPreloads:
+    """
+    Merged preload entries of each negotiated pack set.
+
+    Pack IDs are content hashes, so a merged set never goes stale and is
+    built once per distinct set of IDs.
+    """
+
+    _MAX_SETS = 64
+
+    def __init__(self, registry: PackRegistry, core: Optional[PhraseAutomaton]) -> None:
+        self.registry = registry
+        self._reserved = tuple(core.symbols) if core is not None else ()
+        self._merged: Dict[Tuple[str, ...], Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, pack_ids: Sequence[str]) -> Dict[str, str]:
+        key = tuple(pack_ids)
+        if not key:
+            return {}
+        merged = self._merged.get(key)
+        if merged is not None:
+            return merged
+        with self._lock:
+            registry = self.registry
+            if not all(pack_id in registry for pack_id in key):
+                registry.refresh()
+            try:
+                merged = registry.preload(key, self._reserved)
+            except KeyError as exc:
+                raise HTTPException(
+                    status_code=404, detail=f"Negotiated pack {exc.args[0]} is no longer available; handshake again"
+                ) from exc
+            if len(self._merged) >= self._MAX_SETS:
+                self._merged.clear()
+            self._merged[key] = merged
+        return merged
+
+
+def _optional_path(variable: str) -> Optional[Path]:
+    value = os.environ.get(variable)
+    return Path(value) if value else None
+
+
+def _env_flag(variable: str, default: bool) -> bool:
+    value = os.environ.get(variable)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _sum_stats(stats: Iterable[Tuple[int, int]]) -> Tuple[int, int]:
+    hits = misses = 0
+    for cache_hits, cache_misses in stats:
+        hits += cache_hits
+        misses += cache_misses
+    return hits, misses
+
+
+def _key_pool_stats(key_pool: KeyPool) -> Tuple[int, int]:
+    stats = key_pool.stats()
+    return stats.hits, stats.misses
+
+
+def build_key_pool() -> Optional[KeyPool]:
+    """Create the handshake key pool configured by ``MTT_KEY_POOL_*`` environment variables."""
+    size = int(os.environ.get("MTT_KEY_POOL_SIZE", "0"))
+    if size <= 0:
+        return None
+    config = KeyPoolConfig(
+        size=size,
+        refill_interval=float(os.environ.get("MTT_KEY_POOL_REFILL_INTERVAL", "0.05")),
+    )
+    return KeyPool(request_workspace_dir() / ".keys" / "pool", config)
+
+
+def build_serving_pools() -> ServingPools:
+    """Create the CPU and blocking executors sized by ``MTT_CPU_WORKERS`` / ``MTT_BLOCKING_WORKERS``."""
+    cpu_workers = int(os.environ.get("MTT_CPU_WORKERS", "0")) or None
+    blocking_workers = int(os.environ.get("MTT_BLOCKING_WORKERS", "4"))
+    return ServingPools(cpu_workers=cpu_workers, blocking_workers=blocking_workers)
+
+
 def request_workspace_dir() -> "Path":  # pragma: no cover - runtime path resolution
     from pathlib import Path
 
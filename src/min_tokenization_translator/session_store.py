@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import json
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+
+from .config import FeatureFlags, FeatureParamSet
+from .costs import DEFAULT_UNICODE_OVERLAY, SymbolCostTable
+
+
+@dataclass
+class SessionState:
+    """
+    Negotiated state a reconnecting client needs on any worker.
+
+    ``version`` counts the writes made through ``SessionStore.replace``.
+    ``decoder_lexicon`` and ``decoder_frames`` hold the session decoder
+    behind ``/decode``. ``cost_table`` is the tokenizer's table resolved at
+    handshake, or None for the built-in defaults.
+    """
+
+    session_id: str
+    feature_payload: str = ""
+    lexicon: List[Tuple[str, int]] = field(default_factory=list)
+    pack_ids: List[str] = field(default_factory=list)
+    frames: List[Tuple[int, List[str]]] = field(default_factory=list)
+    domain: str = ""
+    tokenizer: str = ""
+    cost_table: Optional[SymbolCostTable] = None
+    decoder_lexicon: List[Tuple[str, str]] = field(default_factory=list)
+    decoder_frames: List[Tuple[int, List[str]]] = field(default_factory=list)
+    version: int = 0
+
+    def feature_flags(self, params: Optional[FeatureParamSet] = None) -> FeatureFlags:
+        return FeatureFlags.from_payload(self.feature_payload, params)
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(
+            {
+                "f": self.feature_payload,
+                "l": self.lexicon,
+                "p": self.pack_ids,
+                "fr": self.frames,
+                "d": self.domain,
+                "t": self.tokenizer,
+                "c": _cost_table_to_json(self.cost_table),
+                "dl": self.decoder_lexicon,
+                "dfr": self.decoder_frames,
+                "v": self.version,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, session_id: str, data: bytes) -> "SessionState":
+        raw = json.loads(data)
+        return cls(
+            session_id=session_id,
+            feature_payload=raw.get("f", ""),
+            lexicon=[(token, slot) for token, slot in raw.get("l", [])],
+            pack_ids=list(raw.get("p", [])),
+            frames=[(index, tokens) for index, tokens in raw.get("fr", [])],
+            domain=raw.get("d", ""),
+            tokenizer=raw.get("t", ""),
+            cost_table=_cost_table_from_json(raw.get("c")),
+            decoder_lexicon=[(symbol, token) for symbol, token in raw.get("dl", [])],
+            decoder_frames=[(index, tokens) for index, tokens in raw.get("dfr", [])],
+            version=raw.get("v", 0),
+        )
+
+
+def _cost_table_to_json(table: Optional[SymbolCostTable]) -> Optional[Dict[str, Any]]:
+    if table is None:
+        return None
+    raw: Dict[str, Any] = {"f": table.fingerprint, "c": dict(table.costs), "d": table.default_cost}
+    if table.overlay != DEFAULT_UNICODE_OVERLAY:
+        raw["o"] = "".join(table.overlay)
+    return raw
+
+
+def _cost_table_from_json(raw: Optional[Dict[str, Any]]) -> Optional[SymbolCostTable]:
+    if raw is None:
+        return None
+    overlay = raw.get("o")
+    return SymbolCostTable(
+        fingerprint=raw["f"],
+        costs=raw["c"],
+        overlay=tuple(overlay) if overlay is not None else DEFAULT_UNICODE_OVERLAY,
+        default_cost=raw["d"],
+    )
+
+
+class SessionStore:
+    """
+    Base interface for session-state backends.
+
+    Backends implement the batched ``get_many``/``put_many``/``delete`` and
+    the compare-and-set ``replace``; entries expire ``ttl`` seconds after
+    their last write.
+    """
+
+    def __init__(self, ttl: float = 3600.0) -> None:
+        self.ttl = ttl
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        return self.get_many([session_id]).get(session_id)
+
+    def put(self, state: SessionState, ttl: Optional[float] = None) -> None:
+        self.put_many([state], ttl)
+
+    def get_many(self, session_ids: Sequence[str]) -> Dict[str, SessionState]:
+        raise NotImplementedError
+
+    def put_many(self, states: Iterable[SessionState], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def replace(self, state: SessionState, expected_version: int, ttl: Optional[float] = None) -> bool:
+        """
+        Write ``state`` only if the stored entry is still at ``expected_version``.
+
+        On success ``state.version`` becomes ``expected_version + 1``. Returns
+        False when another writer got there first or the entry has expired.
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local LRU store; suitable for a single worker or tests."""
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 4096, clock: Callable[[], float] = time.monotonic):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, session_ids: Sequence[str]) -> Dict[str, SessionState]:
+        now = self._clock()
+        found: Dict[str, SessionState] = {}
+        with self._lock:
+            for session_id in session_ids:
+                item = self._entries.get(session_id)
+                if item is None:
+                    continue
+                if item[0] <= now:
+                    del self._entries[session_id]
+                    continue
+                self._entries.move_to_end(session_id)
+                found[session_id] = SessionState.from_bytes(session_id, item[1])
+        return found
+
+    def put_many(self, states: Iterable[SessionState], ttl: Optional[float] = None) -> None:
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for state in states:
+                self._entries[state.session_id] = (expires, state.to_bytes())
+                self._entries.move_to_end(state.session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def replace(self, state: SessionState, expected_version: int, ttl: Optional[float] = None) -> bool:
+        now = self._clock()
+        with self._lock:
+            item = self._entries.get(state.session_id)
+            if item is None or item[0] <= now or _stored_version(item[1]) != expected_version:
+                return False
+            state.version = expected_version + 1
+            self._entries[state.session_id] = (now + (self.ttl if ttl is None else ttl), state.to_bytes())
+            self._entries.move_to_end(state.session_id)
+        return True
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store shared by every worker on one host.
+
+    Uses WAL mode and one connection per thread. Expired rows are ignored on
+    read and removed by ``purge_expired``.
+    """
+
+    def __init__(self, path: Path, ttl: float = 3600.0, clock: Callable[[], float] = time.time):
+        super().__init__(ttl)
+        self.path = Path(path)
+        self._clock = clock
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions"
+                " (id TEXT PRIMARY KEY, expires REAL NOT NULL, data BLOB NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:
+                connection.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, session_ids: Sequence[str]) -> Dict[str, SessionState]:
+        found: Dict[str, SessionState] = {}
+        ids = list(dict.fromkeys(session_ids))
+        connection = self._connection()
+        now = self._clock()
+        # Stay under SQLite's default bound-parameter limit.
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT id, data FROM sessions WHERE id IN ({placeholders}) AND expires > ?", (*batch, now)
+            )
+            for session_id, data in rows:
+                found[session_id] = SessionState.from_bytes(session_id, data)
+        return found
+
+    def put_many(self, states: Iterable[SessionState], ttl: Optional[float] = None) -> None:
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        rows = [(state.session_id, expires, state.to_bytes(), state.version) for state in states]
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO sessions (id, expires, data, version) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def replace(self, state: SessionState, expected_version: int, ttl: Optional[float] = None) -> bool:
+        now = self._clock()
+        version = state.version
+        state.version = expected_version + 1
+        with self._connection() as connection:
+            updated = connection.execute(
+                "UPDATE sessions SET expires = ?, data = ?, version = ? WHERE id = ? AND version = ? AND expires > ?",
+                (
+                    now + (self.ttl if ttl is None else ttl),
+                    state.to_bytes(),
+                    state.version,
+                    state.session_id,
+                    expected_version,
+                    now,
+                ),
+            ).rowcount
+        if not updated:
+            state.version = version
+        return bool(updated)
+
+    def delete(self, session_id: str) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM sessions WHERE expires <= ?", (self._clock(),)).rowcount
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Store speaking the Redis protocol (RESP2) over a plain socket.
+
+    Reads use one ``MGET`` and writes one pipelined batch of ``SET ... PX``,
+    so expiry is enforced server-side; ``replace`` is one ``EVAL`` of a
+    compare-and-set script. Works with Redis, Valkey, KeyDB or any
+    RESP-compatible server with Lua scripting; no client library is required.
+
+    Only reads are retried on a fresh connection after a socket error;
+    writes may already have been applied, so their errors reach the caller,
+    except that ``replace`` first re-reads the entry to settle the outcome.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        ttl: float = 3600.0,
+        key_prefix: str = "mtt:session:",
+        timeout: float = 2.0,
+    ) -> None:
+        super().__init__(ttl)
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._reader: Optional[BinaryIO] = None
+
+    def get_many(self, session_ids: Sequence[str]) -> Dict[str, SessionState]:
+        ids = list(dict.fromkeys(session_ids))
+        if not ids:
+            return {}
+        (values,) = self._execute([("MGET", *(self.key_prefix + session_id for session_id in ids))], retry=True)
+        return {
+            session_id: SessionState.from_bytes(session_id, value)
+            for session_id, value in zip(ids, values)
+            if value is not None
+        }
+
+    def put_many(self, states: Iterable[SessionState], ttl: Optional[float] = None) -> None:
+        milliseconds = str(max(1, int((self.ttl if ttl is None else ttl) * 1000)))
+        commands = [("SET", self.key_prefix + state.session_id, state.to_bytes(), "PX", milliseconds) for state in states]
+        if commands:
+            self._execute(commands)
+
+    def replace(self, state: SessionState, expected_version: int, ttl: Optional[float] = None) -> bool:
+        milliseconds = str(max(1, int((self.ttl if ttl is None else ttl) * 1000)))
+        version = state.version
+        state.version = expected_version + 1
+        key = self.key_prefix + state.session_id
+        data = state.to_bytes()
+        command = ("EVAL", _REPLACE_SCRIPT, "1", key, str(expected_version), data, milliseconds)
+        try:
+            (replaced,) = self._execute([command])
+        except OSError:
+            # The script may have run before the connection dropped; what is stored now says whether it did.
+            (current,) = self._execute([("GET", key)], retry=True)
+            if current == data:
+                replaced = 1
+            elif current is not None and _stored_version(current) == expected_version:
+                (replaced,) = self._execute([command])
+            else:
+                replaced = 0
+        if not replaced:
+            state.version = version
+        return bool(replaced)
+
+    def delete(self, session_id: str) -> None:
+        self._execute([("DEL", self.key_prefix + session_id)])
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def _execute(self, commands: Sequence[Tuple], retry: bool = False) -> List:
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._connect()
+                return self._roundtrip(commands)
+            except OSError:
+                self._disconnect()
+                if not retry:
+                    raise
+                # One reconnect covers a server restart or an idle connection being dropped.
+                self._connect()
+                return self._roundtrip(commands)
+
+    def _roundtrip(self, commands: Sequence[Tuple]) -> List:
+        sock, reader = self._socket, self._reader
+        if sock is None or reader is None:
+            raise ConnectionError("Session store is not connected")
+        sock.sendall(b"".join(_encode_command(command) for command in commands))
+        replies = [_read_reply(reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, _RespError):
+                raise RuntimeError(f"Session store error: {reply}")
+        return replies
+
+    def _connect(self) -> None:
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._socket.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        if setup:
+            self._roundtrip(setup)
+
+    def _disconnect(self) -> None:
+        sock, reader = self._socket, self._reader
+        self._socket = None
+        self._reader = None
+        try:
+            if reader is not None:
+                reader.close()
+        finally:
+            if sock is not None:
+                sock.close()
+
+
+# KEYS[1]: session key; ARGV: expected version, new state, TTL in milliseconds.
+_REPLACE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then return 0 end
+if (cjson.decode(current)['v'] or 0) ~= tonumber(ARGV[1]) then return 0 end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+
+class _RespError(str):
+    pass
+
+
+def _stored_version(data: bytes) -> int:
+    return json.loads(data).get("v", 0)
+
+
+def _encode_command(args: Tuple) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Session store connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        return _RespError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [_read_reply(reader) for _ in range(count)]
+    raise RuntimeError(f"Unexpected session store reply: {line!r}")
+
+
+def build_session_store(url: str, ttl: float = 3600.0) -> SessionStore:
+    """
+    Create a store from a URL: ``memory://``, ``sqlite:///path/to.db`` or
+    ``redis://[:password@]host[:port][/db]``.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemorySessionStore(ttl=ttl)
+    if parsed.scheme == "sqlite":
+        return SQLiteSessionStore(Path(unquote(parsed.netloc + parsed.path)), ttl=ttl)
+    if parsed.scheme == "redis":
+        db = parsed.path.strip("/")
+        return RedisSessionStore(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            ttl=ttl,
+        )
+    raise ValueError(f"Unsupported session store URL: {url!r}")
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+# Import-time budgets (milliseconds, median over runs) for library entry
+# points. Scale them with ``MTT_IMPORT_BUDGET_SCALE`` on slow machines; the test
+# suite only enforces them when ``MTT_CHECK_IMPORT_BUDGETS`` is set.
+IMPORT_BUDGETS_MS: Dict[str, float] = {
+    "min_tokenization_translator": 60.0,
+    "min_tokenization_translator.config": 100.0,
+    "min_tokenization_translator.distiller": 150.0,
+    "min_tokenization_translator.encoder": 200.0,
+    "min_tokenization_translator.decoder": 200.0,
+    "min_tokenization_translator.packs": 150.0,
+}
+
+# Modules a cold import of these entry points must not load.
+HEAVY_MODULES: FrozenSet[str] = frozenset(
+    {"subprocess", "multiprocessing", "concurrent.futures.process", "statistics", "tracemalloc", "fastapi", "uvicorn"}
+)
+
+
+@dataclass
+class ImportProfile:
+    """Import cost of one command, beyond what a bare interpreter already loads."""
+
+    samples_ms: List[float]
+    modules: List[str]
+    heaviest: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.samples_ms)
+
+
+def budget_scale() -> float:
+    return float(os.environ.get("MTT_IMPORT_BUDGET_SCALE", "1"))
+
+
+def profile_imports(
+    argv: Sequence[str], runs: int = 5, env: Optional[Mapping[str, str]] = None, top: int = 5
+) -> ImportProfile:
+    """
+    Run ``python -X importtime <argv>`` in ``runs`` fresh interpreters.
+
+    Each sample sums the cumulative time of top-level imports that a bare
+    interpreter does not perform, so interpreter start-up and ``site`` are
+    excluded and only the command's own import cost is counted.
+    """
+    if runs < 1:
+        raise ValueError("runs must be positive")
+    baseline = _baseline_modules(sys.executable)
+    samples: List[float] = []
+    modules: List[str] = []
+    heaviest: List[Tuple[str, float]] = []
+    for _ in range(runs):
+        records = _importtime(list(argv), env)
+        top_level = [(name, cumulative) for name, cumulative, depth in records if depth == 0 and name not in baseline]
+        samples.append(sum(cumulative for _name, cumulative in top_level) / 1000.0)
+        modules = sorted({name for name, _cumulative, _depth in records} - baseline)
+        heaviest = sorted(((name, cumulative / 1000.0) for name, cumulative in top_level), key=lambda item: -item[1])[:top]
+    return ImportProfile(samples_ms=samples, modules=modules, heaviest=heaviest)
+
+
+def profile_module(module: str, runs: int = 5, env: Optional[Mapping[str, str]] = None) -> ImportProfile:
+    return profile_imports(["-c", f"import {module}"], runs=runs, env=env)
+
+
+@lru_cache(maxsize=None)
+def _baseline_modules(python: str) -> FrozenSet[str]:
+    return frozenset(name for name, _cumulative, _depth in _importtime(["-c", "pass"], None, python))
+
+
+def _importtime(
+    argv: List[str], env: Optional[Mapping[str, str]], python: Optional[str] = None
+) -> List[Tuple[str, int, int]]:
+    """``(module, cumulative microseconds, nesting depth)`` for every import the command performs."""
+    completed = subprocess.run(
+        [python or sys.executable, "-X", "importtime", *argv],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=dict(env) if env is not None else None,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {completed.returncode}: {completed.stderr.decode()[-500:]}")
+    records: List[Tuple[str, int, int]] = []
+    for line in completed.stderr.decode("utf-8", errors="replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:") :].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        stripped = name.lstrip()
+        records.append((stripped.strip(), int(cumulative), (len(name) - len(stripped) - 1) // 2))
+    return records
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+import re
+import sys
+import threading
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .trainer import CORE_SYMBOLS, EXTENDED_PREFIX, load_dictionary
+
+_CACHE_FORMAT = 1
+_CACHE_SUFFIX = ".aca"
+# Literal core-symbol characters in source text are written as ESC ESC <char>.
+_ESCAPE = EXTENDED_PREFIX + EXTENDED_PREFIX
+_NEEDS_ESCAPE = re.compile("[" + re.escape("".join(CORE_SYMBOLS) + EXTENDED_PREFIX) + "]")
+_SYMBOL = re.compile(
+    re.escape(_ESCAPE) + "(.)|" + re.escape(EXTENDED_PREFIX) + "(.)|([" + re.escape("".join(CORE_SYMBOLS)) + "])",
+    re.DOTALL,
+)
+
+_loaded: Dict[str, "PhraseAutomaton"] = {}
+_loaded_lock = threading.Lock()
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over a core dictionary (``phrase -> symbol``).
+
+    ``substitute`` replaces every dictionary phrase in a text with its
+    symbol in linear time, using leftmost-longest semantics: scanning left to
+    right, at the first position where any phrase matches, the longest
+    matching phrase wins. A phrase only matches on word boundaries, so ``ci``
+    never fires inside ``circle``. The trie is built over reversed phrases,
+    so one right-to-left scan yields, for every position, the phrases that
+    start there; a left-to-right pass then takes matches greedily.
+    """
+
+    def __init__(self, entries: Mapping[str, str]) -> None:
+        self.entries: Dict[str, str] = {phrase: symbol for phrase, symbol in entries.items() if phrase}
+        self.phrases: List[str] = list(self.entries)
+        self.symbols: List[str] = [self.entries[phrase] for phrase in self.phrases]
+        self._expansions = {symbol: phrase for phrase, symbol in self.entries.items()}
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    @classmethod
+    def from_dictionary_file(cls, path: Path) -> "PhraseAutomaton":
+        return cls(load_dictionary(path))
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        terminal = [-1]
+        depth = [0]
+        for index, phrase in enumerate(self.phrases):
+            state = 0
+            for char in reversed(phrase):
+                child = goto[state].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto[state][char] = child
+                    goto.append({})
+                    terminal.append(-1)
+                    depth.append(depth[state] + 1)
+                state = child
+            terminal[state] = index
+        fail = [0] * len(goto)
+        # ``output[s]``: deepest state on s's fail chain (s included) that ends a phrase, or 0.
+        output = [0] * len(goto)
+        queue = deque(goto[0].values())
+        for state in queue:
+            output[state] = state if terminal[state] >= 0 else 0
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                target = goto[link].get(char, 0)
+                fail[child] = target if target != child else 0
+                output[child] = child if terminal[child] >= 0 else output[fail[child]]
+                queue.append(child)
+        self._goto = goto
+        self._fail = array("I", fail)
+        self._output = array("I", output)
+        self._terminal = array("i", terminal)
+        self._depth = array("I", depth)
+
+    def substitute(self, text: str) -> str:
+        """Replace dictionary phrases in ``text`` with their symbols; reversible with ``expand``."""
+        if _NEEDS_ESCAPE.search(text):
+            escape = _escape
+        else:
+            escape = _identity
+        if not self.phrases:
+            return escape(text)
+        starts = self._match_starts(text)
+        pieces: List[str] = []
+        copied = position = 0
+        length = len(text)
+        while position < length:
+            index = starts[position]
+            if index >= 0 and (position == 0 or not (text[position - 1].isalnum() and text[position].isalnum())):
+                if copied < position:
+                    pieces.append(escape(text[copied:position]))
+                pieces.append(self.symbols[index])
+                position += len(self.phrases[index])
+                copied = position
+            else:
+                position += 1
+        if copied < length:
+            pieces.append(escape(text[copied:]))
+        return "".join(pieces)
+
+    def expand(self, text: str) -> str:
+        """Inverse of ``substitute``."""
+        expansions = self._expansions
+
+        def replace(match: "re.Match[str]") -> str:
+            literal, extended, single = match.groups()
+            if literal is not None:
+                return literal
+            symbol = EXTENDED_PREFIX + extended if extended is not None else single
+            phrase = expansions.get(symbol)
+            if phrase is None:
+                raise ValueError(f"Unknown core symbol {symbol!r}")
+            return phrase
+
+        return _SYMBOL.sub(replace, text)
+
+    def _match_starts(self, text: str) -> List[int]:
+        """For each position, the longest phrase starting there that ends on a word boundary (or -1)."""
+        goto, fail, output, terminal, depth = self._goto, self._fail, self._output, self._terminal, self._depth
+        length = len(text)
+        starts = [-1] * length
+        state = 0
+        position = length
+        for char in reversed(text):
+            position -= 1
+            following = goto[state].get(char)
+            while following is None and state:
+                state = fail[state]
+                following = goto[state].get(char)
+            state = following or 0
+            hit = output[state]
+            while hit:
+                end = position + depth[hit]
+                if end == length or not (text[end - 1].isalnum() and text[end].isalnum()):
+                    starts[position] = terminal[hit]
+                    break
+                hit = output[fail[hit]]
+        return starts
+
+    def to_state(self) -> Tuple:
+        return (
+            _CACHE_FORMAT,
+            self.phrases,
+            self.symbols,
+            self._goto,
+            self._fail.tobytes(),
+            self._output.tobytes(),
+            self._terminal.tobytes(),
+            self._depth.tobytes(),
+        )
+
+    @classmethod
+    def from_state(cls, state: Tuple) -> "PhraseAutomaton":
+        version, phrases, symbols, goto, fail, output, terminal, depth = state
+        if version != _CACHE_FORMAT:
+            raise ValueError(f"Unsupported automaton cache format {version}")
+        automaton = cls.__new__(cls)
+        automaton.phrases = list(phrases)
+        automaton.symbols = list(symbols)
+        automaton.entries = dict(zip(phrases, symbols))
+        automaton._expansions = {symbol: phrase for phrase, symbol in automaton.entries.items()}
+        automaton._goto = goto
+        automaton._fail = array("I", fail)
+        automaton._output = array("I", output)
+        automaton._terminal = array("i", terminal)
+        automaton._depth = array("I", depth)
+        return automaton
+
+
+def load_automaton(path: Path, cache_dir: Optional[Path] = None) -> PhraseAutomaton:
+    """
+    Load the automaton for a trained dictionary file, once per process.
+
+    Automata are keyed by a hash of the dictionary file. With ``cache_dir``,
+    the compiled automaton is also stored there (``marshal`` format, keyed by
+    Python version too) and reused by later processes instead of being rebuilt.
+    """
+    data = Path(path).read_bytes()
+    key = hashlib.sha256(data + sys.version.encode("utf-8")).hexdigest()[:32]
+    with _loaded_lock:
+        automaton = _loaded.get(key)
+        if automaton is not None:
+            return automaton
+        automaton = _read_cache(cache_dir, key) if cache_dir is not None else None
+        if automaton is None:
+            automaton = PhraseAutomaton.from_dictionary_file(path)
+            if cache_dir is not None:
+                _write_cache(Path(cache_dir), key, automaton)
+        _loaded[key] = automaton
+        return automaton
+
+
+def _read_cache(cache_dir: Path, key: str) -> Optional[PhraseAutomaton]:
+    target = Path(cache_dir) / f"{key}{_CACHE_SUFFIX}"
+    try:
+        return PhraseAutomaton.from_state(marshal.loads(target.read_bytes()))
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_cache(cache_dir: Path, key: str, automaton: PhraseAutomaton) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = cache_dir / f"{key}{_CACHE_SUFFIX}"
+    temporary = target.with_suffix(f".{os.getpid()}.tmp")
+    temporary.write_bytes(marshal.dumps(automaton.to_state()))
+    os.replace(temporary, target)
+
+
+def _escape(text: str) -> str:
+    return _NEEDS_ESCAPE.sub(lambda match: _ESCAPE + match.group(0), text)
+
+
+def _identity(text: str) -> str:
+    return text
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# ticket id (8 bytes) + expiry (uint32 seconds) + truncated HMAC-SHA256 (16 bytes)
+_TICKET = struct.Struct(">8sI16s")
+
+
+@dataclass
+class TicketEntry:
+    """Server-side state a resumption ticket refers to."""
+
+    public_key: str
+    private_key_path: Path
+    feature_payload: str
+    tokenizer_fingerprint: str
+    expires_at: int
+
+
+class TicketCache:
+    """
+    Issues and redeems handshake resumption tickets, in the spirit of TLS
+    session tickets.
+
+    A ticket is a 38-character URL-safe token carrying an id, an expiry and
+    an HMAC over both plus the feature payload, tokenizer fingerprint and
+    public key it was issued for. Redeeming checks the MAC against the
+    client's current parameters, so a ticket never resumes a session with a
+    different feature set. Entries live at most ``lifetime`` seconds and the
+    cache holds at most ``max_entries``, evicting the oldest first.
+
+    ``on_evict`` is called with every entry that leaves the cache (expired,
+    evicted, revoked or cleared), outside the cache lock, so the session's
+    keypair can be disposed of once no ticket can resume it.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[bytes] = None,
+        lifetime: float = 600.0,
+        max_entries: int = 4096,
+        clock: Callable[[], float] = time.time,
+        on_evict: Optional[Callable[[TicketEntry], None]] = None,
+    ) -> None:
+        self._secret = secret or os.urandom(32)
+        self.lifetime = lifetime
+        self.max_entries = max_entries
+        self._clock = clock
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[bytes, TicketEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def issue(self, public_key: str, private_key_path: Path, feature_payload: str, tokenizer_fingerprint: str) -> str:
+        ticket_id = os.urandom(8)
+        expires_at = int(self._clock() + self.lifetime)
+        entry = TicketEntry(public_key, private_key_path, feature_payload, tokenizer_fingerprint, expires_at)
+        mac = self._mac(ticket_id, expires_at, entry.feature_payload, entry.tokenizer_fingerprint, entry.public_key)
+        with self._lock:
+            evicted = self._purge_expired()
+            self._entries[ticket_id] = entry
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+        self._evicted(evicted)
+        return base64.urlsafe_b64encode(_TICKET.pack(ticket_id, expires_at, mac)).decode("ascii").rstrip("=")
+
+    def redeem(self, ticket: str, feature_payload: str, tokenizer_fingerprint: str) -> Optional[TicketEntry]:
+        """Return the session behind ``ticket`` if it is authentic, unexpired and matches the request."""
+        try:
+            raw = base64.urlsafe_b64decode(ticket + "=" * (-len(ticket) % 4))
+            ticket_id, expires_at, mac = _TICKET.unpack(raw)
+        except (ValueError, struct.error):
+            return None
+        if expires_at <= self._clock():
+            self.purge()
+            return None
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+        if entry is None or entry.expires_at != expires_at:
+            return None
+        expected = self._mac(ticket_id, expires_at, feature_payload, tokenizer_fingerprint, entry.public_key)
+        if not hmac.compare_digest(mac, expected):
+            return None
+        return entry
+
+    def revoke(self, ticket: str) -> None:
+        try:
+            raw = base64.urlsafe_b64decode(ticket + "=" * (-len(ticket) % 4))
+            ticket_id = _TICKET.unpack(raw)[0]
+        except (ValueError, struct.error):
+            return
+        with self._lock:
+            entry = self._entries.pop(ticket_id, None)
+        self._evicted([entry] if entry is not None else [])
+
+    def purge(self) -> None:
+        """Drop expired entries."""
+        with self._lock:
+            evicted = self._purge_expired()
+        self._evicted(evicted)
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. on shutdown."""
+        with self._lock:
+            evicted = list(self._entries.values())
+            self._entries.clear()
+        self._evicted(evicted)
+
+    def _purge_expired(self) -> List[TicketEntry]:
+        now = self._clock()
+        evicted: List[TicketEntry] = []
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.expires_at > now:
+                break
+            evicted.append(self._entries.popitem(last=False)[1])
+        return evicted
+
+    def _evicted(self, entries: List[TicketEntry]) -> None:
+        if self.on_evict is not None:
+            for entry in entries:
+                self.on_evict(entry)
+
+    def _mac(self, ticket_id: bytes, expires_at: int, feature_payload: str, tokenizer: str, public_key: str) -> bytes:
+        message = b"\x1f".join(
+            (
+                ticket_id,
+                str(expires_at).encode("ascii"),
+                feature_payload.encode("utf-8"),
+                tokenizer.encode("utf-8"),
+                hashlib.sha256(public_key.encode("utf-8")).digest(),
+            )
+        )
+        return hmac.new(self._secret, message, hashlib.sha256).digest()[:16]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# GPT-2 style pre-tokenization with ``\p{L}``/``\p{N}`` approximated by the
+# classes the stdlib ``re`` module supports.
+DEFAULT_PATTERN = r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+"""
+
+
+class Tokenizer:
+    """Counts tokens for benchmark accounting."""
+
+    name = "tokenizer"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+
+class WhitespaceTokenizer(Tokenizer):
+    """
+    Whitespace word counter used when no real vocabulary is available.
+
+    Every text counts as at least one token.
+    """
+
+    name = "whitespace"
+
+    def count(self, text: str) -> int:
+        return max(1, len(text.split()))
+
+
+class BPETokenizer(Tokenizer):
+    """
+    Offline byte-level BPE tokenizer driven by a merge-rank table.
+
+    ``ranks`` maps byte sequences to their merge priority (lower merges
+    first). Pre-tokenized pieces are memoized in a bounded cache since
+    natural-language corpora repeat a small working set of words.
+    """
+
+    name = "bpe"
+
+    def __init__(self, ranks: Dict[bytes, int], pattern: str = DEFAULT_PATTERN, piece_cache_size: int = 65536) -> None:
+        missing = [value for value in range(256) if bytes([value]) not in ranks]
+        if missing:
+            raise ValueError(f"BPE ranks must cover every single byte; {len(missing)} are missing")
+        self.ranks = ranks
+        self.piece_cache_size = piece_cache_size
+        self._pattern = re.compile(pattern)
+        self._piece_cache: Dict[bytes, List[int]] = {}
+
+    @classmethod
+    def from_tiktoken_file(cls, path: Path, **kwargs) -> "BPETokenizer":
+        """Load a ``.tiktoken`` rank file: one ``<base64 token> <rank>`` per line."""
+        ranks: Dict[bytes, int] = {}
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+        return cls(ranks, **kwargs)
+
+    @classmethod
+    def from_vocab_merges(cls, vocab_path: Path, merges_path: Path, **kwargs) -> "BPETokenizer":
+        """Load GPT-2 style ``vocab.json`` and ``merges.txt`` files."""
+        byte_decoder = {char: value for value, char in _bytes_to_unicode().items()}
+
+        def to_bytes(token: str) -> bytes:
+            return bytes(byte_decoder[char] for char in token)
+
+        vocab = json.loads(Path(vocab_path).read_text(encoding="utf-8"))
+        ranks: Dict[bytes, int] = {bytes([value]): value for value in range(256)}
+        next_rank = 256
+        for line in Path(merges_path).read_text(encoding="utf-8").splitlines():
+            if not line.strip() or line.startswith("#version"):
+                continue
+            left, right = line.split()
+            merged = to_bytes(left) + to_bytes(right)
+            if merged not in ranks:
+                ranks[merged] = next_rank
+                next_rank += 1
+        for token in vocab:
+            ranks.setdefault(to_bytes(token), next_rank)
+        return cls(ranks, **kwargs)
+
+    def encode(self, text: str) -> List[int]:
+        ids: List[int] = []
+        for piece in self._pattern.findall(text):
+            ids.extend(self._encode_piece(piece.encode("utf-8")))
+        return ids
+
+    def count(self, text: str) -> int:
+        return sum(len(self._encode_piece(piece.encode("utf-8"))) for piece in self._pattern.findall(text))
+
+    def _encode_piece(self, piece: bytes) -> List[int]:
+        cached = self._piece_cache.get(piece)
+        if cached is not None:
+            return cached
+        if piece in self.ranks:
+            result = [self.ranks[piece]]
+        else:
+            result = [self.ranks[part] for part in self._merge(piece)]
+        if len(self._piece_cache) >= self.piece_cache_size:
+            self._piece_cache.clear()
+        self._piece_cache[piece] = result
+        return result
+
+    def _merge(self, piece: bytes) -> List[bytes]:
+        ranks = self.ranks
+        parts = [piece[index : index + 1] for index in range(len(piece))]
+        while len(parts) > 1:
+            best_rank: Optional[int] = None
+            best_index = -1
+            for index in range(len(parts) - 1):
+                rank = ranks.get(parts[index] + parts[index + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = index
+            if best_rank is None:
+                break
+            parts[best_index : best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return parts
+
+
+class CachedTokenizer(Tokenizer):
+    """
+    Memoizes token counts of a backend by content hash.
+
+    Keys are BLAKE2b digests, so the memo holds fixed-size keys rather than
+    full prompt texts. Entries are evicted least-recently-used.
+    """
+
+    def __init__(self, backend: Tokenizer, max_entries: int = 65536) -> None:
+        self.backend = backend
+        self.max_entries = max_entries
+        self.name = backend.name
+        self.hits = 0
+        self.misses = 0
+        self._memo: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        """Count a batch, sending each distinct uncached text to the backend once."""
+        items = list(texts)
+        keys = [_content_key(text) for text in items]
+        memo = self._memo
+        pending: Dict[bytes, str] = {}
+        for key, text in zip(keys, items):
+            if key in memo:
+                memo.move_to_end(key)
+                self.hits += 1
+            elif key in pending:
+                self.hits += 1
+            else:
+                pending[key] = text
+                self.misses += 1
+        if pending:
+            for key, count in zip(pending, self.backend.count_many(pending.values())):
+                memo[key] = count
+            while len(memo) > self.max_entries:
+                memo.popitem(last=False)
+        results: List[int] = []
+        for key, text in zip(keys, items):
+            cached = memo.get(key)
+            results.append(cached if cached is not None else self.backend.count(text))
+        return results
+
+
+def _content_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """GPT-2's reversible byte to printable-unicode mapping."""
+    printable: Sequence[int] = (
+        list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    )
+    mapping: Dict[int, str] = {value: chr(value) for value in printable}
+    offset = 0
+    for value in range(256):
+        if value not in mapping:
+            mapping[value] = chr(256 + offset)
+            offset += 1
+    return mapping
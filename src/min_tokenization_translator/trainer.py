@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import heapq
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .distiller import PromptDistiller
+from .tokenizer import CachedTokenizer, Tokenizer, WhitespaceTokenizer
+
+# Single-character core symbols: the ASCII controls that ``str.split`` does
+# not treat as whitespace, minus escape. They never collide with the
+# printable per-prompt symbol pool, the field separator or fallback ids.
+CORE_SYMBOLS: Tuple[str, ...] = tuple(chr(code) for code in [*range(0x01, 0x09), *range(0x0E, 0x1B)])
+# Ranks past the single controls use ESC followed by one of these characters.
+EXTENDED_PREFIX = "\x1b"
+EXTENDED_ALPHABET = "".join(chr(code) for code in range(0x21, 0x7F) if chr(code) not in "|~")
+CORE_CAPACITY = len(CORE_SYMBOLS) + len(EXTENDED_ALPHABET)
+
+
+def core_symbols(count: int) -> List[str]:
+    """The first ``count`` core symbols, cheapest (single control) first."""
+    if count > CORE_CAPACITY:
+        raise ValueError(f"At most {CORE_CAPACITY} core symbols are available")
+    symbols = list(CORE_SYMBOLS[:count])
+    symbols.extend(EXTENDED_PREFIX + char for char in EXTENDED_ALPHABET[: count - len(symbols)])
+    return symbols
+
+
+@dataclass
+class Candidate:
+    phrase: str
+    count: int
+    tokens: int
+    score: int
+
+
+@dataclass
+class TrainedDictionary:
+    """Ranked phrases mined from a corpus; ``entries`` maps each to its core symbol."""
+
+    name: str
+    candidates: List[Candidate] = field(default_factory=list)
+    documents: int = 0
+
+    def entries(self) -> Dict[str, str]:
+        return dict(zip((candidate.phrase for candidate in self.candidates), core_symbols(len(self.candidates))))
+
+    def to_manifest(self) -> Dict[str, object]:
+        """Pack manifest (``name`` + ``entries``) carrying the ranking alongside."""
+        return {
+            "name": self.name,
+            "entries": self.entries(),
+            "documents": self.documents,
+            "ranking": [[candidate.phrase, candidate.count, candidate.tokens, candidate.score] for candidate in self.candidates],
+        }
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.to_manifest(), ensure_ascii=True, indent=1), encoding="utf-8")
+
+
+def load_dictionary(path: Path) -> Dict[str, str]:
+    """Read the ``phrase -> symbol`` entries of a trained dictionary or pack manifest."""
+    manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    entries = manifest.get("entries") if isinstance(manifest, dict) else None
+    if not isinstance(entries, dict):
+        raise ValueError(f"{path} is not a dictionary manifest")
+    return {str(phrase): str(symbol) for phrase, symbol in entries.items()}
+
+
+class DictionaryTrainer:
+    """
+    Mines a core dictionary from a corpus, zstd ``--train`` style.
+
+    Each prompt is distilled; its graph values and residual segments are
+    counted as whole segments, and their shorter word 2..``max_ngram``-grams
+    as phrases, using ``Counter.update`` over ``zip``/``map`` so the counting
+    loops run in C. Memory is bounded by ``capacity`` entries per table:
+    when a table overflows, entries at or below a rising floor are dropped,
+    so only rare phrases can be lost or undercounted.
+
+    Candidates are scored by tokens saved, ``count * (tokens - symbol_cost)``,
+    and picked greedily; picking a phrase discounts the shorter n-grams it
+    contains, since those occurrences are already covered.
+    """
+
+    def __init__(
+        self,
+        distiller: Optional[PromptDistiller] = None,
+        tokenizer: Optional[Tokenizer] = None,
+        max_ngram: int = 3,
+        capacity: int = 200_000,
+        symbol_cost: int = 1,
+    ) -> None:
+        if max_ngram < 1:
+            raise ValueError("max_ngram must be positive")
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.distiller = distiller or PromptDistiller()
+        self.tokenizer = CachedTokenizer(tokenizer or WhitespaceTokenizer())
+        self.max_ngram = max_ngram
+        self.capacity = capacity
+        self.symbol_cost = symbol_cost
+        self.documents = 0
+        self.floor = 0
+        self._segments: Counter = Counter()
+        self._ngrams: Counter = Counter()
+
+    def feed(self, prompt: str, context: Optional[Dict[str, str]] = None) -> None:
+        distilled = self.distiller.distill(prompt, context)
+        texts = distilled.graph.value_counts()
+        if distilled.residual_note:
+            texts.extend(Counter(distilled.residual_note.split(". ")).items())
+        segments, ngrams = self._segments, self._ngrams
+        for text, occurrences in texts:
+            segments[text] += occurrences
+            words = text.split()
+            # Whole texts are already counted as segments; mine strictly shorter n-grams.
+            for size in range(2, min(self.max_ngram + 1, len(words))):
+                grams = map(" ".join, zip(*(words[start:] for start in range(size))))
+                if occurrences == 1:
+                    ngrams.update(grams)
+                else:
+                    ngrams.update({gram: seen * occurrences for gram, seen in Counter(grams).items()})
+        self.documents += 1
+        for table in (segments, ngrams):
+            if len(table) > self.capacity:
+                self._prune(table)
+
+    def feed_many(self, prompts: Iterable[str]) -> int:
+        fed = 0
+        for prompt in prompts:
+            self.feed(prompt)
+            fed += 1
+        return fed
+
+    def candidates(self, min_count: int = 2) -> Dict[str, int]:
+        """Phrases seen at least ``min_count`` times, as segments or inside longer texts."""
+        merged = self._segments + self._ngrams
+        return {phrase: count for phrase, count in merged.items() if count >= min_count}
+
+    def train(self, size: int = 64, min_count: int = 2, name: str = "core") -> TrainedDictionary:
+        """Rank the best ``size`` phrases (at most ``CORE_CAPACITY``)."""
+        if not 0 < size <= CORE_CAPACITY:
+            raise ValueError(f"size must be between 1 and {CORE_CAPACITY}")
+        counts = self.candidates(min_count)
+        phrases = list(counts)
+        tokens = dict(zip(phrases, self.tokenizer.count_many(phrases)))
+        heap = [(-self._score(counts[phrase], tokens[phrase]), phrase) for phrase in phrases]
+        heapq.heapify(heap)
+        chosen: List[Candidate] = []
+        taken = set()
+        while heap and len(chosen) < size:
+            negative, phrase = heapq.heappop(heap)
+            if -negative <= 0:
+                break
+            score = self._score(counts[phrase], tokens[phrase])
+            if score < -negative:
+                # Discounted since it was queued; requeue at its current score.
+                if score > 0:
+                    heapq.heappush(heap, (-score, phrase))
+                continue
+            chosen.append(Candidate(phrase, counts[phrase], tokens[phrase], score))
+            taken.add(phrase)
+            for part in _sub_phrases(phrase):
+                if part in counts and part not in taken:
+                    counts[part] = max(0, counts[part] - counts[phrase])
+        return TrainedDictionary(name=name, candidates=chosen, documents=self.documents)
+
+    def _score(self, count: int, tokens: int) -> int:
+        return count * (tokens - self.symbol_cost)
+
+    def _prune(self, table: Counter) -> None:
+        target = self.capacity // 2
+        while len(table) > target:
+            self.floor += 1
+            for phrase in [phrase for phrase, count in table.items() if count <= self.floor]:
+                del table[phrase]
+
+
+def _sub_phrases(phrase: str) -> Sequence[str]:
+    words = phrase.split()
+    return [
+        " ".join(words[start : start + size])
+        for size in range(2, len(words))
+        for start in range(len(words) - size + 1)
+    ]
+
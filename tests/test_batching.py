@@ -0,0 +1,40 @@
+import pytest
+
+from min_tokenization_translator.batching import chunk_items, resolve_executor
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder
+
+PROMPTS = [f"Diagnosis: case {index}. dosage={index}mg. Return plan -> taper {index % 3}." for index in range(40)]
+CONTEXTS = [{"priority": "high" if index % 2 else "low"} for index in range(40)]
+
+
+@pytest.mark.parametrize("executor,workers", [("inline", None), ("thread", 3), ("process", 2)])
+def test_distill_many_matches_sequential(executor, workers):
+    distiller = PromptDistiller()
+    expected = [distiller.distill(prompt, context) for prompt, context in zip(PROMPTS, CONTEXTS)]
+    batched = distiller.distill_many(PROMPTS, CONTEXTS, executor=executor, max_workers=workers, chunk_size=7)
+    assert batched == expected
+
+
+@pytest.mark.parametrize("executor,workers", [("inline", None), ("thread", 4), ("process", 2)])
+def test_encode_many_is_deterministic(executor, workers):
+    flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.DYNAMIC_PACKS})
+    distilled = PromptDistiller().distill_many(PROMPTS)
+    encoder = SymbolEncoder(flags)
+    expected = [SymbolEncoder(flags).encode(item) for item in distilled]
+    assert encoder.encode_many(distilled, executor=executor, max_workers=workers, chunk_size=5) == expected
+
+
+def test_distill_many_rejects_misaligned_contexts():
+    with pytest.raises(ValueError):
+        PromptDistiller().distill_many(["a", "b"], [None])
+
+
+def test_executor_resolution():
+    assert resolve_executor("auto", 10, max_workers=8) == "inline"
+    assert resolve_executor("auto", 10_000, max_workers=1) == "inline"
+    assert resolve_executor("auto", 10_000, max_workers=8) == "process"
+    with pytest.raises(ValueError):
+        resolve_executor("gpu", 1)
+    assert chunk_items([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
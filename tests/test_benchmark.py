@@ -1,4 +1,13 @@
-from min_tokenization_translator.benchmark import BenchmarkConfig, BenchmarkRunner
+import json
+
+from min_tokenization_translator.benchmark import (
+    BenchmarkConfig,
+    BenchmarkResult,
+    BenchmarkRunner,
+    StageStats,
+    compare_results,
+    percentile,
+)
 from min_tokenization_translator.config import FeatureFlag, FeatureFlags
 
 
@@ -18,3 +27,40 @@ def test_benchmark_runs_with_feature_flags():
     result = BenchmarkRunner(config).run()
     assert result.baseline_tokens >= result.compressed_tokens
     assert result.token_savings_pct >= 0.0
+
+
+def test_benchmark_reports_stage_percentiles_and_memory():
+    config = BenchmarkConfig(
+        corpus=["Diagnosis: flu. dosage=5mg.", "Return plan -> rest."],
+        feature_flags=FeatureFlags(),
+        runs=2,
+        warmup=1,
+        trace_memory=True,
+    )
+    result = BenchmarkRunner(config).run()
+    for stage in ("distill", "encode", "decode", "tokenize"):
+        stats = result.stages[stage]
+        assert stats.samples == 2
+        assert stats.p50_ms <= stats.p95_ms <= stats.p99_ms <= stats.max_ms
+        assert stats.peak_alloc_bytes > 0
+    assert BenchmarkResult.from_dict(json.loads(json.dumps(result.to_dict()))) == result
+
+
+def test_benchmark_batches_agree_across_executors():
+    corpus = ["Diagnosis: flu. dosage=5mg.", "Return plan -> rest.", "Diagnose patient with pneumonia."]
+    results = [
+        BenchmarkRunner(BenchmarkConfig(corpus=corpus, feature_flags=FeatureFlags(), runs=1, executor=mode)).run()
+        for mode in ("inline", "thread")
+    ]
+    assert results[0].baseline_tokens == results[1].baseline_tokens
+    assert results[0].compressed_tokens == results[1].compressed_tokens
+
+
+def test_compare_results_flags_regressions():
+    baseline = BenchmarkResult(10, 2, 80.0, 1.0, 0.1, stages={"encode": StageStats(samples=1, p95_ms=1.0)})
+    slower = BenchmarkResult(10, 2, 80.0, 1.0, 0.1, stages={"encode": StageStats(samples=1, p95_ms=1.5)})
+    worse = BenchmarkResult(10, 4, 60.0, 1.0, 0.1, stages={"encode": StageStats(samples=1, p95_ms=1.05)})
+    assert compare_results(baseline, baseline) == []
+    assert len(compare_results(slower, baseline, latency_threshold_pct=10.0)) == 1
+    assert len(compare_results(worse, baseline)) == 1
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
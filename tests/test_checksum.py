@@ -0,0 +1,61 @@
+import pytest
+
+from min_tokenization_translator.benchmark import measure_checksum_throughput
+from min_tokenization_translator.checksum import BlockReceiver, BlockSender, ChecksumError, seal, unseal
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+
+TEXT = "A?b|c~01|?" * 7 + "αβγ|ΩΣ" + "tail"
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 16, 64])
+def test_seal_roundtrip_with_marker_characters(block_size):
+    for text in (TEXT, TEXT.encode("ascii", "ignore").decode(), ""):
+        assert unseal(seal(text, block_size), block_size) == text
+
+
+def test_corrupted_blocks_are_reported():
+    sealed = seal("x" * 40, 8)
+    damaged = sealed[:12] + "y" + sealed[13:25] + "z" + sealed[26:]
+    with pytest.raises(ChecksumError) as excinfo:
+        unseal(damaged, 8)
+    assert excinfo.value.blocks == [1, 2]
+
+
+def test_streaming_receiver_repairs_only_bad_blocks():
+    sender = BlockSender(TEXT, block_size=8)
+    sealed = sender.sealed()
+    damaged = sealed[:3] + "#" + sealed[4:]
+    receiver = BlockReceiver(block_size=8)
+    verified = []
+    for start in range(0, len(damaged), 5):
+        verified.extend(receiver.feed(damaged[start : start + 5]))
+    with pytest.raises(ChecksumError):
+        verified.extend(receiver.close())
+    assert [block.index for block in verified if not block.ok] == [0]
+    assert receiver.request() == ">0"
+    response = sender.respond(receiver.request())
+    assert response.startswith("0:") and len(response) == 2 + 11
+    assert receiver.accept(response) == []
+    assert receiver.text() == TEXT
+
+
+def test_encoder_seals_body_and_decoder_verifies():
+    flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.CHECKSUM_BLOCKS})
+    distilled = PromptDistiller().distill("Goal: ship release. Owner: alice. Deadline: friday.")
+    result = SymbolEncoder(flags, checksum_block_size=8).encode(distilled)
+    header, _sep, body = result.payload.partition("|")
+    assert header == "~a~c" and body.count("?") >= len(body) // 11
+    decoder = SymbolDecoder(block_size=8)
+    assert decoder.decode_result(result).fields == graph_fields(distilled)
+    result.payload = result.payload[:6] + ("Z" if result.payload[6] != "Z" else "Y") + result.payload[7:]
+    with pytest.raises(ChecksumError):
+        decoder.decode_result(result)
+
+
+def test_checksum_throughput_is_measured():
+    stats = measure_checksum_throughput(megabytes=0.05, block_size=64, runs=1)
+    assert stats["seal_mb_per_s"] > 0 and stats["verify_mb_per_s"] > 0
+    assert stats["size_overhead_pct"] == pytest.approx(3 / 64 * 100, rel=0.01)
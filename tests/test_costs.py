@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.costs import DEFAULT_UNICODE_OVERLAY, SymbolCostTable, load_cost_table
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import DistilledPrompt
+from min_tokenization_translator.encoder import SymbolEncoder
+
+GRAPH = [{"type": "statement", "value": f"v{i}", "canonical": f"c{i}"} for i in range(60)]
+
+
+def test_overlay_symbols_only_used_when_negotiated():
+    distilled = DistilledPrompt(graph=GRAPH, residual_note="")
+    ascii_only = SymbolEncoder(FeatureFlags()).encode(distilled)
+    overlay_flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.UNICODE_OVERLAY})
+    overlay = SymbolEncoder(overlay_flags).encode(distilled)
+
+    assert not any(symbol in DEFAULT_UNICODE_OVERLAY for symbol in ascii_only.dictionary)
+    assert any(symbol in DEFAULT_UNICODE_OVERLAY for symbol in overlay.dictionary)
+    assert not any(symbol.startswith("~") for symbol in overlay.dictionary)
+    assert len(overlay.payload) < len(ascii_only.payload)
+    assert SymbolDecoder().verify_roundtrip(distilled, overlay)
+
+
+def test_cheapest_symbols_go_to_highest_weight_tokens():
+    table = SymbolCostTable(costs={"!": 2, "@": 2, "#": 9})
+    pool = table.symbol_pool(SymbolEncoder._SYMBOL_POOL, unicode_overlay=False)
+    assert pool[0] == "$"
+    assert pool.index("!") > pool.index("9")
+    assert "#" not in pool
+
+
+def test_cost_tables_load_from_disk_and_are_cached(tmp_path):
+    (tmp_path / "unit-tok.json").write_text(
+        json.dumps({"costs": {"!": 3}, "overlay": ["λ", "|", "7"]}), encoding="utf-8"
+    )
+    first = load_cost_table("unit-tok", [tmp_path / "missing", tmp_path])
+    assert first.fingerprint == "unit-tok"
+    assert first.cost("!") == 3
+    assert load_cost_table("unit-tok", [tmp_path]) is first
+    assert first.symbol_pool([], unicode_overlay=True) == ["λ"]
+    assert load_cost_table("absent", [tmp_path]).costs == {}
+
+
+def test_cost_table_fingerprints_stay_inside_their_directory(tmp_path):
+    costs = tmp_path / "costs"
+    costs.mkdir()
+    (tmp_path / "secret.json").write_text(json.dumps({"costs": {"!": 3}}), encoding="utf-8")
+    for fingerprint in ("../secret", "a/b", "..", ""):
+        with pytest.raises(ValueError):
+            load_cost_table(fingerprint, [costs])
+    (costs / "escape.json").symlink_to(tmp_path / "secret.json")
+    with pytest.raises(ValueError):
+        load_cost_table("escape", [costs])
+
+
+def test_malformed_cost_tables_raise_value_error(tmp_path):
+    for name, text in (("broken", "{"), ("listed", "[]"), ("typed", '{"costs": {"!": "many"}}')):
+        (tmp_path / f"{name}.json").write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_cost_table(name, [tmp_path])
@@ -0,0 +1,47 @@
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.decoder import SymbolDecoder, SymbolTrie
+from min_tokenization_translator.distiller import DistilledPrompt, PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+
+
+def test_decoder_roundtrips_encoded_payload():
+    distilled = PromptDistiller().distill("Diagnosis: pneumonia. dosage=500mg. plan -> taper. misc", {"priority": "high"})
+    flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.CHECKSUM_BLOCKS})
+    result = SymbolEncoder(flags).encode(distilled)
+    decoder = SymbolDecoder()
+
+    decoded = decoder.decode_result(result)
+    assert decoded.feature_flags.enabled == flags.enabled
+    assert decoded.fields == graph_fields(distilled)
+    assert decoder.verify_roundtrip(distilled, result)
+
+
+def test_fallback_identifiers_stay_prefix_free():
+    # 900 distinct tokens exhaust the pool and need three-digit fallback ids.
+    graph = [{"type": "statement", "value": f"v{i}", "canonical": f"c{i}"} for i in range(450)]
+    distilled = DistilledPrompt(graph=graph, residual_note="tail")
+    result = SymbolEncoder().encode(distilled)
+    symbols = list(result.dictionary)
+    assert not any(a != b and b.startswith(a) for a in symbols for b in symbols if a.startswith("~"))
+    assert SymbolDecoder().verify_roundtrip(distilled, result)
+
+
+def test_decode_many_and_corruption_detection():
+    distiller = PromptDistiller()
+    distilled = distiller.distill_many([f"step {i}: run job {i}" for i in range(12)])
+    encoder = SymbolEncoder()
+    results = encoder.encode_many(distilled)
+    decoded = SymbolDecoder().decode_many(results, executor="thread", max_workers=3, chunk_size=4)
+    assert [item.fields for item in decoded] == [graph_fields(item) for item in distilled]
+
+    tampered = results[0]
+    tampered.payload = tampered.payload + "\x00"
+    assert SymbolDecoder().verify_roundtrip(distilled[0], tampered) is False
+
+
+def test_trie_insert_and_remove():
+    trie = SymbolTrie({"a": "alpha", "~81": "x", "~82": "y"})
+    assert trie.split("a~82a") == ["alpha", "y", "alpha"]
+    trie.remove("~82")
+    assert len(trie) == 2
+    assert trie.split("~81") == ["x"]
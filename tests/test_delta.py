@@ -0,0 +1,47 @@
+import pytest
+
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.delta import DeltaDecoder, DeltaEncoder, run_length_decode, run_length_encode
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+
+
+def test_iterative_turns_become_substitution_scripts():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder(FeatureFlags(enabled={FeatureFlag.ASCII_CORE}), session=True)
+    decoder = SymbolDecoder(session=True)
+    delta_encoder, delta_decoder = DeltaEncoder(window=4), DeltaDecoder(window=4)
+    sent = full = 0
+    for step in range(6):
+        distilled = distiller.distill(
+            f"Goal: refactor parser. Owner: alice. attempt={step}. Tests: failing. Deadline: friday. Scope: tokenizer module."
+        )
+        result = encoder.encode(distilled)
+        message = delta_encoder.encode(result.payload)
+        if step:
+            assert message.startswith("=1|")
+        restored = delta_decoder.decode(message)
+        assert restored == result.payload
+        assert decoder.decode(restored, result.dictionary, result.retired).fields == graph_fields(distilled)
+        sent += len(message)
+        full += len(result.payload)
+    assert sent < full * 0.7
+    assert (delta_encoder.full_messages, delta_encoder.delta_messages) == (1, 5)
+
+
+def test_best_reference_is_chosen_from_window():
+    encoder, decoder = DeltaEncoder(window=3), DeltaDecoder(window=3)
+    payloads = ["~a|AAAA|BBBB|CCCC", "~a|XXXX|YYYY|ZZZZ", "~a|QQQQ|RRRR", "~a|AAAA|BBBB|CCCC|DDDD"]
+    messages = [encoder.encode(payload) for payload in payloads]
+    assert messages[3] == "=3|^0.4|DDDD"
+    assert [decoder.decode(message) for message in messages] == payloads
+
+
+def test_run_length_hints_roundtrip():
+    fields = ["~a", "ABCD", "ABCD", "ABCD", "ABCD", "x", "x"]
+    encoded = run_length_encode(fields)
+    assert encoded == "~a|ABCD|~#3|x|x"
+    assert run_length_decode(encoded.split("|")) == fields
+    with pytest.raises(ValueError):
+        DeltaDecoder().decode("=2|^0")
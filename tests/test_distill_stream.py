@@ -0,0 +1,52 @@
+import random
+
+from min_tokenization_translator.distiller import DistillStream, PromptDistiller
+
+TRANSCRIPT = (
+    "Diagnosis: pneumonia.\n  dosage=500mg; Return plan -> taper antibiotics - monitor temp * "
+    "recheck bp.  Diagnosis: pneumonia. ... the and. Patient   stable -\tlog it. "
+) * 20
+
+
+def _random_chunks(text, rng):
+    chunks, index = [], 0
+    while index < len(text):
+        step = rng.randint(0, 7)
+        chunks.append(text[index : index + step])
+        index += step
+    return chunks
+
+
+def test_stream_matches_batch_distill_for_any_chunking():
+    distiller = PromptDistiller()
+    context = {"priority": "high", "Diagnosis": "pneumonia"}
+    expected = distiller.distill(TRANSCRIPT, context)
+    rng = random.Random(7)
+    for _ in range(25):
+        residual = []
+        stream = DistillStream(distiller, context, on_residual=residual.append)
+        entries = []
+        for chunk in _random_chunks(TRANSCRIPT, rng):
+            entries.extend(stream.feed(chunk))
+        entries.extend(stream.close())
+        assert entries == expected.graph
+        assert ". ".join(residual) == expected.residual_note
+        assert stream.metrics == expected.metrics
+
+
+def test_distill_stream_generator_yields_incrementally():
+    distiller = PromptDistiller()
+    chunks = iter(["Diagnosis: flu. dose", "=5mg. plan -> rest", ""])
+    entries = distiller.distill_stream(chunks)
+    first = next(entries)
+    assert first["canonical"] == "diag flu"
+    assert [entry["type"] for entry in entries] == ["assign", "flow"]
+
+
+def test_stream_dedup_state_is_bounded():
+    stream = DistillStream(PromptDistiller(), max_tracked=3)
+    for index in range(10):
+        stream.feed(f"item {index}. ")
+    stream.close()
+    assert len(stream._seen) == 3
+    assert len(stream._buffer) == 0
@@ -0,0 +1,130 @@
+import random
+import re
+
+import pytest
+
+from min_tokenization_translator.distiller import DistilledPrompt, PromptDistiller
+
+
+class ReferenceDistiller(PromptDistiller):
+    """Regex-per-call implementation the compiled engine must reproduce byte for byte."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._statement_pattern = re.compile(r"[:=\-]>?|\breturns?\b|\binclude\b", re.IGNORECASE)
+
+    def distill(self, raw_prompt, context=None):
+        context = context or {}
+        cleaned = re.sub(r"\s+", " ", raw_prompt).strip()
+        segments = re.split(r"[.;\n]|(?:\s-\s)|(?:\s\*\s)", cleaned)
+        graph, residual_parts, lexicon = [], [], {}
+        seen, analyzed, deduplicated = set(), 0, 0
+        for candidate in segments:
+            segment = candidate.strip(" -*")
+            if not segment:
+                continue
+            analyzed += 1
+            canonical, entry = self._reference_normalize(segment)
+            if not canonical:
+                residual_parts.append(segment)
+                continue
+            if canonical in seen:
+                deduplicated += 1
+                continue
+            seen.add(canonical)
+            lexicon[canonical] = segment
+            graph.append(entry)
+        for name, value in context.items():
+            canonical = self._reference_canonicalize(f"{name}:{value}")
+            if canonical not in seen:
+                seen.add(canonical)
+                lexicon[canonical] = f"{name}:{value}"
+                graph.append(
+                    {
+                        "type": "context",
+                        "key": self._reference_canonicalize(name),
+                        "value": value.strip(),
+                        "canonical": canonical,
+                    }
+                )
+        metrics = {
+            "segments_analyzed": analyzed,
+            "segments_deduplicated": deduplicated,
+            "graph_size": len(graph),
+            "residual_segments": len(residual_parts),
+        }
+        return DistilledPrompt(graph=graph, residual_note=". ".join(residual_parts), lexicon=lexicon, metrics=metrics)
+
+    def _reference_normalize(self, segment):
+        canon = self._reference_canonicalize
+        if ":" in segment:
+            key, value = segment.split(":", 1)
+            return canon(key + ":" + value), {
+                "type": "kv",
+                "key": canon(key),
+                "value": value.strip(),
+                "canonical": canon(key + ":" + value),
+            }
+        arrow_match = re.search(r"(.*?)->(.*)", segment)
+        if arrow_match:
+            left, right = arrow_match.group(1).strip(), arrow_match.group(2).strip()
+            canonical = canon(left + "->" + right)
+            return canonical, {"type": "flow", "source": canon(left), "target": canon(right), "canonical": canonical}
+        equal_match = re.search(r"(.*?)=(.*)", segment)
+        if equal_match:
+            left, right = equal_match.group(1).strip(), equal_match.group(2).strip()
+            canonical = canon(left + "=" + right)
+            return canonical, {"type": "assign", "lhs": canon(left), "rhs": right.strip(), "canonical": canonical}
+        canonical = canon(segment)
+        if self._statement_pattern.search(segment) or canonical:
+            return canonical, {"type": "statement", "value": segment.strip(), "canonical": canonical}
+        return "", {}
+
+    def _reference_canonicalize(self, text):
+        normalized = []
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            token = self._SYNONYMS.get(token, token)
+            if token in self._STOP_WORDS:
+                continue
+            normalized.append(token)
+        return " ".join(normalized)
+
+
+PROMPTS = [
+    "Diagnosis: pneumonia. dosage=500mg. Return plan -> taper antibiotics.",
+    "Please ensure the patient temperature is logged; make that a priority.",
+    "a - b * c - the - and. ; : = -> ==",
+    "Return dose: 5mg.\nReturn dose: 5mg. return   DOSE : 5MG",
+    "x=y=z. a->b->c. k: v: w. -> lone arrow. =lone equals. :lone colon",
+    "Include the analysis\tof blood pressure and meds.  \x1c Analyse it.",
+    "İstanbul Kelvin: ΣIGMA. café -> naïve",
+    "   ",
+    "",
+    "- leading dash - trailing dash -",
+    "* bullet one * bullet two *",
+]
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_compiled_distiller_matches_reference(prompt):
+    context = {"Priority ": " High ", "the": "and", "patient": "Diagnosis: flu"}
+    for ctx in (None, context):
+        assert PromptDistiller().distill(prompt, ctx) == ReferenceDistiller().distill(prompt, ctx)
+
+
+def test_compiled_distiller_matches_reference_on_random_prompts():
+    rng = random.Random(1729)
+    vocabulary = ["the", "Dosage", "meds", "pt", "x1", "->", "=", ":", ".", ";", " - ", " * ", "\n", "\t", "Return", "é"]
+    distiller = PromptDistiller(cache_size=8)
+    reference = ReferenceDistiller()
+    for _ in range(300):
+        prompt = "".join(rng.choice(vocabulary) + rng.choice(["", " "]) for _ in range(rng.randint(0, 30)))
+        assert distiller.distill(prompt) == reference.distill(prompt)
+
+
+def test_canonical_memo_is_bounded():
+    distiller = PromptDistiller(cache_size=4)
+    for index in range(50):
+        distiller.distill(f"item {index}: value {index}")
+    info = distiller._canonicalize.cache_info()
+    assert info.currsize <= 4
@@ -0,0 +1,82 @@
+import os
+import pickle
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.domains import DomainRegistry, DomainVocabulary
+from min_tokenization_translator.session_store import SessionState
+
+
+def test_builtin_domains_are_listed_without_importing():
+    script = textwrap.dedent(
+        """
+        import sys
+        from min_tokenization_translator.domains import DomainRegistry
+        registry = DomainRegistry(discover=False)
+        assert {"code", "finance", "medical"} <= set(registry.names())
+        assert not [name for name in sys.modules if "domain_plugins." in name]
+        registry.distiller("finance")
+        assert [name for name in sys.modules if "domain_plugins." in name] == ["min_tokenization_translator.domain_plugins.finance"]
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+
+
+def test_domain_distillers_use_their_vocabulary():
+    registry = DomainRegistry(discover=False)
+    finance = registry.distiller("finance").distill("Transfer amount: 500 dollars. Check account balance")
+    assert [entry["canonical"] for entry in finance.graph] == ["xfer amt 500 usd", "check acct bal"]
+    code = registry.distiller("code").distill("Refactor the function parameters")
+    assert code.graph[0]["canonical"] == "refactor fn param"
+    assert registry.distiller("finance") is registry.distiller("finance")
+    assert registry.loaded() == ["code", "finance"]
+    assert registry.distiller().domain == ""
+
+
+def test_default_and_unknown_domains():
+    registry = DomainRegistry(default="medical", discover=False)
+    assert registry.distiller(None).domain == "medical"
+    with pytest.raises(ValueError, match="Unknown domain"):
+        registry.distiller("astrology")
+
+
+def test_registered_vocabulary_and_factory():
+    registry = DomainRegistry(discover=False)
+    registry.register("legal", DomainVocabulary("legal", {"plaintiff": "pl"}))
+    registry.register("ops", lambda: DomainVocabulary("ops", {"deployment": "deploy"}))
+    assert registry.distiller("legal").distill("Plaintiff: acme").graph[0]["canonical"] == "pl acme"
+    assert registry.distiller("ops").distill("deployment -> staging").graph[0]["canonical"] == "deploy staging"
+    registry.register("broken", lambda: {"not": "a vocabulary"})
+    with pytest.raises(ValueError, match="DomainVocabulary"):
+        registry.distiller("broken")
+
+
+def test_compiled_tables_are_cached_on_disk(tmp_path, monkeypatch):
+    registry = DomainRegistry(cache_dir=tmp_path, discover=False)
+    table = registry.token_table("medical")
+    assert table["patient"] == "pt" and table["the"] == ""
+    [cached] = tmp_path.glob("medical-*.mtd")
+
+    # A warm cache is served without touching the plugin.
+    fresh = DomainRegistry(cache_dir=tmp_path, discover=False)
+    monkeypatch.setattr(fresh, "vocabulary", lambda name: pytest.fail("plugin was imported"))
+    assert fresh.token_table("medical") == table
+
+    cached.write_bytes(b"garbage")
+    assert DomainRegistry(cache_dir=tmp_path, discover=False).token_table("medical") == table
+
+
+def test_distiller_pickles_its_table_and_sessions_keep_the_domain():
+    distiller = DomainRegistry(discover=False).distiller("medical")
+    restored = pickle.loads(pickle.dumps(distiller))
+    assert restored.domain == "medical"
+    assert restored.distill("Patient history: asthma").graph[0]["canonical"] == "pt hx asthma"
+    assert PromptDistiller().domain == ""
+
+    state = SessionState("s1", domain="finance")
+    assert SessionState.from_bytes("s1", state.to_bytes()).domain == "finance"
+    assert SessionState.from_bytes("s1", b'{"f": ""}').domain == ""
@@ -21,3 +21,36 @@ def test_requires_helpers():
     flags.enable(FeatureFlag.UNICODE_OVERLAY, FeatureFlag.SERIALIZATION)
     assert flags.requires_unicode_support() is True
     assert flags.requires_serialization() is True
+
+
+def test_mask_tables_match_payloads():
+    flags = FeatureFlags(enabled={FeatureFlag.CHECKSUM_BLOCKS, FeatureFlag.ASCII_CORE})
+    assert flags.mask == FeatureFlag.ASCII_CORE.bit | FeatureFlag.CHECKSUM_BLOCKS.bit
+    assert flags.as_payload() == "~a~c"
+    for mask in range(256):
+        payload = flags.params.encode_mask(mask)
+        assert flags.params.decode_mask(payload) == mask
+    # Non-canonical order still decodes through the fallback parser.
+    assert flags.params.decode_flags("~c~a") == {FeatureFlag.ASCII_CORE, FeatureFlag.CHECKSUM_BLOCKS}
+
+
+def test_intersect_negotiates_common_capabilities():
+    local = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.SERIALIZATION, FeatureFlag.MCP_TOOLING})
+    remote = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.MCP_TOOLING, FeatureFlag.REUSABLE_KEYS})
+    common = local.intersect(remote)
+    assert common.enabled == {FeatureFlag.ASCII_CORE, FeatureFlag.MCP_TOOLING}
+    assert FeatureFlags.from_mask(common.mask) == common
+
+
+def test_enabled_set_view_stays_compatible():
+    flags = FeatureFlags()
+    flags.enabled.add(FeatureFlag.SERIALIZATION)
+    flags.enabled.discard(FeatureFlag.ASCII_CORE)
+    assert flags.mask == FeatureFlag.SERIALIZATION.bit
+    assert flags.enabled == {FeatureFlag.SERIALIZATION} and len(flags.enabled) == 1
+    flags.enabled = {FeatureFlag.ASCII_CORE, FeatureFlag.MCP_TOOLING}
+    assert flags.requires_serialization() is False and FeatureFlag.MCP_TOOLING in flags.enabled
+
+    copied = flags.copy(enabled={FeatureFlag.ASCII_CORE})
+    assert copied.enabled == {FeatureFlag.ASCII_CORE} and copied.params is flags.params
+    assert flags.copy() == flags and flags.copy() is not flags
@@ -0,0 +1,64 @@
+import pytest
+
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import DistilledPrompt, PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+from min_tokenization_translator.frames import FrameStore
+
+FLAGS = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.RELATIONAL_CONTEXT})
+
+
+def _entry(key, value):
+    return {"type": "fact", "key": key, "value": value, "source": "brief", "target": "plan", "canonical": f"{key} {value}"}
+
+
+def test_repeated_frames_are_recalled_and_merged():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder(FLAGS, session=True)
+    decoder = SymbolDecoder(session=True)
+    plain = SymbolEncoder(FeatureFlags(enabled={FeatureFlag.ASCII_CORE}), session=True)
+    framed_total = plain_total = 0
+    for step in range(8):
+        distilled = distiller.distill(f"Goal: ship release. Owner: alice. step={step}. Deadline: friday.")
+        result = encoder.encode(distilled)
+        framed_total += len(result.payload)
+        plain_total += len(plain.encode(distilled).payload)
+        assert decoder.decode_result(result).fields == graph_fields(distilled)
+        if step:
+            assert "|'0'1|" in result.payload
+    assert framed_total < plain_total
+
+
+def test_near_repeat_is_sent_as_delta():
+    encoder = SymbolEncoder(FLAGS, session=True)
+    decoder = SymbolDecoder(session=True)
+    first = DistilledPrompt(graph=[_entry("owner", "alice"), _entry("status", "open")], residual_note="")
+    second = DistilledPrompt(graph=[_entry("owner", "alice"), _entry("status", "closed")], residual_note="")
+    for distilled in (first, second):
+        result = encoder.encode(distilled)
+        assert decoder.decode_result(result).fields == graph_fields(distilled)
+    fields = result.payload.split("|")
+    assert fields[1] == "'0"
+    assert fields[2].startswith("=1/")
+
+
+def test_frame_store_is_bounded_and_reuses_lru_index():
+    store = FrameStore(max_frames=2)
+    assert store.add(("a", "b")) == 0
+    assert store.add(("c", "d")) == 1
+    store.recall(0)
+    assert store.add(("e", "f")) == 1
+    assert ("c", "d") not in store and len(store) == 2
+    assert store.nearest(("a", "x")) == (0, [1])
+    with pytest.raises(ValueError):
+        store.recall(7)
+
+
+def test_bounded_session_stays_decodable():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder(FLAGS, session=True, max_frames=3)
+    decoder = SymbolDecoder(session=True, max_frames=3)
+    for turn in range(12):
+        distilled = distiller.distill(f"task {turn % 5}: run job. owner={turn % 3}. plan -> item {turn % 4}")
+        assert decoder.decode_result(encoder.encode(distilled)).fields == graph_fields(distilled)
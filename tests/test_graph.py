@@ -0,0 +1,67 @@
+import copy
+import pickle
+
+from min_tokenization_translator.distiller import DistilledPrompt, PromptDistiller
+from min_tokenization_translator.encoder import ENTRY_KEYS
+from min_tokenization_translator.graph import CompactGraph
+
+ENTRIES = [
+    {"type": "kv", "key": "owner", "value": "alice", "canonical": "owner alice"},
+    {"type": "flow", "source": "plan", "target": "rest", "canonical": "plan rest"},
+    {"type": "kv", "key": "owner", "value": "bob", "canonical": "owner bob"},
+]
+
+
+def test_dict_view_matches_entries():
+    graph = CompactGraph(ENTRIES)
+    assert len(graph) == 3
+    assert graph == ENTRIES and ENTRIES == graph
+    assert list(graph) == ENTRIES
+    assert graph[1] == ENTRIES[1] and graph[-1] == ENTRIES[-1]
+    assert graph[0:2] == ENTRIES[0:2]
+    assert [list(entry) for entry in graph] == [list(entry) for entry in ENTRIES]
+    assert graph != ENTRIES[:2]
+
+
+def test_strings_are_interned_once():
+    graph = CompactGraph(ENTRIES).compact()
+    assert len(graph.strings) == len({value for entry in ENTRIES for value in entry.values()})
+    assert graph.value_counts()[:2] == [("kv", 2), ("owner", 2)]
+    graph.append({"type": "statement", "value": "stable", "canonical": "stable"})
+    assert graph[3]["value"] == "stable"
+
+
+def test_iter_values_projects_onto_keys():
+    graph = CompactGraph(ENTRIES)
+    assert list(graph.iter_values(("canonical", "type", "missing"))) == [
+        ["owner alice", "kv"],
+        ["plan rest", "flow"],
+        ["owner bob", "kv"],
+    ]
+    assert next(graph.iter_values()) == list(ENTRIES[0].values())
+
+
+def test_pickle_and_copy_round_trip():
+    graph = CompactGraph(ENTRIES).compact()
+    assert pickle.loads(pickle.dumps(graph)) == graph
+    assert copy.deepcopy(graph) == graph
+
+
+def test_distilled_prompt_holds_compact_graph():
+    distilled = PromptDistiller().distill("Owner: alice. plan -> rest. dose=5mg. Patient stable")
+    assert isinstance(distilled.graph, CompactGraph)
+    assert isinstance(DistilledPrompt(graph=list(ENTRIES), residual_note="").graph, CompactGraph)
+    fields = [[entry[key] for key in ENTRY_KEYS if entry.get(key)] for entry in distilled.graph]
+    assert [values for values in distilled.graph.iter_values(ENTRY_KEYS)] == fields
+
+
+def test_entries_are_snapshots_and_shapes_are_per_graph():
+    graph = CompactGraph(ENTRIES)
+    graph[0]["value"] = "mallory"
+    next(iter(graph))["value"] = "mallory"
+    assert graph == ENTRIES
+    assert CompactGraph([{"only": "x"}]).shape_table == [("only",)]
+
+    wide = CompactGraph({f"k{index}": "v"} for index in range(70000))
+    assert len(wide.shape_table) == 70000 and wide[-1] == {"k69999": "v"}
+    assert pickle.loads(pickle.dumps(wide))[69999] == {"k69999": "v"}
@@ -27,3 +27,22 @@ def test_handshake_packet_roundtrip(tmp_path):
     assert protocol_version == config.protocol_version
     assert tokenizer == "unit-test-tokenizer"
     assert decoded_flags.enabled == flags.enabled
+
+
+def test_binary_packet_roundtrip_from_memoryview(tmp_path):
+    flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.RELATIONAL_CONTEXT})
+    config = HandshakeConfig(key_dir=tmp_path, tokenizer_fingerprint="unit-test-tokenizer")
+    manager = HandshakeManager(config, flags)
+
+    with mock.patch.object(manager, "_generate_keypair", return_value=_fake_keypair(tmp_path)):
+        artifacts = manager.prepare_handshake()
+
+    packet = manager.build_binary_packet(artifacts)
+    assert len(packet) < len(manager.build_handshake_packet(artifacts))
+    protocol_version, tokenizer, decoded_flags = manager.parse_remote_packet(memoryview(packet))
+
+    assert protocol_version == config.protocol_version
+    assert tokenizer == "unit-test-tokenizer"
+    assert decoded_flags == flags
+    text_packet = manager.build_handshake_packet(artifacts).encode("utf-8")
+    assert manager.parse_remote_packet(text_packet)[2] == flags
@@ -0,0 +1,49 @@
+import time
+from pathlib import Path
+from unittest import mock
+
+from min_tokenization_translator.config import FeatureFlags
+from min_tokenization_translator.handshake import HandshakeConfig, HandshakeManager
+from min_tokenization_translator.keypool import KeyPool, KeyPoolConfig
+
+
+def _fake_generator(key_path: Path, key_type: str) -> Path:
+    key_path.write_text("PRIVATE", encoding="utf-8")
+    key_path.with_suffix(".pub").write_text(f"ssh-{key_type} AAAAfake", encoding="utf-8")
+    return key_path
+
+
+def test_pool_hands_out_each_key_once_and_counts_misses(tmp_path):
+    pool = KeyPool(tmp_path, KeyPoolConfig(size=2), generator=_fake_generator)
+    pool.fill()
+    keys = {pool.acquire(), pool.acquire(), pool.acquire()}
+    stats = pool.stats()
+    assert len(keys) == 3
+    assert (stats.hits, stats.misses, stats.generated) == (2, 1, 3)
+    assert all(key.exists() and key.with_suffix(".pub").exists() for key in keys)
+
+
+def test_background_refill_and_secure_disposal(tmp_path):
+    with KeyPool(tmp_path, KeyPoolConfig(size=3, refill_interval=0.0), generator=_fake_generator) as pool:
+        deadline = time.monotonic() + 5
+        while pool.stats().ready < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        key = pool.acquire()
+        assert pool.stats().hits == 1
+        with mock.patch("os.fsync") as fsync:
+            pool.dispose(key)
+        assert fsync.called
+        assert not key.exists() and not key.with_suffix(".pub").exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_handshake_manager_draws_session_keys_from_pool(tmp_path):
+    pool = KeyPool(tmp_path / "pool", KeyPoolConfig(size=1), generator=_fake_generator)
+    pool.fill()
+    manager = HandshakeManager(HandshakeConfig(key_dir=tmp_path / "keys"), FeatureFlags(), key_pool=pool)
+    artifacts = manager.prepare_handshake()
+    assert artifacts.public_key == "ssh-ed25519 AAAAfake"
+    assert pool.stats().hits == 1
+    assert not (tmp_path / "keys").exists()
+    manager.dispose_artifacts(artifacts)
+    assert not artifacts.private_key_path.exists()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from min_tokenization_translator.limiter import Overloaded, RouteLimiter, RouteLimits, ServingPools
+
+
+def test_queue_cap_rejects_with_429_and_slots_recover():
+    async def scenario():
+        pools = ServingPools(cpu_workers=2, blocking_workers=1)
+        limiter = pools.cpu_route("distill", RouteLimits(max_concurrency=1, max_queue=1, deadline=None))
+        gate = threading.Event()
+        running = asyncio.ensure_future(limiter.run(gate.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(limiter.run(lambda: "queued"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.run(lambda: "rejected")
+        gate.set()
+        assert await running is True
+        assert await queued == "queued"
+        assert await limiter.run(lambda value: value * 2, 21) == 42
+        pools.shutdown()
+        return excinfo.value, limiter.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.retry_after_header == "1"
+    assert (stats.completed, stats.rejected, stats.active, stats.queued) == (3, 1, 0, 0)
+
+
+def test_deadline_returns_503_and_holds_slot_until_job_finishes():
+    async def scenario():
+        limiter = RouteLimiter("handshake", RouteLimits(max_concurrency=1, max_queue=4, deadline=0.05, retry_after=2.5))
+        gate = threading.Event()
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.run(gate.wait)
+        assert limiter.stats().active == 1
+        gate.set()
+        await asyncio.sleep(0.05)
+        return excinfo.value, limiter.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.retry_after_header == "3"
+    assert stats.active == 0 and stats.timed_out == 1
+
+
+def test_limits_from_env(monkeypatch):
+    monkeypatch.setenv("MTT_DISTILL_CONCURRENCY", "3")
+    monkeypatch.setenv("MTT_DISTILL_DEADLINE", "0")
+    limits = RouteLimits.from_env("MTT_DISTILL")
+    assert limits.max_concurrency == 3
+    assert limits.deadline is None
@@ -0,0 +1,118 @@
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from min_tokenization_translator.benchmark import measure_metrics_overhead
+from min_tokenization_translator.config import FeatureFlags
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder
+from min_tokenization_translator.handshake import HandshakeConfig, HandshakeManager
+from min_tokenization_translator.metrics import MetricsRegistry, ServiceMetrics
+
+
+def test_sharded_counter_and_histogram_sum_across_threads():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.")
+    histogram = registry.histogram("job_seconds", "Job time.", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value == 8000
+    assert histogram.value == {"count": 8000, "sum": 4000.0, "buckets": {"0.1": 0, "1": 8000, "+Inf": 8000}}
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests\nserved.", ["path"]).labels('/a"b').inc(2)
+    registry.gauge("queue_depth", "Queued items.").set(3)
+    with registry.histogram("latency_seconds", "Latency.", buckets=(0.5,)).time():
+        pass
+    registry.gauge("pool_size", "Callback gauge.", function=lambda: 7)
+
+    text = registry.render()
+    assert "# HELP requests_total Requests\\nserved.\n# TYPE requests_total counter\n" in text
+    assert 'requests_total{path="/a\\"b"} 2\n' in text
+    assert "queue_depth 3\n" in text
+    assert 'latency_seconds_bucket{le="0.5"} 1\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "latency_seconds_count 1\n" in text and "latency_seconds_sum " in text
+    assert "pool_size 7\n" in text
+    assert registry.snapshot()["requests_total"] == {'path="/a\\"b"': 2}
+
+
+def test_registration_and_disabled_registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total", "Hits.")
+    assert registry.counter("hits_total", "Hits.") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total", "Hits.")
+    with pytest.raises(ValueError):
+        registry.counter("bad-name", "Invalid.")
+
+    disabled = MetricsRegistry(enabled=False)
+    metric = disabled.histogram("x_seconds", "Ignored.", ["stage"])
+    metric.labels("a").observe(1.0)
+    with metric.time():
+        pass
+    assert disabled.render() == "" and disabled.snapshot() == {}
+
+
+def test_service_metrics_record_pipeline_and_caches():
+    metrics = ServiceMetrics(MetricsRegistry())
+    distiller = PromptDistiller()
+    prompt = "Diagnosis: flu. dosage=5mg. plan -> rest. plan -> rest. misc note"
+    distilled = distiller.distill(prompt)
+    result = SymbolEncoder().encode(distilled)
+    metrics.distilled("medical", prompt, distilled, 0.002)
+    metrics.encoded(prompt, result, 0.001)
+    metrics.handshake(0.2, resumed=False, keygen_seconds=0.15)
+    metrics.handshake(0.01, resumed=True)
+    metrics.track_cache("canonical", distiller.cache_stats)
+
+    snapshot = metrics.registry.snapshot()
+    assert snapshot["mtt_distill_seconds"]['domain="medical"']["count"] == 1
+    assert snapshot["mtt_prompt_bytes_total"] == len(prompt)
+    assert snapshot["mtt_payload_bytes_total"] >= len(result.payload)
+    assert snapshot["mtt_segments_total"]['outcome="deduplicated"'] == distilled.metrics["segments_deduplicated"]
+    assert snapshot["mtt_token_savings_ratio"]["count"] == 1
+    assert snapshot["mtt_handshake_seconds"]['outcome="resumed"']["count"] == 1
+    assert snapshot["mtt_keygen_seconds"]["count"] == 1
+    hits, misses = distiller.cache_stats()
+    assert misses > 0
+    assert snapshot["mtt_cache_hits_total"] == {'cache="canonical"': hits}
+    assert snapshot["mtt_cache_misses_total"] == {'cache="canonical"': misses}
+
+
+def test_prepare_handshake_reports_keygen_time(tmp_path: Path):
+    manager = HandshakeManager(HandshakeConfig(key_dir=tmp_path), FeatureFlags())
+    key_path = tmp_path / "key"
+    key_path.write_text("PRIVATE", encoding="utf-8")
+    key_path.with_suffix(".pub").write_text("ssh-ed25519 AAAACfakekey", encoding="utf-8")
+    with mock.patch.object(manager, "_generate_keypair", return_value=key_path):
+        artifacts = manager.prepare_handshake()
+    assert artifacts.keygen_seconds >= 0.0
+
+
+def test_measure_metrics_overhead_reports_every_figure():
+    report = measure_metrics_overhead(["Summarize the report. plan -> ship"] * 5, runs=1, iterations=100)
+    assert set(report) == {
+        "counter_inc_ns",
+        "histogram_observe_ns",
+        "labelled_observe_ns",
+        "disabled_call_ns",
+        "pipeline_overhead_pct",
+        "render_ms",
+    }
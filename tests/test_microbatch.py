@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from min_tokenization_translator.limiter import Overloaded, RouteLimiter, RouteLimits
+from min_tokenization_translator.microbatch import MicroBatcher
+
+
+def test_concurrent_submissions_are_coalesced():
+    seen = []
+
+    def process(items):
+        seen.append(list(items))
+        return [item * 10 for item in items]
+
+    async def scenario():
+        limiter = RouteLimiter("distill", RouteLimits(max_concurrency=2, max_queue=4))
+        batcher = MicroBatcher(process, max_batch=4, max_delay=0.01, runner=limiter.run)
+        results = await asyncio.gather(*(batcher.submit(value) for value in range(6)))
+        return results, batcher
+
+    results, batcher = asyncio.run(scenario())
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert seen == [[0, 1, 2, 3], [4, 5]]
+    assert (batcher.batches, batcher.items) == (2, 6)
+
+
+def test_stream_yields_every_index_and_reports_failures():
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad batch")
+        return [item.upper() for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_batch=2, max_delay=0.001)
+        return [pair async for pair in batcher.stream(["a", "b", "c", "bad", "e"], window=2)]
+
+    pairs = dict(asyncio.run(scenario()))
+    assert sorted(pairs) == [0, 1, 2, 3, 4]
+    assert (pairs[0], pairs[1], pairs[2], pairs[4]) == ("A", "B", "C", "E")
+    assert isinstance(pairs[3], ValueError)
+
+
+def test_pending_items_are_bounded():
+    async def scenario():
+        batcher = MicroBatcher(lambda items: items, max_batch=8, max_delay=0.05, max_pending=2, retry_after=3)
+        first = asyncio.ensure_future(batcher.submit(1))
+        second = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as rejected:
+            await batcher.submit(3)
+        assert await asyncio.gather(first, second) == [1, 2]
+        assert batcher.outstanding == 0 and await batcher.submit(4) == 4
+        return rejected.value, batcher
+
+    error, batcher = asyncio.run(scenario())
+    assert (error.status_code, error.retry_after_header, batcher.rejected) == (429, "3", 1)
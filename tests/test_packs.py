@@ -0,0 +1,65 @@
+import pytest
+
+from min_tokenization_translator.packs import Pack, PackRegistry, encode_pack
+
+
+ENTRIES = {"customer support": "!", "refund policy": "@", "résumé": "é", "escalate": "#"}
+
+
+def test_pack_lookup_is_lazy_and_bidirectional(tmp_path):
+    registry = PackRegistry(tmp_path)
+    pack_id = registry.add(ENTRIES, name="support")
+    assert registry.add(dict(reversed(ENTRIES.items())), name="support") == pack_id
+    assert len(list(tmp_path.glob("*.mtp"))) == 1
+
+    pack = registry.get(pack_id)
+    assert pack.name == "support"
+    assert len(pack) == 4
+    assert pack.symbol_for("refund policy") == "@"
+    assert pack.symbol_for("résumé") == "é"
+    assert pack.phrase_for("#") == "escalate"
+    assert pack.symbol_for("missing") is None and pack.phrase_for("?") is None
+    assert pack.to_dict() == ENTRIES
+    assert registry.verify(pack_id)
+
+
+def test_registry_index_survives_reload_and_manifest_roundtrip(tmp_path):
+    source = PackRegistry(tmp_path / "a")
+    pack_id = source.add(ENTRIES, name="support")
+    manifest = source.export_manifest(pack_id)
+
+    reloaded = PackRegistry(tmp_path / "a")
+    assert reloaded.pack_ids() == [pack_id]
+    assert reloaded.resolve(pack_id[:8]) == pack_id
+
+    target = PackRegistry(tmp_path / "b")
+    assert target.import_manifest(manifest) == pack_id
+    with pytest.raises(ValueError):
+        target.import_manifest({**manifest, "id": "0" * 64})
+    target.remove(pack_id)
+    assert pack_id not in target and not list((tmp_path / "b").glob("*.mtp"))
+
+
+def test_rejects_non_bijective_packs_and_foreign_files(tmp_path):
+    with pytest.raises(ValueError):
+        encode_pack({"a": "!", "b": "!"})
+    bogus = tmp_path / ("f" * 64 + ".mtp")
+    bogus.write_bytes(b"not a pack at all")
+    with pytest.raises(ValueError):
+        Pack(bogus)
+
+
+def test_preload_merges_packs_into_a_prefix_free_set(tmp_path):
+    registry = PackRegistry(tmp_path)
+    first = registry.add({"refund policy": "R", "escalate": "#", "bad": "|x", "framed": "[f"})
+    second = registry.add({"refund policy": "Q", "customer support": "R2", "ship": "S", "plan": "#"})
+    merged = registry.preload([first, second], reserved=["S"])
+    assert merged == {"refund policy": "R", "escalate": "#"}
+    assert registry.preload([second, first]) == {
+        "refund policy": "Q",
+        "ship": "S",
+        "plan": "#",
+        "customer support": "R2",
+    }
+    with pytest.raises(KeyError):
+        registry.preload(["0" * 64])
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from min_tokenization_translator.benchmark import measure_serialization
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.distiller import DistilledPrompt, PromptDistiller
+from min_tokenization_translator.serialization import (
+    decode_varint,
+    decode_varints,
+    deserialize_prompt,
+    encode_varint,
+    encode_varints,
+    read_frames,
+    serialize_prompt,
+    wants_serialization,
+    write_frame,
+)
+
+PROMPT = (
+    "Goal: refactor parser. Owner: alice. Tests: failing in ci. Deadline: friday. "
+    "Please ensure the patient dosage is checked; temperature high - analyse pressure trend. "
+    "Summarize medication changes and diagnosis notes for the ward."
+)
+
+
+def _distilled() -> DistilledPrompt:
+    return PromptDistiller().distill(PROMPT, context={"ward": "icu", "tz": "utc"})
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "lzma", "auto"])
+def test_round_trip_is_lossless(compression):
+    prompt = _distilled()
+    prompt.metrics["delta"] = -3
+    prompt.lexicon["naïve"] = "naïve → café"
+    restored = deserialize_prompt(serialize_prompt(prompt, compression))
+    assert restored == prompt
+    assert [list(entry) for entry in restored.graph] == [list(entry) for entry in prompt.graph]
+
+
+def test_binary_is_smaller_than_json():
+    prompt = _distilled()
+    as_json = json.dumps(
+        {"graph": list(prompt.graph), "residual_note": prompt.residual_note, "lexicon": prompt.lexicon, "metrics": prompt.metrics},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    assert len(serialize_prompt(prompt, "none")) < len(as_json) * 0.7
+    assert len(serialize_prompt(prompt, "zlib")) < len(serialize_prompt(prompt, "none"))
+
+
+def test_empty_prompt_and_auto_skips_compression_for_tiny_blobs():
+    empty = DistilledPrompt(graph=[], residual_note="")
+    blob = serialize_prompt(empty)
+    assert blob[3] == 0
+    assert deserialize_prompt(blob) == empty
+
+
+def test_rejects_malformed_blobs():
+    blob = serialize_prompt(_distilled(), "none")
+    with pytest.raises(ValueError):
+        deserialize_prompt(b"XX" + blob[2:])
+    with pytest.raises(ValueError):
+        deserialize_prompt(blob[:-5])
+    with pytest.raises(ValueError):
+        deserialize_prompt(blob + b"\x00")
+    with pytest.raises(ValueError):
+        serialize_prompt(_distilled(), "brotli")
+    with pytest.raises(ValueError, match="not valid Unicode"):
+        serialize_prompt(DistilledPrompt(graph=[], residual_note="broken \ud800 text"))
+
+
+def test_varints():
+    out = bytearray()
+    for value in (0, 127, 128, 300, 2**40):
+        encode_varint(value, out)
+    assert decode_varints(out) == [0, 127, 128, 300, 2**40]
+    assert decode_varint(out, 1) == (127, 2)
+    assert encode_varints([1, 2, 3]) == b"\x01\x02\x03"
+    with pytest.raises(ValueError):
+        decode_varints(b"\x80")
+
+
+def test_stream_frames():
+    prompt = _distilled()
+    stream = write_frame(3, serialize_prompt(prompt)) + write_frame(1, b"boom", ok=False)
+    frames = list(read_frames(stream))
+    assert [(frame.index, frame.ok) for frame in frames] == [(3, True), (1, False)]
+    assert frames[0].prompt() == prompt
+    with pytest.raises(ValueError, match="boom"):
+        frames[1].prompt()
+
+
+def test_flag_negotiation_and_benchmark():
+    assert not wants_serialization(None)
+    assert wants_serialization(FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.SERIALIZATION}))
+    report = measure_serialization([_distilled()], runs=1)
+    assert set(report) == {"json", "none", "zlib", "lzma"}
+    assert report["none"]["bytes"] < report["json"]["bytes"]
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from min_tokenization_translator import server  # noqa: E402
+from min_tokenization_translator.distiller import PromptDistiller  # noqa: E402
+from min_tokenization_translator.encoder import graph_fields  # noqa: E402
+from min_tokenization_translator.packs import PackRegistry  # noqa: E402
+from min_tokenization_translator.server import create_app  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def _blocking(monkeypatch, name, release, seconds=5.0):
+    original = getattr(server, name)
+
+    def slow(*args, **kwargs):
+        release.wait(seconds)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(server, name, slow)
+
+
+async def _concurrently(app, release, *requests):
+    """Send the first request, then the rest while it is blocked, then ``release`` it."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = asyncio.ensure_future(client.post(requests[0][0], json=requests[0][1]))
+        await asyncio.sleep(0.05)
+        rest = [await client.post(path, json=body) for path, body in requests[1:]]
+        release.set()
+        return [await first, *rest]
+
+
+def test_full_queue_is_rejected_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_HANDSHAKE_CONCURRENCY", "1")
+    monkeypatch.setenv("MTT_HANDSHAKE_QUEUE", "0")
+    monkeypatch.setenv("MTT_HANDSHAKE_RETRY_AFTER", "7")
+    release = threading.Event()
+    _blocking(monkeypatch, "bootstrap_environment", release)
+    first, second = asyncio.run(_concurrently(create_app(), release, ("/handshake", {}), ("/handshake", {})))
+    assert first.status_code == 200
+    assert second.status_code == 429 and second.headers["Retry-After"] == "7"
+
+
+def test_missed_deadline_is_503_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_HANDSHAKE_DEADLINE", "0.05")
+    release = threading.Event()
+    _blocking(monkeypatch, "bootstrap_environment", release, seconds=0.3)
+    with TestClient(create_app()) as client:
+        response = client.post("/handshake", json={})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+
+
+def test_batched_distill_admits_items_individually(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_DISTILL_CONCURRENCY", "1")
+    monkeypatch.setenv("MTT_DISTILL_QUEUE", "0")
+    release = threading.Event()
+    _blocking(monkeypatch, "_distill_batch", release)
+    request = ("/distill", {"prompt": "plan -> ship"})
+    first, second = asyncio.run(_concurrently(create_app(), release, request, request))
+    assert first.status_code == 200
+    assert second.status_code == 429 and "Retry-After" in second.headers
+    assert second.json()["detail"].startswith("distill:")
+
+
+def test_compress_queue_reports_its_own_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_DISTILL_CONCURRENCY", "1")
+    monkeypatch.setenv("MTT_DISTILL_QUEUE", "0")
+    release = threading.Event()
+    _blocking(monkeypatch, "_compress_batch", release)
+    request = ("/compress", {"prompt": "plan -> ship"})
+    first, second = asyncio.run(_concurrently(create_app(), release, request, request))
+    assert first.status_code == 200
+    assert second.status_code == 429 and second.json()["detail"].startswith("compress:")
+
+
+def test_distill_batch_streams_every_prompt(client):
+    prompts = ["plan -> ship", "Diagnosis: flu", "Check balance"]
+    response = client.post("/distill/batch", json={"prompts": prompts})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(record["index"] for record in records) == [0, 1, 2]
+    assert all(record["graph"] and "segments_analyzed" in record["metrics"] for record in records)
+    assert client.post("/distill/batch", json={"prompts": prompts, "contexts": [None]}).status_code == 422
+
+
+def test_metrics_endpoint(client, tmp_path, monkeypatch):
+    client.post("/distill", json={"prompt": "plan -> ship", "domain": "finance"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'mtt_distill_seconds_count{domain="finance"} 1' in response.text
+    assert "# TYPE mtt_cache_hits_total counter" in response.text
+
+    monkeypatch.setenv("MTT_METRICS_ENABLED", "0")
+    with TestClient(create_app()) as disabled:
+        assert disabled.get("/metrics").status_code == 404
+
+
+def test_session_compress_uses_negotiated_cost_table(tmp_path, monkeypatch):
+    costs = tmp_path / "costs"
+    costs.mkdir()
+    (costs / "pricey.json").write_text(json.dumps({"costs": {"!": 9}}), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_COST_DIRS", str(costs))
+    prompt = "plan -> ship. plan -> ship. Check balance"
+    with TestClient(create_app()) as client:
+        session_id = client.post("/handshake", json={"tokenizer": "pricey"}).json()["session_id"]
+        in_session = client.post("/compress", json={"prompt": prompt, "session_id": session_id}).json()
+        stateless = client.post("/compress", json={"prompt": prompt, "tokenizer": "pricey"}).json()
+        default = client.post("/compress", json={"prompt": prompt}).json()
+    assert "!" in default["dictionary"]
+    assert "!" not in in_session["dictionary"]
+    assert "!" not in stateless["dictionary"]
+
+
+def test_handshake_key_files_stay_bounded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_TICKET_CACHE_SIZE", "2")
+    key_dir = tmp_path / "workspace" / ".keys"
+    with TestClient(create_app()) as client:
+        for _ in range(6):
+            assert client.post("/handshake", json={}).status_code == 200
+            assert len(list(key_dir.iterdir())) <= 2 * 2
+    assert list(key_dir.iterdir()) == []
+
+
+def test_concurrent_session_turns_conflict(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_CPU_WORKERS", "2")
+    release = threading.Event()
+    calls = []
+    original = server.SymbolEncoder.restore_session
+
+    def restore_session(self, *args, **kwargs):
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5.0)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(server.SymbolEncoder, "restore_session", restore_session)
+    app = create_app()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            session_id = (await client.post("/handshake", json={})).json()["session_id"]
+        turn = ("/compress", {"prompt": "plan -> ship", "session_id": session_id})
+        return await _concurrently(app, release, turn, turn)
+
+    slow, fast = asyncio.run(scenario())
+    assert fast.status_code == 200
+    assert slow.status_code == 409
+
+
+def test_session_payloads_decode_through_session_id(client):
+    session_id = client.post("/handshake", json={}).json()["session_id"]
+    prompts = ["plan -> ship. Check balance", "plan -> ship. Check balance. plan -> rest", "Check balance"]
+    turns = [client.post("/compress", json={"prompt": prompt, "session_id": session_id}).json() for prompt in prompts]
+    for prompt, turn in zip(prompts, turns):
+        request = {key: turn[key] for key in ("payload", "dictionary", "retired")}
+        response = client.post("/decode", json={**request, "session_id": session_id})
+        assert response.status_code == 200
+        assert response.json()["fields"] == graph_fields(PromptDistiller().distill(prompt))
+
+    stateless = client.post("/decode", json={"payload": turns[1]["payload"], "dictionary": turns[1]["dictionary"]})
+    assert stateless.status_code == 422 and "session_id" in stateless.json()["detail"]
+    retired = client.post("/decode", json={"payload": "", "dictionary": {}, "retired": ["x"]})
+    assert retired.status_code == 422 and "session_id" in retired.json()["detail"]
+    unknown = client.post("/decode", json={"payload": "", "dictionary": {}, "session_id": "missing"})
+    assert unknown.status_code == 404
+
+
+def test_cost_table_is_resolved_once_per_session(tmp_path, monkeypatch):
+    costs = tmp_path / "costs"
+    costs.mkdir()
+    (costs / "pricey.json").write_text(json.dumps({"costs": {"!": 9}}), encoding="utf-8")
+    (costs / "broken.json").write_text("{", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MTT_COST_DIRS", str(costs))
+    calls = []
+    original = server.load_cost_table
+    monkeypatch.setattr(server, "load_cost_table", lambda *args: calls.append(args) or original(*args))
+    with TestClient(create_app()) as client:
+        session_id = client.post("/handshake", json={"tokenizer": "pricey"}).json()["session_id"]
+        for _ in range(3):
+            turn = client.post("/compress", json={"prompt": "plan -> ship", "session_id": session_id})
+            assert turn.status_code == 200 and "!" not in turn.json()["dictionary"]
+        assert len(calls) == 1
+        assert client.post("/handshake", json={"tokenizer": "../costs/pricey"}).status_code == 422
+        assert client.post("/compress", json={"prompt": "plan", "tokenizer": "../../etc/x"}).status_code == 422
+        assert client.post("/compress", json={"prompt": "plan", "tokenizer": "broken"}).status_code == 422
+
+
+def test_negotiated_pack_symbols_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    PackRegistry(tmp_path / "workspace" / "packs").add({"check balance": "Ω", "plan ship": "PS"}, name="finance")
+    prompt = "plan -> ship. Check balance"
+    with TestClient(create_app()) as client:
+        session_id = client.post("/handshake", json={}).json()["session_id"]
+        turn = client.post("/compress", json={"prompt": prompt, "session_id": session_id}).json()
+        request = {key: turn[key] for key in ("payload", "dictionary", "retired")}
+        decoded = client.post("/decode", json={**request, "session_id": session_id}).json()
+    assert "Ω" in turn["payload"] and "PS" in turn["payload"]
+    assert not {"check balance", "plan ship"} & set(turn["dictionary"].values())
+    assert not any(symbol.startswith("P") for symbol in turn["dictionary"])
+    assert decoded["fields"] == graph_fields(PromptDistiller().distill(prompt))
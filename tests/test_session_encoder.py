@@ -0,0 +1,51 @@
+import pytest
+
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+
+
+def test_session_symbols_stay_stable_and_results_carry_deltas():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder(FeatureFlags(enabled={FeatureFlag.ASCII_CORE}), session=True)
+    decoder = SymbolDecoder(session=True)
+
+    first = distiller.distill("Diagnosis: pneumonia. dosage=500mg.")
+    second = distiller.distill("Diagnosis: pneumonia. dosage=250mg.")
+    first_result = encoder.encode(first)
+    second_result = encoder.encode(second)
+
+    assert first_result.dictionary
+    assert not set(first_result.dictionary.values()) & set(second_result.dictionary.values())
+    assert first_result.payload.split("|")[1] == second_result.payload.split("|")[1]
+
+    assert decoder.decode_result(first_result).fields == graph_fields(first)
+    assert decoder.decode_result(second_result).fields == graph_fields(second)
+
+
+def test_session_eviction_retires_cold_symbols_and_stays_decodable():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder(session=True, max_symbols=12)
+    decoder = SymbolDecoder(session=True)
+    for turn in range(30):
+        distilled = distiller.distill(f"step {turn}: run job {turn % 4}. plan -> item {turn}")
+        result = encoder.encode(distilled)
+        assert len(encoder._token_to_symbol) <= 12
+        assert decoder.decode_result(result).fields == graph_fields(distilled)
+        if turn > 3:
+            assert result.retired
+
+
+def test_session_turn_larger_than_cap_is_rejected():
+    encoder = SymbolEncoder(session=True, max_symbols=2)
+    with pytest.raises(ValueError):
+        encoder.encode(PromptDistiller().distill("a: b. c: d. e: f"))
+
+
+def test_non_session_results_are_unchanged_by_history():
+    distiller = PromptDistiller()
+    encoder = SymbolEncoder()
+    encoder.encode(distiller.distill("warmup: turn"))
+    distilled = distiller.distill("Diagnosis: pneumonia")
+    assert encoder.encode(distilled) == SymbolEncoder().encode(distilled)
@@ -0,0 +1,188 @@
+import json
+import socketserver
+import threading
+
+import pytest
+
+from min_tokenization_translator.config import FeatureFlag, FeatureFlags
+from min_tokenization_translator.costs import SymbolCostTable
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder
+from min_tokenization_translator.session_store import (
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionState,
+    SQLiteSessionStore,
+    build_session_store,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeRespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        data = self.server.data
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b"SET":
+                data[args[1]] = args[2]
+                self.server.ttls[args[1]] = int(args[4])
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"MGET":
+                reply = [b"*%d\r\n" % (len(args) - 1)]
+                for key in args[1:]:
+                    value = data.get(key)
+                    reply.append(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+                self.wfile.write(b"".join(reply))
+            elif command == b"EVAL":
+                # Emulates the compare-and-set script behind RedisSessionStore.replace.
+                key, expected, value, milliseconds = args[3:7]
+                current = data.get(key)
+                if current is None or json.loads(current).get("v", 0) != int(expected):
+                    self.wfile.write(b":0\r\n")
+                else:
+                    data[key] = value
+                    self.server.ttls[key] = int(milliseconds)
+                    if self.server.drop_after_eval:
+                        # Applied, but the connection dies before the reply.
+                        self.server.drop_after_eval -= 1
+                        return
+                    self.wfile.write(b":1\r\n")
+            elif command == b"GET":
+                value = data.get(args[1])
+                self.wfile.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == b"DEL":
+                self.wfile.write(b":%d\r\n" % int(data.pop(args[1], None) is not None))
+            elif command in (b"AUTH", b"SELECT"):
+                self.wfile.write(b"+OK\r\n")
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def fake_redis():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeRespHandler)
+    server.daemon_threads = True
+    server.data, server.ttls = {}, {}
+    server.drop_after_eval = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _state(session_id, payload="~a~r"):
+    return SessionState(session_id, feature_payload=payload, lexicon=[("pneumonia", 0), ("dosage", 3)], pack_ids=["ab" * 32])
+
+
+def test_session_state_keeps_tokenizer_fingerprint():
+    state = SessionState("s1", tokenizer="cl100k")
+    assert SessionState.from_bytes("s1", state.to_bytes()).tokenizer == "cl100k"
+    assert SessionState.from_bytes("s1", b'{"f": ""}').tokenizer == ""
+
+
+def test_session_state_keeps_cost_table():
+    table = SymbolCostTable("pricey", costs={"!": 9}, overlay=("λ",), default_cost=2)
+    assert SessionState.from_bytes("s1", SessionState("s1", cost_table=table).to_bytes()).cost_table == table
+    assert SessionState.from_bytes("s1", SessionState("s1").to_bytes()).cost_table is None
+
+
+def test_memory_store_expires_and_evicts():
+    clock = FakeClock()
+    store = MemorySessionStore(ttl=10, max_entries=2, clock=clock)
+    store.put_many([_state("a"), _state("b")])
+    assert set(store.get_many(["a", "b", "missing"])) == {"a", "b"}
+    store.put(_state("c"))
+    assert store.get("a") is None
+    clock.now += 11
+    assert store.get("b") is None
+
+
+def test_sqlite_store_shares_state_between_instances(tmp_path):
+    clock = FakeClock()
+    writer = SQLiteSessionStore(tmp_path / "sessions.db", ttl=5, clock=clock)
+    reader = SQLiteSessionStore(tmp_path / "sessions.db", ttl=5, clock=clock)
+    writer.put_many([_state("a"), _state("b", "~a")])
+    loaded = reader.get_many(["a", "b"])
+    assert loaded["a"] == _state("a")
+    assert loaded["b"].feature_flags().enabled == {FeatureFlag.ASCII_CORE}
+    clock.now += 6
+    assert reader.get("a") is None
+    assert writer.purge_expired() == 2
+    writer.close()
+    reader.close()
+
+
+def test_redis_store_batches_over_resp(fake_redis):
+    host, port = fake_redis.server_address
+    store = build_session_store(f"redis://:secret@{host}:{port}/2", ttl=1.5)
+    assert isinstance(store, RedisSessionStore) and store.db == 2
+    store.put_many([_state("a"), _state("b")])
+    assert fake_redis.ttls[b"mtt:session:a"] == 1500
+    assert store.get_many(["a", "b", "c"]) == {"a": _state("a"), "b": _state("b")}
+    store.delete("a")
+    assert store.get("a") is None
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "redis"])
+def test_replace_is_compare_and_set(backend, tmp_path, fake_redis):
+    host, port = fake_redis.server_address
+    url = {"memory": "memory://", "sqlite": f"sqlite:///{tmp_path}/s.db", "redis": f"redis://{host}:{port}"}[backend]
+    store = build_session_store(url)
+    assert not store.replace(_state("missing"), 0)
+    store.put(_state("a"))
+    first, second = store.get("a"), store.get("a")
+    first.lexicon = [("first", 0)]
+    second.lexicon = [("second", 0)]
+    assert store.replace(first, 0) and first.version == 1
+    assert not store.replace(second, 0) and second.version == 0
+    stored = store.get("a")
+    assert (stored.version, stored.lexicon) == (1, [("first", 0)])
+    store.close()
+
+
+def test_redis_replace_settles_a_dropped_reply_without_false_conflict(fake_redis):
+    host, port = fake_redis.server_address
+    store = RedisSessionStore(host, port)
+    store.put(_state("a"))
+    state = store.get("a")
+    state.lexicon = [("applied", 0)]
+    fake_redis.drop_after_eval = 1
+    assert store.replace(state, 0) and state.version == 1
+    assert store.get("a").lexicon == [("applied", 0)]
+
+    stale = _state("a")
+    assert not store.replace(stale, 0) and stale.version == 0
+    store.close()
+
+
+def test_encoder_session_resumes_from_stored_lexicon():
+    distiller = PromptDistiller()
+    flags = FeatureFlags(enabled={FeatureFlag.ASCII_CORE, FeatureFlag.RELATIONAL_CONTEXT})
+    original = SymbolEncoder(flags, session=True, max_symbols=16)
+    first = distiller.distill("Diagnosis: pneumonia. dosage=500mg. plan -> rest")
+    original.encode(first)
+
+    store = MemorySessionStore()
+    store.put(SessionState("s1", flags.as_payload(), original.session_snapshot(), frames=original.frame_snapshot()))
+    state = store.get("s1")
+    resumed = SymbolEncoder(state.feature_flags(), session=True, max_symbols=16)
+    resumed.restore_session(state.lexicon, state.frames)
+
+    second = distiller.distill("Diagnosis: pneumonia. dosage=250mg. follow up -> clinic")
+    assert resumed.encode(second) == original.encode(second)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+import min_tokenization_translator
+from min_tokenization_translator.encoder import SymbolEncoder
+from min_tokenization_translator.startup import HEAVY_MODULES, IMPORT_BUDGETS_MS, budget_scale, profile_module
+
+ENV = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+
+def test_package_exports_resolve_lazily():
+    assert min_tokenization_translator.SymbolEncoder is SymbolEncoder
+    assert "PromptDistiller" in dir(min_tokenization_translator)
+    assert set(min_tokenization_translator.__all__) <= set(dir(min_tokenization_translator))
+    with pytest.raises(AttributeError):
+        min_tokenization_translator.NotAnExport
+
+
+def test_bare_package_import_loads_no_submodules():
+    profile = profile_module("min_tokenization_translator", runs=1, env=ENV)
+    assert [name for name in profile.modules if name.startswith("min_tokenization_translator.")] == []
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_entry_point_loads_no_heavy_modules(module):
+    profile = profile_module(module, runs=1, env=ENV)
+    assert not HEAVY_MODULES.intersection(profile.modules)
+
+
+# Wall-clock budgets depend on the machine, so they only run when asked for.
+@pytest.mark.skipif(not os.environ.get("MTT_CHECK_IMPORT_BUDGETS"), reason="set MTT_CHECK_IMPORT_BUDGETS=1 to enforce")
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_entry_point_import_budget(module):
+    profile = profile_module(module, runs=3, env=ENV)
+    assert profile.median_ms <= IMPORT_BUDGETS_MS[module] * budget_scale(), profile.heaviest
@@ -0,0 +1,78 @@
+import json
+import marshal
+import time
+
+import pytest
+
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+from min_tokenization_translator.substitution import PhraseAutomaton, load_automaton
+
+ENTRIES = {
+    "failing in ci": "\x01",
+    "failing in": "\x02",
+    "in ci": "\x03",
+    "ci": "\x04",
+    "he": "\x05",
+    "hers": "\x06",
+    "refactor parser": "\x1bA",
+}
+
+
+def test_leftmost_longest_on_word_boundaries():
+    automaton = PhraseAutomaton(ENTRIES)
+    assert automaton.substitute("tests failing in ci now") == "tests \x01 now"
+    assert automaton.substitute("failing in circle") == "\x02 circle"
+    assert automaton.substitute("ushers ci he hers") == "ushers \x04 \x05 \x06"
+    assert automaton.substitute("refactor parser; in ci") == "\x1bA; \x03"
+    assert automaton.substitute("") == ""
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["tests failing in ci now", "raw \x01 control and \x1b escape in ci", "\x1b\x1bA", "no phrases at all"],
+)
+def test_expand_inverts_substitute(text):
+    automaton = PhraseAutomaton(ENTRIES)
+    assert automaton.expand(automaton.substitute(text)) == text
+
+
+def test_unknown_symbol_is_rejected():
+    with pytest.raises(ValueError):
+        PhraseAutomaton(ENTRIES).expand("\x1bZ")
+
+
+def test_substitution_is_linear():
+    automaton = PhraseAutomaton(ENTRIES)
+    small, large = "tests failing in ci he " * 2000, "tests failing in ci he " * 20000
+    started = time.perf_counter()
+    automaton.substitute(small)
+    small_s = time.perf_counter() - started
+    started = time.perf_counter()
+    result = automaton.substitute(large)
+    large_s = time.perf_counter() - started
+    assert result == "tests \x01 \x05 " * 20000
+    assert large_s < small_s * 30
+
+
+def test_load_automaton_caches_on_disk_and_in_process(tmp_path):
+    dictionary = tmp_path / "core.json"
+    dictionary.write_text(json.dumps({"name": "core", "entries": ENTRIES}), encoding="utf-8")
+    cache = tmp_path / "cache"
+    first = load_automaton(dictionary, cache)
+    assert load_automaton(dictionary, cache) is first
+    (cached,) = cache.iterdir()
+    restored = PhraseAutomaton.from_state(marshal.loads(cached.read_bytes()))
+    assert restored.substitute("tests failing in ci") == first.substitute("tests failing in ci")
+
+
+def test_encoder_substitutes_dictionary_text():
+    automaton = PhraseAutomaton({"needs triage before": "\x01", "refactor parser module": "\x02"})
+    distilled = PromptDistiller().distill("Goal: refactor parser module. the ticket needs triage before friday, honestly")
+    plain = SymbolEncoder().encode(distilled)
+    result = SymbolEncoder(core=automaton).encode(distilled)
+    assert sum(map(len, result.dictionary.values())) < sum(map(len, plain.dictionary.values()))
+    assert SymbolDecoder(core=automaton).decode_result(result).fields == graph_fields(distilled)
+    session_encoder, session_decoder = SymbolEncoder(session=True, core=automaton), SymbolDecoder(session=True, core=automaton)
+    assert session_decoder.decode_result(session_encoder.encode(distilled)).fields == graph_fields(distilled)
@@ -0,0 +1,119 @@
+import runpy
+import sys
+from pathlib import Path
+from unittest import mock
+
+from min_tokenization_translator.bootstrap import BootstrapConfig, bootstrap_environment
+from min_tokenization_translator.handshake import HandshakeManager, ticket_key_disposer
+from min_tokenization_translator.tickets import TicketCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ticket_is_bound_to_features_tokenizer_and_lifetime():
+    clock = Clock()
+    cache = TicketCache(lifetime=60, clock=clock)
+    ticket = cache.issue("ssh-ed25519 AAAA", Path("/keys/k"), "~a~c", "tok-a")
+    assert len(ticket) == 38
+
+    assert cache.redeem(ticket, "~a~c", "tok-a").private_key_path == Path("/keys/k")
+    assert cache.redeem(ticket, "~a", "tok-a") is None
+    assert cache.redeem(ticket, "~a~c", "tok-b") is None
+    assert cache.redeem(ticket[:-2] + "AA", "~a~c", "tok-a") is None
+    assert cache.redeem("garbage", "~a~c", "tok-a") is None
+    clock.now += 61
+    assert cache.redeem(ticket, "~a~c", "tok-a") is None
+
+
+def test_ticket_cache_is_bounded_and_revocable():
+    cache = TicketCache(max_entries=2)
+    tickets = [cache.issue("pub", Path(f"/k{i}"), "~a", "tok") for i in range(3)]
+    assert len(cache) == 2
+    assert cache.redeem(tickets[0], "~a", "tok") is None
+    cache.revoke(tickets[2])
+    assert cache.redeem(tickets[2], "~a", "tok") is None
+    assert cache.redeem(tickets[1], "~a", "tok") is not None
+
+
+def test_evicted_entries_are_reported():
+    clock = Clock()
+    evicted = []
+    cache = TicketCache(lifetime=60, max_entries=2, clock=clock, on_evict=lambda entry: evicted.append(entry.private_key_path))
+    tickets = [cache.issue("pub", Path(f"/k{i}"), "~a", "tok") for i in range(3)]
+    assert evicted == [Path("/k0")]
+    cache.revoke(tickets[1])
+    assert evicted[-1] == Path("/k1")
+    clock.now += 61
+    cache.purge()
+    assert evicted[-1] == Path("/k2") and len(cache) == 0
+    cache.issue("pub", Path("/k3"), "~a", "tok")
+    cache.clear()
+    assert evicted == [Path("/k0"), Path("/k1"), Path("/k2"), Path("/k3")]
+
+
+def _fake_keypair(key_dir):
+    counter = iter(range(1_000_000))
+
+    def generate(self):
+        key_dir.mkdir(parents=True, exist_ok=True)
+        key_path = key_dir / f"session_{next(counter)}"
+        key_path.write_text("PRIVATE", encoding="utf-8")
+        key_path.with_suffix(".pub").write_text("ssh-ed25519 AAAAfake", encoding="utf-8")
+        return key_path
+
+    return generate
+
+
+def test_key_files_stay_bounded_across_handshakes(tmp_path):
+    key_dir = tmp_path / "ws" / ".keys"
+    key_dir.mkdir(parents=True)
+
+    def config(cache):
+        return BootstrapConfig(workspace_dir=tmp_path / "ws", packs_dir=tmp_path / "ws" / "packs", ticket_cache=cache)
+
+    with mock.patch.object(HandshakeManager, "_generate_keypair", _fake_keypair(key_dir)):
+        cache = TicketCache(max_entries=3, on_evict=ticket_key_disposer())
+        for _ in range(20):
+            assert len(list(key_dir.iterdir())) <= 2 * 3
+            bootstrap_environment(config(cache))
+        cache.clear()
+    assert list(key_dir.iterdir()) == []
+
+
+def test_cli_bootstrap_keeps_its_session_key(tmp_path, monkeypatch, capsys):
+    key_dir = tmp_path / "ws" / ".keys"
+    script = runpy.run_path(str(Path(__file__).parents[1] / "scripts" / "bootstrap_session.py"))
+    monkeypatch.setattr(sys, "argv", ["bootstrap_session.py", "--workspace-dir", str(tmp_path / "ws")])
+    with mock.patch.object(HandshakeManager, "_generate_keypair", _fake_keypair(key_dir)):
+        script["main"]()
+    assert "Handshake Packet:" in capsys.readouterr().out
+    assert (key_dir / "session_0").read_text(encoding="utf-8") == "PRIVATE"
+
+
+def test_bootstrap_resumes_without_key_generation(tmp_path):
+    cache = TicketCache()
+    key_path = tmp_path / "key"
+    key_path.write_text("PRIVATE", encoding="utf-8")
+    key_path.with_suffix(".pub").write_text("ssh-ed25519 AAAAfake", encoding="utf-8")
+
+    def config(ticket=None):
+        return BootstrapConfig(
+            workspace_dir=tmp_path / "ws",
+            packs_dir=tmp_path / "ws" / "packs",
+            ticket_cache=cache,
+            resumption_ticket=ticket,
+        )
+
+    with mock.patch.object(HandshakeManager, "_generate_keypair", return_value=key_path) as keygen:
+        first = bootstrap_environment(config())
+        resumed = bootstrap_environment(config(first.resumption_ticket))
+    assert keygen.call_count == 1
+    assert resumed.resumed and not first.resumed
+    assert "pub=ssh-ed25519 AAAAfake" in resumed.handshake_packet
+    assert resumed.handshake_packet != first.handshake_packet
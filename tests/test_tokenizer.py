@@ -0,0 +1,67 @@
+import base64
+import json
+
+from min_tokenization_translator.benchmark import BenchmarkConfig, BenchmarkRunner
+from min_tokenization_translator.config import FeatureFlags
+from min_tokenization_translator.tokenizer import (
+    BPETokenizer,
+    CachedTokenizer,
+    WhitespaceTokenizer,
+    _bytes_to_unicode,
+)
+
+
+def _ranks():
+    ranks = {bytes([value]): value for value in range(256)}
+    for token in (b"he", b"ll", b"hell", b"hello", b" w", b"or", b" wor", b" world"):
+        ranks[token] = len(ranks)
+    return ranks
+
+
+def test_bpe_merges_by_rank_and_loads_tiktoken_files(tmp_path):
+    ranks = _ranks()
+    path = tmp_path / "unit.tiktoken"
+    path.write_text(
+        "\n".join(f"{base64.b64encode(token).decode()} {rank}" for token, rank in ranks.items()), encoding="utf-8"
+    )
+    tokenizer = BPETokenizer.from_tiktoken_file(path)
+    assert tokenizer.encode("hello world") == [ranks[b"hello"], ranks[b" world"]]
+    assert tokenizer.count("hello world!") == 3
+    assert tokenizer.count("hexllo") == 4
+
+
+def test_bpe_loads_gpt2_vocab_and_merges(tmp_path):
+    byte_encoder = _bytes_to_unicode()
+    space = byte_encoder[ord(" ")]
+    (tmp_path / "vocab.json").write_text(json.dumps({"h": 0, "e": 1, "he": 2}), encoding="utf-8")
+    (tmp_path / "merges.txt").write_text(f"#version: 0.2\nh e\n{space} h\n", encoding="utf-8")
+    tokenizer = BPETokenizer.from_vocab_merges(tmp_path / "vocab.json", tmp_path / "merges.txt")
+    assert tokenizer.count("he he") == 3
+
+
+class CountingBackend(WhitespaceTokenizer):
+    def __init__(self):
+        self.calls = 0
+
+    def count_many(self, texts):
+        texts = list(texts)
+        self.calls += len(texts)
+        return super().count_many(texts)
+
+
+def test_cached_tokenizer_counts_each_distinct_text_once():
+    backend = CountingBackend()
+    cached = CachedTokenizer(backend, max_entries=2)
+    assert cached.count_many(["a b", "a b", "c"]) == [2, 2, 1]
+    assert cached.count("a b") == 2
+    assert backend.calls == 2
+    assert (cached.hits, cached.misses) == (2, 2)
+
+
+def test_benchmark_counts_with_pluggable_tokenizer():
+    backend = CountingBackend()
+    config = BenchmarkConfig(corpus=["Diagnose patient.", "Diagnose patient."], feature_flags=FeatureFlags(), runs=3, tokenizer=backend)
+    result = BenchmarkRunner(config).run()
+    assert result.baseline_tokens == 2
+    # Repeats within a run hit the memo; every timed run starts from a fresh one.
+    assert backend.calls == 2 * (config.warmup + config.runs)
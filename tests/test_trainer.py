@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from min_tokenization_translator.corpus import iter_corpus
+from min_tokenization_translator.decoder import SymbolDecoder
+from min_tokenization_translator.distiller import PromptDistiller
+from min_tokenization_translator.encoder import SymbolEncoder, graph_fields
+from min_tokenization_translator.trainer import (
+    CORE_CAPACITY,
+    CORE_SYMBOLS,
+    DictionaryTrainer,
+    core_symbols,
+    load_dictionary,
+)
+
+CORPUS = [
+    f"Goal: refactor parser module. Owner: alice. Tests: failing in ci. ticket {index} needs triage" for index in range(20)
+]
+
+
+def test_iter_corpus_reads_text_and_json(tmp_path):
+    text = tmp_path / "corpus.txt"
+    text.write_text("first prompt\n\n  second prompt  \n", encoding="utf-8")
+    listed = tmp_path / "corpus.json"
+    listed.write_text(json.dumps(["a", "b"]), encoding="utf-8")
+    assert list(iter_corpus(text)) == ["first prompt", "second prompt"]
+    assert list(iter_corpus(listed)) == ["a", "b"]
+    (tmp_path / "bad.json").write_text("{}", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_corpus(tmp_path / "bad.json"))
+
+
+def test_core_symbols_are_prefix_free_and_not_whitespace():
+    symbols = core_symbols(CORE_CAPACITY)
+    assert len(set(symbols)) == CORE_CAPACITY
+    assert symbols[: len(CORE_SYMBOLS)] == list(CORE_SYMBOLS)
+    assert not any(symbol.isspace() or "|" in symbol or "~" in symbol for symbol in symbols)
+    assert not any(a != b and b.startswith(a) for a in symbols for b in symbols)
+    with pytest.raises(ValueError):
+        core_symbols(CORE_CAPACITY + 1)
+
+
+def test_trainer_ranks_phrases_by_tokens_saved(tmp_path):
+    trainer = DictionaryTrainer()
+    assert trainer.feed_many(CORPUS) == 20
+    dictionary = trainer.train(size=8, min_count=3)
+    phrases = [candidate.phrase for candidate in dictionary.candidates]
+    assert set(phrases[:2]) == {"refactor parser module", "failing in ci"}
+    scores = [candidate.score for candidate in dictionary.candidates]
+    assert scores == sorted(scores, reverse=True)
+    assert all(not phrase.startswith("ticket") for phrase in phrases)
+    # Picking "refactor parser module" covered its bigrams.
+    assert "parser module" not in phrases
+
+    path = tmp_path / "core.json"
+    dictionary.save(path)
+    entries = load_dictionary(path)
+    assert list(entries) == phrases
+    assert entries[phrases[0]] == CORE_SYMBOLS[0]
+
+
+def test_trainer_memory_is_bounded():
+    trainer = DictionaryTrainer(capacity=16)
+    trainer.feed_many(f"unique{index} word{index} token{index} extra{index}" for index in range(50))
+    assert len(trainer._segments) <= 16 and len(trainer._ngrams) <= 16
+    assert trainer.floor >= 1
+
+
+def test_preloaded_dictionary_round_trips_and_shrinks_dictionary():
+    dictionary = DictionaryTrainer()
+    dictionary.feed_many(CORPUS)
+    core = dictionary.train(size=8).entries()
+    distilled = PromptDistiller().distill(CORPUS[0])
+    plain = SymbolEncoder().encode(distilled)
+    encoder = SymbolEncoder(preload=core)
+    result = encoder.encode(distilled)
+    assert not set(core) & set(result.dictionary.values())
+    assert len(result.dictionary) < len(plain.dictionary)
+    assert SymbolDecoder(preload=core).decode_result(result).fields == graph_fields(distilled)
+    session = SymbolDecoder(session=True, preload=core)
+    session_encoder = SymbolEncoder(session=True, preload=core)
+    assert session.decode_result(session_encoder.encode(distilled)).fields == graph_fields(distilled)